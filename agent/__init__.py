@@ -0,0 +1,8 @@
+from .cache import DiskCache
+from .clients import CachedModel, CachedSearch, gemini_model, tavily_search
+from .graph import State, build_planner, initial_state, make_nodes
+
+__all__ = [
+    "CachedModel", "CachedSearch", "DiskCache", "State",
+    "build_planner", "gemini_model", "initial_state", "make_nodes", "tavily_search",
+]
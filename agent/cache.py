@@ -0,0 +1,57 @@
+"""Persistent on-disk cache for LLM and search calls.
+
+Each entry is a small JSON file named after the SHA-256 of its key, so
+entries survive restarts, can be shared by several processes and a stale
+one can simply be deleted. Writes go through a temporary file and
+``os.replace`` so a reader never sees half an entry.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_DIR = os.environ.get("AGENT_CACHE_DIR", ".agent_cache")
+DEFAULT_TTL = float(os.environ.get("AGENT_CACHE_TTL", 24 * 60 * 60))
+
+MISSING = object()
+
+
+class DiskCache:
+    def __init__(self, directory=DEFAULT_DIR, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, *key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, *key):
+        """Cached value of ``key``, or ``MISSING`` if absent or expired."""
+        try:
+            with open(self.path(*key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+        if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            return MISSING
+        return entry["value"]
+
+    def set(self, value, *key):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"created": time.time(), "key": key, "value": value}, f)
+        os.replace(tmp, self.path(*key))
+
+    def get_or_call(self, fn, *key):
+        value = self.get(*key)
+        if value is MISSING:
+            value = fn()
+            self.set(value, *key)
+        return value
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,48 @@
+"""Cached wrappers around the model and the search tool.
+
+The graph nodes only need two callables: ``generate(prompt) -> str`` and
+``search(query) -> list of result dicts``. :class:`CachedModel` and
+:class:`CachedSearch` provide them on top of anything with
+``generate_content`` / ``invoke`` (Gemini's ``GenerativeModel``, Tavily's
+LangChain tool or a local stub), caching results in a :class:`DiskCache`.
+The real clients are imported lazily so the package works without them.
+"""
+import os
+
+from .cache import DiskCache
+
+DEFAULT_MODEL = "gemini-1.5-flash-latest"
+
+
+class CachedModel:
+    def __init__(self, model, cache=None, name=None):
+        self.model = model
+        self.cache = cache if cache is not None else DiskCache()
+        self.name = name or getattr(model, "model_name", type(model).__name__)
+
+    def __call__(self, prompt):
+        return self.cache.get_or_call(lambda: self.model.generate_content(prompt).text, "llm", self.name, prompt)
+
+
+class CachedSearch:
+    def __init__(self, tool, cache=None, name=None):
+        self.tool = tool
+        self.cache = cache if cache is not None else DiskCache()
+        self.name = name or f"{type(tool).__name__}:{getattr(tool, 'max_results', '')}"
+
+    def __call__(self, query):
+        return self.cache.get_or_call(lambda: list(self.tool.invoke(query)), "search", self.name, query)
+
+
+def gemini_model(name=DEFAULT_MODEL, cache=None):
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    return CachedModel(genai.GenerativeModel(name), cache)
+
+
+def tavily_search(max_results=5, cache=None):
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    tool = TavilySearchResults(max_results=max_results, api_key=os.environ.get("TAVILY_API_KEY"))
+    return CachedSearch(tool, cache)
@@ -0,0 +1,74 @@
+"""The plan -> research -> generate travel planner from ``Notebook.ipynb``.
+
+:func:`make_nodes` binds the node functions to a ``generate`` and a
+``search`` callable (see :mod:`agent.clients`); :func:`build_planner`
+wires them into a LangGraph ``StateGraph``. The research node runs one
+search per outline line, at most ``concurrency`` at a time, instead of
+one round trip after another.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, TypedDict
+
+DEFAULT_CONCURRENCY = 4
+
+
+class State(TypedDict):
+    destination: str
+    dates: str
+    outline: str
+    research: List[str]
+    itinerary: str
+
+
+def initial_state(destination, dates):
+    return State(destination=destination, dates=dates, outline="", research=[], itinerary="")
+
+
+def snippet(results):
+    """Text of the first search result (Tavily calls it ``content``)."""
+    if not results:
+        return ""
+    first = results[0]
+    return first.get("content") or first.get("snippet", "")
+
+
+def make_nodes(generate, search, concurrency=DEFAULT_CONCURRENCY):
+    def plan_node(state: State) -> dict:
+        prompt = (
+            f"You are expert travel planner. Create a 5‑day outline for "
+            f"{state['destination']} ({state['dates']})."
+        )
+        return {"outline": generate(prompt)}
+
+    def research_node(state: State) -> dict:
+        days = [day.strip() for day in state["outline"].splitlines() if day.strip()]
+        queries = [f"{state['destination']} {day} highlights" for day in days]
+        if not queries:
+            return {"research": []}
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(queries))) as executor:
+            # map() keeps the outline's order whatever order searches finish in.
+            return {"research": [snippet(results) for results in executor.map(search, queries)]}
+
+    def generate_node(state: State) -> dict:
+        content = "\n".join(state["research"])
+        prompt = (
+            f"Outline:\n{state['outline']}\n\nResearch:\n{content}\n\n"
+            "Generate a detailed day‑by‑day itinerary."
+        )
+        return {"itinerary": generate(prompt)}
+
+    return {"plan": plan_node, "gather_research": research_node, "generate": generate_node}
+
+
+def build_planner(generate, search, concurrency=DEFAULT_CONCURRENCY):
+    """Compiled LangGraph planner; invoke it with :func:`initial_state`."""
+    from langgraph.graph import END, START, StateGraph
+
+    graph = StateGraph(State)
+    for name, node in make_nodes(generate, search, concurrency).items():
+        graph.add_node(name, node)
+    graph.add_edge(START, "plan")
+    graph.add_edge("plan", "gather_research")
+    graph.add_edge("gather_research", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile()
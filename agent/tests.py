@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from .cache import MISSING, DiskCache
+from .clients import CachedModel, CachedSearch
+from .graph import build_planner, initial_state, make_nodes
+
+
+class StubModel:
+    model_name = "stub"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        if prompt.startswith("You are expert travel planner"):
+            return SimpleNamespace(text="Day 1: Old town\n\nDay 2: Museums\nDay 3: Beach")
+        return SimpleNamespace(text=f"itinerary ({len(prompt)} chars of context)")
+
+
+class StubTool:
+    """Search tool whose calls only complete once ``parallel`` run together."""
+    max_results = 5
+
+    def __init__(self, parallel=1):
+        self.barrier = threading.Barrier(parallel, timeout=5)
+        self.queries = []
+
+    def invoke(self, query):
+        self.queries.append(query)
+        self.barrier.wait()
+        return [{"url": "https://example.com", "content": f"about {query}"}]
+
+
+class AgentTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = DiskCache(tmp.name, ttl=60)
+
+
+class DiskCacheTests(AgentTestCase):
+    def test_round_trip_and_ttl(self):
+        self.assertIs(self.cache.get("llm", "m", "hi"), MISSING)
+        self.cache.set({"a": [1]}, "llm", "m", "hi")
+        self.assertEqual(self.cache.get("llm", "m", "hi"), {"a": [1]})
+        self.assertIs(self.cache.get("llm", "other", "hi"), MISSING)
+
+        with mock.patch("agent.cache.time.time", return_value=time.time() + 61):
+            self.assertIs(self.cache.get("llm", "m", "hi"), MISSING)
+
+    def test_clear(self):
+        self.cache.set(1, "k")
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+
+class CachedClientTests(AgentTestCase):
+    def test_model_calls_are_cached_per_model_and_prompt(self):
+        model = StubModel()
+        generate = CachedModel(model, self.cache)
+        self.assertEqual(generate("Hi"), generate("Hi"))
+        self.assertEqual(model.prompts, ["Hi"])
+        CachedModel(model, self.cache, name="other")("Hi")
+        self.assertEqual(model.prompts, ["Hi", "Hi"])
+
+    def test_search_calls_are_cached(self):
+        tool = StubTool()
+        search = CachedSearch(tool, self.cache)
+        self.assertEqual(search("rome"), [{"url": "https://example.com", "content": "about rome"}])
+        search("rome")
+        self.assertEqual(tool.queries, ["rome"])
+
+
+class PlannerNodeTests(AgentTestCase):
+    def run_nodes(self, nodes, state):
+        for node in nodes.values():
+            state.update(node(state))
+        return state
+
+    def test_research_runs_concurrently_in_outline_order(self):
+        model, tool = StubModel(), StubTool(parallel=3)
+        nodes = make_nodes(CachedModel(model, self.cache), CachedSearch(tool, self.cache), concurrency=3)
+        state = self.run_nodes(nodes, initial_state("Lisbon", "July 1-5"))
+        # The barrier would time out if the three searches ran one by one.
+        self.assertEqual(state["research"], [
+            "about Lisbon Day 1: Old town highlights",
+            "about Lisbon Day 2: Museums highlights",
+            "about Lisbon Day 3: Beach highlights",
+        ])
+        self.assertTrue(state["itinerary"].startswith("itinerary"))
+        self.assertIn("about Lisbon Day 3: Beach highlights", model.prompts[-1])
+
+    def test_rerun_is_served_from_cache(self):
+        model, tool = StubModel(), StubTool(parallel=1)
+        nodes = make_nodes(CachedModel(model, self.cache), CachedSearch(tool, self.cache), concurrency=1)
+        first = self.run_nodes(nodes, initial_state("Lisbon", "July 1-5"))
+        second = self.run_nodes(nodes, initial_state("Lisbon", "July 1-5"))
+        self.assertEqual(first, second)
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(len(tool.queries), 3)
+
+    def test_langgraph_planner(self):
+        try:
+            import langgraph  # noqa: F401
+        except ImportError:
+            self.skipTest("langgraph is not installed")
+        planner = build_planner(CachedModel(StubModel(), self.cache), CachedSearch(StubTool(), self.cache))
+        state = planner.invoke(initial_state("Lisbon", "July 1-5"))
+        self.assertEqual(len(state["research"]), 3)
@@ -0,0 +1,113 @@
+"""Blast-radius queries: SQL joins vs the in-memory bitmap index.
+
+A scratch SQLite database is filled by ``generate_fleet`` with ``--rows``
+HostCVE links (50 per host), then "which tracks are hit by any of these
+50 CVEs scoring 9 or more" and a few AND/OR/NOT variants are answered by
+joining HostCVE against Host and Track, and by :mod:`cveapp.blast_radius`::
+
+    python benchmarks/bench_blast_radius.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count, Q  # noqa: E402
+
+from cveapp import blast_radius  # noqa: E402
+from cveapp.models import CVE, Host, HostCVE, Track  # noqa: E402
+
+DENSITY = 50
+
+
+def sql_tracks(condition):
+    hosts = Host.objects.filter(condition).values("id")
+    return list(
+        Track.objects.filter(hosts__in=hosts).annotate(host_count=Count("hosts")).values_list("name", "host_count")
+    )
+
+
+def queries(cve_ids, other_track):
+    hit = Q(id__in=HostCVE.objects.filter(cve__cve_id__in=cve_ids, cve__score__gte=9).values("host_id"))
+    windows = Q(os_type="windows")
+    return {
+        "50 CVEs, score >= 9": (
+            hit,
+            {"cve": cve_ids, "min_score": 9},
+        ),
+        "... AND NOT one track": (
+            hit & ~Q(track__name=other_track),
+            {"and": [{"cve": cve_ids, "min_score": 9}, {"not": {"track": other_track}}]},
+        ),
+        "... OR windows": (
+            hit | windows,
+            {"or": [{"cve": cve_ids, "min_score": 9}, {"os_type": "windows"}]},
+        ),
+        "any CVE, score >= 9": (
+            Q(id__in=HostCVE.objects.filter(cve__score__gte=9).values("host_id")),
+            {"min_score": 9},
+        ),
+    }
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cves", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.close()
+        connection.settings_dict["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        call_command("migrate", verbosity=0)
+        call_command(
+            "generate_fleet", tracks=10, hosts=args.rows // DENSITY, cves=args.cves, packages=1,
+            density=DENSITY, stdout=StringIO(),
+        )
+        cve_ids = list(CVE.objects.order_by("-score", "id").values_list("cve_id", flat=True)[:100:2])
+        other_track = Track.objects.order_by("name").values_list("name", flat=True).first()
+
+        started = time.perf_counter()
+        blast_radius.query({"min_score": 0})
+        build = time.perf_counter() - started
+        results = {
+            name: (
+                best_of(lambda: sql_tracks(condition), args.repeat),
+                best_of(lambda: blast_radius.query(expression), args.repeat),
+            )
+            for name, (condition, expression) in queries(cve_ids, other_track).items()
+        }
+        connection.close()
+
+    print(f"{HostCVE.__name__} rows: {args.rows}, index built in {build:.2f} s")
+    print(f"{'query':<24}{'sql ms':>10}{'index ms':>10}{'x':>8}")
+    for name, (sql, index) in results.items():
+        print(f"{name:<24}{sql * 1000:>10.1f}{index * 1000:>10.2f}{sql / index:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
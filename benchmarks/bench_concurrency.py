@@ -0,0 +1,163 @@
+"""Dashboard reads while a bulk writer ingests, per database configuration.
+
+Each configuration runs in a child process (settings are read from the
+environment at start-up) against a scratch database: reader threads page
+through CVEs and count a host's findings while one writer inserts HostCVE
+rows in large transactions. Reported are read throughput and latency,
+"database is locked" failures and the writer's total time::
+
+    python benchmarks/bench_concurrency.py                 # SQLite default vs tuned
+    python benchmarks/bench_concurrency.py --readers 8 --batches 40
+    CVE_DB_ENGINE=postgresql CVE_DB_NAME=cve python benchmarks/bench_concurrency.py
+
+The PostgreSQL run uses Django's test database (``test_<name>``), which it
+creates and drops.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def configurations():
+    configs = {
+        "sqlite default": {"CVE_DB_ENGINE": "sqlite", "CVE_SQLITE_TUNED": "0"},
+        "sqlite tuned": {"CVE_DB_ENGINE": "sqlite", "CVE_SQLITE_TUNED": "1"},
+    }
+    if os.environ.get("CVE_DB_ENGINE") == "postgresql":
+        configs["postgresql"] = {"CVE_DB_POOL_SIZE": ""}
+        configs["postgresql pooled"] = {"CVE_DB_POOL_SIZE": "8"}
+    return configs
+
+
+def run(args):
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import OperationalError, connection, transaction
+
+    from cveapp.models import CVE, Host, HostCVE
+
+    if connection.vendor == "sqlite":
+        call_command("migrate", verbosity=0)
+    else:
+        connection.creation.create_test_db(verbosity=0)
+
+    Host.objects.bulk_create([Host(name=f"host{i}", os_type="linux") for i in range(args.hosts)], batch_size=5000)
+    CVE.objects.bulk_create(
+        [CVE(cve_id=f"CVE-2024-{i}", description="synthetic", score=(i % 100) / 10, impact="HIGH") for i in range(args.cves)],
+        batch_size=5000,
+    )
+    host_ids = list(Host.objects.values_list("id", flat=True))
+    cve_ids = list(CVE.objects.values_list("id", flat=True))
+
+    done = threading.Event()
+    latencies, read_errors, write = [], [], {}
+    lock = threading.Lock()
+
+    def reader(offset):
+        samples, errors = [], 0
+        position = offset
+        while not done.is_set():
+            host_id = host_ids[position % len(host_ids)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                list(CVE.objects.order_by("-score", "id")[:50])
+                HostCVE.objects.filter(host_id=host_id).count()
+            except OperationalError:
+                errors += 1
+                continue
+            samples.append((time.perf_counter() - started) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(samples)
+            read_errors.append(errors)
+
+    def writer():
+        errors = 0
+        started = time.perf_counter()
+        per_batch = args.batch_size // len(cve_ids) + 1
+        for batch in range(args.batches):
+            hosts = host_ids[(batch * per_batch) % len(host_ids):][:per_batch]
+            rows = [HostCVE(host_id=h, cve_id=c) for h in hosts for c in cve_ids][:args.batch_size]
+            try:
+                with transaction.atomic():
+                    HostCVE.objects.bulk_create(rows, ignore_conflicts=True, batch_size=1000)
+            except OperationalError:
+                errors += 1
+        write.update(seconds=time.perf_counter() - started, errors=errors)
+        connection.close()
+        done.set()
+
+    threads = [threading.Thread(target=reader, args=(i * 997,)) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if connection.vendor != "sqlite":
+        connection.creation.destroy_test_db(connection.settings_dict["NAME"], verbosity=0)
+    latencies.sort()
+    print(json.dumps({
+        "reads_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else None,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        "max_ms": latencies[-1] if latencies else None,
+        "read_errors": sum(read_errors),
+        "write_s": write["seconds"],
+        "write_errors": write["errors"],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--cves", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=20_000, help="HostCVE rows per write transaction.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run(args)
+        return
+
+    results = {}
+    for name, overrides in configurations().items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **overrides)
+            if env.get("CVE_DB_ENGINE", "sqlite") == "sqlite":
+                env["CVE_DB_NAME"] = os.path.join(tmp, "bench.sqlite3")
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", *sys.argv[1:]],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+        results[name] = json.loads(output.splitlines()[-1])
+
+    columns = ["reads_per_s", "p50_ms", "p95_ms", "max_ms", "read_errors", "write_s", "write_errors"]
+    print(f"{'configuration':<20}" + "".join(f"{column:>14}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<20}" + "".join(
+            f"{result[column]:>14.1f}" if isinstance(result[column], float) else f"{str(result[column]):>14}"
+            for column in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare HostCVE/CVE query latency before and after the 0007 indexes.
+
+Builds a throwaway SQLite database migrated to 0006, loads a synthetic fleet
+with raw ``INSERT ... SELECT`` statements, times the queries behind the
+``by_os`` action and score-filtered lists, then migrates to 0007 and times
+them again::
+
+    python benchmarks/bench_indexes.py               # 1M HostCVE rows
+    python benchmarks/bench_indexes.py --rows 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.migrations.loader import MigrationLoader  # noqa: E402
+
+BEFORE, AFTER = "0006_risk_summaries", "0007_hostcve_unique_and_indexes"
+
+
+def models_at(migration):
+    """HostCVE and CVE as of ``migration``; today's models have columns 0006 lacks."""
+    apps = MigrationLoader(connection).project_state(("cveapp", migration)).apps
+    return apps.get_model("cveapp", "HostCVE"), apps.get_model("cveapp", "CVE")
+
+
+def load(hosts, cves, per_host):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s) "
+            "INSERT INTO cveapp_host (name, os_type) "
+            "SELECT 'host' || i, CASE WHEN i %% 5 = 0 THEN 'windows' ELSE 'linux' END FROM n",
+            [hosts],
+        )
+        cursor.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s) "
+            "INSERT INTO cveapp_cve (cve_id, description, score, impact) "
+            "SELECT 'CVE-2024-' || i, 'synthetic', (i * 37 %% 101) / 10.0, 'HIGH' FROM n",
+            [cves],
+        )
+        # Host h gets CVEs (h * 7 + k * 13) mod cves for k < per_host, which are
+        # distinct as long as 13 does not divide cves and per_host <= cves.
+        cursor.execute(
+            "WITH RECURSIVE k(j) AS (SELECT 0 UNION ALL SELECT j + 1 FROM k WHERE j < %s - 1) "
+            "INSERT INTO cveapp_hostcve (host_id, cve_id) "
+            "SELECT h.id, (h.id * 7 + k.j * 13) %% %s + 1 FROM cveapp_host h, k",
+            [per_host, cves],
+        )
+        cursor.execute("ANALYZE")
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run_queries(migration, repeat):
+    HostCVE, CVE = models_at(migration)
+    queries = {
+        "by_os windows (all rows)": lambda: list(
+            HostCVE.objects.filter(host__os_type="windows").values_list("id", "host_id", "cve_id")
+        ),
+        "hostcves score>=9 (first page)": lambda: list(
+            HostCVE.objects.select_related("host", "cve")
+            .filter(cve__score__gte=9.0).order_by("-cve__score", "id")[:100]
+        ),
+        "cves score>=9 count": lambda: CVE.objects.filter(score__gte=9.0).count(),
+        "cves keyset first page": lambda: list(CVE.objects.order_by("-score", "id")[:100]),
+        "hosts affected by one cve": lambda: list(
+            HostCVE.objects.filter(cve_id=42).values_list("host_id", flat=True)
+        ),
+    }
+    return {name: timed(fn, repeat) for name, fn in queries.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="HostCVE rows (approximate).")
+    parser.add_argument("--per-host", type=int, default=200)
+    parser.add_argument("--cves", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.close()
+        connection.settings_dict["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        call_command("migrate", "cveapp", BEFORE, verbosity=0)
+        load(max(1, args.rows // args.per_host), args.cves, args.per_host)
+        HostCVE, CVE = models_at(BEFORE)
+        print(f"{HostCVE.objects.count():,} HostCVE rows, {CVE.objects.count():,} CVEs")
+
+        before = run_queries(BEFORE, args.repeat)
+        call_command("migrate", "cveapp", AFTER, verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        after = run_queries(AFTER, args.repeat)
+        connection.close()
+
+    print(f"{'query':<34}{'before ms':>12}{'after ms':>12}")
+    for name in before:
+        print(f"{name:<34}{before[name]:>12.1f}{after[name]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the package-to-CVE matching engine on a synthetic fleet.
+
+Runs entirely in memory (no database), e.g.::
+
+    python benchmarks/bench_matching.py                  # 5000 hosts x 1000 packages vs 200k CVEs
+    python benchmarks/bench_matching.py --hosts 200 --cves 20000
+
+Hosts are drawn from a handful of base images with a few per-host package
+upgrades, which is what real fleets look like.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from cveapp.matching import MatchIndex  # noqa: E402
+
+
+def make_version(rng):
+    return f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 99)}"
+
+
+def make_ranges(rng, names, cves):
+    for cve_id in range(1, cves + 1):
+        for _ in range(rng.choice((1, 1, 2))):
+            name = rng.choice(names)
+            end = f"{make_version(rng)}-{rng.randint(1, 20)}.el8"
+            start = make_version(rng) if rng.random() < 0.3 else ""
+            yield (cve_id, name, "", start, True, end, False)
+
+
+def make_fleet(rng, names, hosts, packages, images):
+    bases = []
+    for _ in range(images):
+        chosen = rng.sample(names, packages)
+        bases.append([(n, "", make_version(rng), f"{rng.randint(1, 20)}.el8", "x86_64") for n in chosen])
+    for _ in range(hosts):
+        inventory = list(rng.choice(bases))
+        for i in rng.sample(range(packages), 5):
+            name, epoch, _, release, arch = inventory[i]
+            inventory[i] = (name, epoch, make_version(rng), release, arch)
+        yield inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--packages", type=int, default=1000, help="Packages per host.")
+    parser.add_argument("--cves", type=int, default=200_000)
+    parser.add_argument("--names", type=int, default=20_000, help="Distinct package names.")
+    parser.add_argument("--images", type=int, default=10, help="Distinct base images.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = [f"pkg{i}" for i in range(args.names)]
+
+    started = time.perf_counter()
+    ranges = list(make_ranges(rng, names, args.cves))
+    fleet = list(make_fleet(rng, names, args.hosts, args.packages, args.images))
+    generated = time.perf_counter()
+
+    index = MatchIndex(ranges)
+    built = time.perf_counter()
+
+    links = 0
+    for inventory in fleet:
+        links += len(index.match_packages(inventory))
+    matched = time.perf_counter()
+
+    lookups = args.hosts * args.packages
+    print(f"ranges:   {len(ranges):>12,}  (generated in {generated - started:.1f}s)")
+    print(f"index:    {built - generated:>12.2f}s  ({len(index.tables):,} package tables)")
+    print(f"matching: {matched - built:>12.2f}s  ({lookups:,} packages, {lookups / (matched - built):,.0f}/s)")
+    print(f"links:    {links:>12,}")
+
+
+if __name__ == "__main__":
+    main()
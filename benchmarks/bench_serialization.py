@@ -0,0 +1,92 @@
+"""CPU time and payload size of HostCVE list rendering: serializers vs compact.
+
+A scratch SQLite database is filled by ``generate_fleet`` with ``--rows``
+HostCVE links (50 per host), then every row is rendered to JSON three
+ways: ``HostCVESerializer(many=True)`` with DRF's ``JSONRenderer`` (the
+old path), :mod:`cveapp.compact` nested rows and the normalized shape,
+both with :class:`cveapp.renderers.FastJSONRenderer`::
+
+    python benchmarks/bench_serialization.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from cveapp import renderers  # noqa: E402
+from cveapp.compact import Layout  # noqa: E402
+from cveapp.models import HostCVE  # noqa: E402
+from cveapp.serializers import HostCVESerializer  # noqa: E402
+
+DENSITY = 50
+
+
+def serializers_path():
+    rows = HostCVE.objects.select_related("host", "cve").order_by("-cve__score", "id")
+    return JSONRenderer().render(HostCVESerializer(rows, many=True).data)
+
+
+def compact_path(shape):
+    layout = Layout()
+    rows = HostCVE.objects.order_by("-cve__score", "id").values(*layout.columns())
+    data = layout.normalized(rows) if shape == "normalized" else layout.nested(rows)
+    return renderers.FastJSONRenderer().render(data)
+
+
+def measure(fn, repeat):
+    best, size = None, 0
+    for _ in range(repeat):
+        started = time.process_time()
+        size = len(fn())
+        seconds = time.process_time() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cves", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.close()
+        connection.settings_dict["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        call_command("migrate", verbosity=0)
+        call_command(
+            "generate_fleet", tracks=10, hosts=args.rows // DENSITY, cves=args.cves, packages=1,
+            density=DENSITY, stdout=StringIO(),
+        )
+        paths = {
+            "serializers": serializers_path,
+            "compact nested": lambda: compact_path("nested"),
+            "compact normalized": lambda: compact_path("normalized"),
+        }
+        results = {name: measure(fn, args.repeat) for name, fn in paths.items()}
+        connection.close()
+
+    base_cpu, base_size = results["serializers"]
+    print(f"{HostCVE.__name__} rows: {args.rows}, orjson: {'yes' if renderers.orjson else 'no'}")
+    print(f"{'path':<20}{'cpu s':>10}{'MB':>10}{'cpu x':>8}{'size x':>8}")
+    for name, (cpu, size) in results.items():
+        print(f"{name:<20}{cpu:>10.2f}{size / 1e6:>10.1f}{base_cpu / cpu:>8.1f}{base_size / size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
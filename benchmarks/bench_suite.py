@@ -0,0 +1,244 @@
+"""Time every API endpoint and ingestion path on generated fleets.
+
+For each size a scratch SQLite database is migrated and filled by the
+``generate_fleet`` command. The ingestion commands, the bulk API and then
+every read endpoint are timed through Django's test client, so no server
+is needed. Read endpoints are measured cold (empty response cache) and
+warm, together with their query count and response size. Results are
+written as JSON so runs on two commits can be compared::
+
+    python benchmarks/bench_suite.py --sizes small medium -o before.json
+    git checkout other-branch
+    python benchmarks/bench_suite.py --sizes small medium -o after.json
+    python benchmarks/bench_suite.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cve_dashboard.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from cveapp.fleet import Fleet, load_catalogue  # noqa: E402
+from cveapp.models import CVE, Host, HostCVE, Inventory, InventoryPackage, Track  # noqa: E402
+
+ENDPOINTS = {
+    "tracks list": "/api/tracks/",
+    "track summary": "/api/tracks/{track}/summary/",
+    "hosts list": "/api/hosts/",
+    "hosts by track": "/api/hosts/?track={track}",
+    "host summary": "/api/hosts/{host}/summary/",
+    "cves first page": "/api/cves/",
+    "cves critical page": "/api/cves/?severity=critical",
+    "cves id prefix": "/api/cves/?cve_id=CVE-2019",
+    "cve detail": "/api/cves/{cve}/",
+    "cves search": "/api/cves/search/?q=buffer+overflow",
+    "hostcves first page": "/api/hostcves/",
+    "hostcves by_host": "/api/hostcves/by_host/?host_id={host}",
+    "hostcves by_track": "/api/hostcves/by_track/?track_id={track}",
+    "hostcves by_track critical": "/api/hostcves/by_track/?track_id={track}&severity=critical",
+    "hostcves by_os windows": "/api/hostcves/by_os/?os_type=windows",
+    "hostcves export ndjson": "/api/hostcves/export/",
+    "hostcves export csv.gz": "/api/hostcves/export/?fmt=csv&gzip=1",
+    "async track cves": "/api/async/tracks/{track}/cves/",
+    "async host cves": "/api/async/hosts/{host}/cves/",
+    "async track summary": "/api/async/tracks/{track}/summary/",
+    "async cve detail": "/api/async/cves/{cve_id}/",
+}
+
+
+def quietly(*args, **options):
+    call_command(*args, verbosity=0, stdout=StringIO(), **options)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def nvd_feed(path, fleet, count, offset):
+    """Write an NVD 2.0 feed of ``count`` new CVEs with package ranges."""
+    items = []
+    for index in range(offset, offset + count):
+        cve_id, description, score, impact = fleet.cve(index)
+        matches = [
+            {"vulnerable": True, "criteria": f"cpe:2.3:a:*:{name}:*:*:*:*:*:*:*:*", "versionEndExcluding": end}
+            for name, _, _, end in fleet.affected()
+        ]
+        items.append({"cve": {
+            "id": cve_id,
+            "lastModified": "2024-06-01T00:00:00.000",
+            "vulnStatus": "Analyzed",
+            "descriptions": [{"lang": "en", "value": description}],
+            "metrics": {"cvssMetricV31": [{"type": "Primary", "cvssData": {"baseScore": score, "baseSeverity": impact}}]},
+            "configurations": [{"nodes": [{"operator": "OR", "negate": False, "cpeMatch": matches}]}],
+        }})
+    with open(path, "w") as f:
+        json.dump({"format": "NVD_CVE", "version": "2.0", "vulnerabilities": items}, f)
+
+
+def run_ingestion(size, tmp):
+    inventories = os.path.join(tmp, "inventories")
+    results = {}
+    results["generate_fleet"] = timed(lambda: quietly("generate_fleet", size=size, inventories=inventories))
+    files = [str(path) for path in sorted(Path(inventories).iterdir())[:50]]
+    results[f"ingest_rpm {len(files)} new hosts"] = timed(lambda: quietly("ingest_rpm", *files, track="bench-ingest"))
+    results[f"ingest_rpm {len(files)} unchanged hosts"] = timed(
+        lambda: quietly("ingest_rpm", *files, track="bench-ingest"),
+    )
+    feed = os.path.join(tmp, "feed.json")
+    nvd_feed(feed, Fleet(load_catalogue(ROOT / "pack.txt"), seed=1), 1000, CVE.objects.count())
+    results["import_nvd 1000 CVEs"] = timed(lambda: quietly("import_nvd", feed))
+    results["match_cves all hosts"] = timed(lambda: quietly("match_cves"))
+    results["refresh_summaries"] = timed(lambda: quietly("refresh_summaries"))
+
+    client = Client()
+    hosts = list(Host.objects.filter(os_type="linux").values_list("name", flat=True)[:1000])
+    cves = list(CVE.objects.order_by("id").values_list("cve_id", flat=True)[:10])
+    payload = [{"host_name": host, "cve_id": cve} for host in hosts for cve in cves]
+    results[f"bulk POST {len(payload)} hostcves"] = timed(
+        lambda: client.post("/api/hostcves/bulk/", payload, content_type="application/json"),
+    )
+    return {name: {"seconds": round(seconds, 4)} for name, seconds in results.items()}
+
+
+def run_endpoints(repeat):
+    track = Track.objects.order_by("id").first()
+    params = {
+        "track": track.id,
+        "host": Host.objects.filter(track=track, os_type="linux").order_by("id").first().id,
+        "cve": CVE.objects.order_by("-score", "id").first().id,
+        "cve_id": CVE.objects.order_by("id").first().cve_id,
+    }
+    client = Client()
+    response_cache = caches[settings.CVEAPP_CACHE]
+    results = {}
+    for name, template in ENDPOINTS.items():
+        url = template.format(**params)
+        cold, warm = [], []
+        for _ in range(repeat):
+            response_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                size = body_size(response)
+                cold.append(time.perf_counter() - started)
+            # Read now: the next request resets the query log.
+            query_count = len(queries)
+            started = time.perf_counter()
+            body_size(client.get(url))
+            warm.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+        results[name] = {
+            "cold_ms": round(statistics.median(cold) * 1000, 2),
+            "warm_ms": round(statistics.median(warm) * 1000, 2),
+            "queries": query_count,
+            "bytes": size,
+        }
+    return results
+
+
+def run(sizes, repeat):
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS.append("testserver")
+    output = {"meta": {
+        "commit": subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, "results": {}}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.close()
+            connection.settings_dict["NAME"] = os.path.join(tmp, "bench.sqlite3")
+            quietly("migrate")
+            ingestion = run_ingestion(size, tmp)
+            output["results"][size] = {
+                "counts": {
+                    "hosts": Host.objects.count(),
+                    "cves": CVE.objects.count(),
+                    "hostcves": HostCVE.objects.count(),
+                    "inventories": Inventory.objects.count(),
+                    "packages": InventoryPackage.objects.count(),
+                },
+                "ingestion": ingestion,
+                "endpoints": run_endpoints(repeat),
+            }
+            connection.close()
+        print(f"{size}: done", file=sys.stderr)
+    return output
+
+
+def flatten(results):
+    for size, sections in results["results"].items():
+        for section in ("ingestion", "endpoints"):
+            for name, values in sections[section].items():
+                for metric, value in values.items():
+                    yield (size, section, name, metric), value
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = dict(flatten(json.load(f)))
+    with open(after_path) as f:
+        after = dict(flatten(json.load(f)))
+    print(f"{'size':<8}{'measurement':<48}{'before':>12}{'after':>12}{'change':>10}")
+    for key in before:
+        if key not in after:
+            continue
+        size, section, name, metric = key
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.0f}%" if old else ""
+        print(f"{size:<8}{name + ' ' + metric:<48}{old:>12}{new:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=["small", "medium", "large"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Write JSON here instead of stdout.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files.")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    output = json.dumps(run(args.sizes, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
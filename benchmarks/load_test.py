@@ -0,0 +1,111 @@
+"""Throughput of the sync (WSGI) and async (ASGI) read paths under load.
+
+Start both servers with one worker each, pointing at the same database::
+
+    gunicorn cve_dashboard.wsgi -w 1 --threads 16 -b 127.0.0.1:8000
+    uvicorn cve_dashboard.asgi:application --workers 1 --port 8001
+
+then run, for example::
+
+    python benchmarks/load_test.py --track 1 --host 1 --cve CVE-2024-0001
+    python benchmarks/load_test.py --clients 200 --duration 30
+
+Each of ``--clients`` concurrent clients cycles through the dashboard's
+hot endpoints (track CVEs and summary, host CVEs and summary, CVE lookup)
+until ``--duration`` seconds have passed. The WSGI server is driven
+through the DRF endpoints, the ASGI server through ``/api/async/``.
+Requires ``httpx``.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def paths(args):
+    sync = [
+        f"/api/hostcves/by_track/?track_id={args.track}",
+        f"/api/tracks/{args.track}/summary/",
+        f"/api/hostcves/by_host/?host_id={args.host}",
+        f"/api/hosts/{args.host}/summary/",
+        f"/api/cves/?cve_id={args.cve}",
+    ]
+    asynchronous = [
+        f"/api/async/tracks/{args.track}/cves/",
+        f"/api/async/tracks/{args.track}/summary/",
+        f"/api/async/hosts/{args.host}/cves/",
+        f"/api/async/hosts/{args.host}/summary/",
+        f"/api/async/cves/{args.cve}/",
+    ]
+    return sync, asynchronous
+
+
+async def client(http, urls, offset, deadline, latencies, errors):
+    position = offset
+    while time.perf_counter() < deadline:
+        url = urls[position % len(urls)]
+        position += 1
+        started = time.perf_counter()
+        try:
+            resp = await http.get(url)
+            await resp.aread()
+            ok = resp.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            errors.append(url)
+
+
+async def load(base_url, urls, clients, duration):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    latencies, errors = [], []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http, urls, i, deadline, latencies, errors) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else float("nan")
+
+    return {
+        "requests/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95 ms": percentile(0.95),
+        "p99 ms": percentile(0.99),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--asgi-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--track", type=int, default=1)
+    parser.add_argument("--host", type=int, default=1)
+    parser.add_argument("--cve", default="CVE-2024-0001")
+    args = parser.parse_args()
+
+    sync, asynchronous = paths(args)
+    results = {
+        "WSGI (DRF)": asyncio.run(load(args.wsgi_url, sync, args.clients, args.duration)),
+        "ASGI (async)": asyncio.run(load(args.asgi_url, asynchronous, args.clients, args.duration)),
+    }
+    columns = list(next(iter(results.values())))
+    print(f"{'server':<16}" + "".join(f"{column:>12}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<16}" + "".join(
+            f"{result[column]:>12.1f}" if isinstance(result[column], float) else f"{result[column]:>12}"
+            for column in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
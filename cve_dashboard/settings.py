@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so it times the whole stack; a no-op unless CVEAPP_METRICS.
+    "cveapp.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -73,14 +76,102 @@ WSGI_APPLICATION = "cve_dashboard.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
+# CVE_DB_ENGINE selects "sqlite" (default) or "postgresql"; the remaining
+# CVE_DB_* variables fill in the connection details.
+
+CVE_DB_ENGINE = os.environ.get("CVE_DB_ENGINE", "sqlite")
+
+if CVE_DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("CVE_DB_NAME", "cve_dashboard"),
+            "USER": os.environ.get("CVE_DB_USER", ""),
+            "PASSWORD": os.environ.get("CVE_DB_PASSWORD", ""),
+            "HOST": os.environ.get("CVE_DB_HOST", ""),
+            "PORT": os.environ.get("CVE_DB_PORT", ""),
+            # Keep connections open between requests instead of reconnecting.
+            "CONN_MAX_AGE": int(os.environ.get("CVE_DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+    if os.environ.get("CVE_DB_POOL_SIZE"):
+        # psycopg 3 connection pool; Django requires CONN_MAX_AGE = 0 with it.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {"min_size": 2, "max_size": int(os.environ["CVE_DB_POOL_SIZE"])},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("CVE_DB_NAME", BASE_DIR / "db.sqlite3"),
+        }
+    }
+    if os.environ.get("CVE_SQLITE_TUNED", "1") != "0":
+        # WAL lets readers run alongside a writer; writers take the lock up
+        # front (IMMEDIATE) and wait up to ``timeout`` seconds for it rather
+        # than failing with "database is locked" halfway through.
+        DATABASES["default"]["OPTIONS"] = {
+            "timeout": 20,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA mmap_size=268435456;"
+                "PRAGMA cache_size=-65536;"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# API responses are cached per process; point CVEAPP_CACHE at a
+# FileBasedCache alias to share them between worker processes. The
+# generation that invalidates them is kept in the database, so writes from
+# any process are seen either way.
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cve-dashboard",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
 
+CVEAPP_CACHE = "default"
+CVEAPP_CACHE_TIMEOUT = 300
+
+
+# Django REST framework
+# JSON is encoded with orjson when it is installed (see cveapp.renderers).
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "cveapp.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+
+# Request metrics at /metrics, and cProfile dumps of a sample of slow
+# requests when CVE_PROFILE_DIR is set (see cveapp.metrics).
+
+CVEAPP_METRICS = os.environ.get("CVE_METRICS") == "1"
+CVEAPP_PROFILE_DIR = os.environ.get("CVE_PROFILE_DIR") or None
+CVEAPP_PROFILE_SAMPLE_RATE = float(os.environ.get("CVE_PROFILE_SAMPLE_RATE", 0.1))
+CVEAPP_PROFILE_SLOW_MS = float(os.environ.get("CVE_PROFILE_SLOW_MS", 500))
+
+
+# LLM triage (manage.py triage_cves). The per-minute limits default to
+# Gemini Flash's free tier; set them to 0 to disable.
+
+CVEAPP_TRIAGE_BACKEND = os.environ.get("CVE_TRIAGE_BACKEND", "gemini")
+CVEAPP_TRIAGE_MODEL = os.environ.get("CVE_TRIAGE_MODEL", "gemini-1.5-flash-latest")
+CVEAPP_TRIAGE_TOKENS_PER_MINUTE = int(os.environ.get("CVE_TRIAGE_TOKENS_PER_MINUTE", 1_000_000))
+CVEAPP_TRIAGE_REQUESTS_PER_MINUTE = int(os.environ.get("CVE_TRIAGE_REQUESTS_PER_MINUTE", 15))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,7 +1,10 @@
 
 
 from django.contrib import admin
-from .models import Track, Host, CVE, HostCVE
+from . import search
+from .models import (
+    Track, Host, CVE, AffectedPackage, CVETriage, HostCVE, ImportWatermark, Inventory, InventoryPackage,
+)
 
 @admin.register(Track)
 class TrackAdmin(admin.ModelAdmin):
@@ -10,7 +13,7 @@ class TrackAdmin(admin.ModelAdmin):
 
 @admin.register(Host)
 class HostAdmin(admin.ModelAdmin):
-    list_display = ("name", "os_type", "track")
+    list_display = ("name", "os_type", "track", "inventory")
     list_filter = ("os_type", "track")
     search_fields = ("name",)
 
@@ -19,7 +22,39 @@ class CVEAdmin(admin.ModelAdmin):
     list_display = ("cve_id", "score", "impact")
     search_fields = ("cve_id", "description")
 
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index instead of LIKE '%term%' scans.
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+@admin.register(AffectedPackage)
+class AffectedPackageAdmin(admin.ModelAdmin):
+    list_display = ("cve", "name", "arch", "start_evr", "end_evr")
+    search_fields = ("name", "cve__cve_id")
+
 @admin.register(HostCVE)
 class HostCVEAdmin(admin.ModelAdmin):
     list_display = ("host", "cve")
     list_filter = ("host", "cve")
+
+@admin.register(Inventory)
+class InventoryAdmin(admin.ModelAdmin):
+    list_display = ("digest", "package_count", "created_at")
+    search_fields = ("digest",)
+
+@admin.register(InventoryPackage)
+class InventoryPackageAdmin(admin.ModelAdmin):
+    list_display = ("inventory", "name", "version", "release", "arch")
+    list_filter = ("arch",)
+    search_fields = ("name", "inventory__digest")
+
+@admin.register(ImportWatermark)
+class ImportWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("source", "last_modified")
+
+@admin.register(CVETriage)
+class CVETriageAdmin(admin.ModelAdmin):
+    list_display = ("cve", "priority", "model", "updated_at")
+    list_filter = ("priority", "model")
+    search_fields = ("cve__cve_id", "summary")
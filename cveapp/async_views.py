@@ -0,0 +1,99 @@
+"""Async versions of the hot dashboard read endpoints.
+
+These are plain Django async views using the async ORM, so under ASGI a
+slow query suspends only its own request instead of holding a worker
+thread. Responses have the same shape as their DRF counterparts in
+:mod:`cveapp.views`; the serializers and :mod:`cveapp.compact` builders are
+only given rows that are already loaded, so they never touch the database
+from the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from .compact import Layout
+from .filters import Exact, Prefix, Range, Severity
+from .models import CVE, Host, HostCVE, HostSummary, Track, TrackSummary
+from .serializers import CVESerializer, HostSummarySerializer
+from .summaries import refresh_host_summaries, refresh_track_summaries
+from .track_serializers import TrackSummarySerializer
+
+HOSTCVE_FILTERS = {
+    'score_min': Range('cve__score', 'gte'),
+    'score_max': Range('cve__score', 'lte'),
+    'severity': Severity('cve__score'),
+    'impact': Exact('cve__impact'),
+    'cve_id': Prefix('cve__cve_id'),
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def not_found():
+    return JsonResponse({'detail': 'Not found.'}, status=404)
+
+
+def apply_filters(request, queryset, filter_params):
+    for param, query_filter in filter_params.items():
+        value = request.GET.get(param)
+        if value is None or value == '':
+            continue
+        try:
+            queryset = query_filter.apply(queryset, value)
+        except ValueError:
+            raise BadRequest({param: [f"Invalid value {value!r}."]})
+    return queryset
+
+
+def host_cves_queryset(request):
+    return apply_filters(request, HostCVE.objects.all(), HOSTCVE_FILTERS)
+
+
+async def track_cves(request, pk):
+    """Async ``hostcves/by_track/``: one entry per CVE with the track's hosts."""
+    try:
+        host_cves = host_cves_queryset(request)
+    except BadRequest as exc:
+        return JsonResponse(exc.args[0], status=400)
+    layout = Layout()
+    host_cves = host_cves.filter(host__track_id=pk).order_by('-cve__score', 'cve__cve_id', 'host__name')
+    rows = [row async for row in host_cves.values(*layout.columns())]
+    return JsonResponse(layout.grouped(rows), safe=False)
+
+
+async def host_cves(request, pk):
+    """Async ``hostcves/by_host/``."""
+    try:
+        host_cves = host_cves_queryset(request)
+    except BadRequest as exc:
+        return JsonResponse(exc.args[0], status=400)
+    layout = Layout()
+    host_cves = host_cves.filter(host_id=pk).order_by('-cve__score', 'id')
+    rows = [row async for row in host_cves.values(*layout.columns())]
+    return JsonResponse(layout.nested(rows), safe=False)
+
+
+async def cve_detail(request, cve_id):
+    cve = await CVE.objects.filter(cve_id=cve_id.upper()).afirst()
+    if cve is None:
+        return not_found()
+    return JsonResponse(CVESerializer(cve).data)
+
+
+async def track_summary(request, pk):
+    summary = await TrackSummary.objects.filter(track_id=pk).afirst()
+    if summary is None:
+        if not await Track.objects.filter(pk=pk).aexists():
+            return not_found()
+        summary = (await sync_to_async(refresh_track_summaries)([pk]))[0]
+    return JsonResponse(TrackSummarySerializer(summary).data)
+
+
+async def host_summary(request, pk):
+    summary = await HostSummary.objects.filter(host_id=pk).afirst()
+    if summary is None:
+        if not await Host.objects.filter(pk=pk).aexists():
+            return not_found()
+        summary = (await sync_to_async(refresh_host_summaries)([pk]))[0]
+    return JsonResponse(HostSummarySerializer(summary).data)
@@ -0,0 +1,279 @@
+"""In-memory bitmap index for blast-radius questions.
+
+"Which tracks are hit by any of these CVEs scoring 9 or more" is a join of
+HostCVE against Host and Track row by row. Here a set of hosts is a
+Python int with bit ``host.id`` set for each member, so AND, OR and NOT
+are ``&``, ``|`` and ``& ~`` over whole machine words, done in C. The index
+keeps such a bitset per CVE (the hosts it affects), per track and per OS
+type, and for every distinct score the hosts hit by any CVE scoring at
+least that, so a ``min_score`` condition is a single lookup.
+
+Queries are JSON expressions (see :meth:`BlastRadiusIndex.evaluate`).
+
+The index is built on first use. Writes to HostCVE, Host, CVE and Track
+mark what they touched once their transaction commits (see
+:mod:`cveapp.signals`), and the next query reloads only those rows.
+Writers that skip model signals call :func:`mark_dirty` or
+:func:`mark_stale` themselves. Writes by other processes are not marked;
+they show up as the database-backed cache generation moving further than
+this process's own committed bumps account for (see
+:func:`cveapp.cache.committed_bumps`), and cause a full rebuild.
+
+Each bitset is as wide as the highest host id in it, so memory is about
+``max host id / 8`` bytes per CVE with links.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import reduce
+
+from django.db import transaction
+
+from . import cache
+from .models import CVE, Host, HostCVE, Track
+
+OS_TYPES = [value for value, _ in Host.OS_CHOICES]
+CHUNK_SIZE = 500
+MAX_DEPTH = 32
+
+
+class QueryError(ValueError):
+    pass
+
+
+def bitset(ids):
+    """An int with the bits at ``ids`` set."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def members(bits):
+    """Positions of the set bits of ``bits``, ascending."""
+    buf = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return [i * 8 + j for i, byte in enumerate(buf) if byte for j in range(8) if byte >> j & 1]
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def _as_list(value, name, types):
+    values = value if isinstance(value, list) else [value]
+    if not values or not all(isinstance(v, types) and not isinstance(v, bool) for v in values):
+        raise QueryError(f"{name} must be a {types[0].__name__} or a non-empty list of them")
+    return values
+
+
+class BlastRadiusIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = self.bumps = None
+        self.stale = True
+        self.dirty_hosts, self.dirty_cves, self.dirty_tracks = set(), set(), False
+
+    def changed(self, host_ids=(), cve_ids=(), tracks=False, stale=False):
+        with self.lock:
+            self.dirty_hosts.update(host_ids)
+            self.dirty_cves.update(cve_ids)
+            self.dirty_tracks |= tracks
+            self.stale |= stale
+
+    # Loading
+
+    def refresh(self):
+        """Bring the index up to date; callers hold ``lock``."""
+        bumps = cache.committed_bumps()
+        generation = cache.generation()
+        foreign = self.generation is None or generation - self.generation > bumps - self.bumps
+        if self.stale or foreign:
+            self._build()
+        elif self._dirty():
+            self._update()
+        self.generation, self.bumps = generation, bumps
+
+    def _dirty(self):
+        return bool(self.dirty_hosts or self.dirty_cves or self.dirty_tracks)
+
+    def _build(self):
+        self.stale = False
+        self.dirty_hosts, self.dirty_cves, self.dirty_tracks = set(), set(), False
+        self.cves, self.cve_pks, self.cve_hosts = {}, {}, {}
+        self.track_hosts, self.os_hosts, self.hosts = {}, {}, 0
+        self._load_tracks()
+        self._add_cves(CVE.objects.all())
+        self._add_hosts(Host.objects.all())
+        self._add_links(HostCVE.objects.all())
+        self._rank()
+
+    def _update(self):
+        host_ids, cve_ids = self.dirty_hosts, self.dirty_cves
+        self.dirty_hosts, self.dirty_cves = set(), set()
+        if self.dirty_tracks:
+            self.dirty_tracks = False
+            self._load_tracks()
+        if host_ids:
+            mask = bitset(host_ids)
+            for table in (self.cve_hosts, self.track_hosts, self.os_hosts):
+                for key, bits in table.items():
+                    if bits & mask:
+                        table[key] = bits & ~mask
+            self.hosts &= ~mask
+            for chunk in _chunks(host_ids):
+                self._add_hosts(Host.objects.filter(id__in=chunk))
+                self._add_links(HostCVE.objects.filter(host_id__in=chunk))
+        if cve_ids:
+            for pk in cve_ids:
+                self.cve_hosts.pop(pk, None)
+                previous = self.cves.pop(pk, None)
+                if previous is not None:
+                    del self.cve_pks[previous[0]]
+            for chunk in _chunks(cve_ids):
+                self._add_cves(CVE.objects.filter(id__in=chunk))
+                self._add_links(HostCVE.objects.filter(cve_id__in=chunk))
+        self._rank()
+
+    def _load_tracks(self):
+        self.tracks = dict(Track.objects.values_list("id", "name"))
+        self.track_pks = {name: pk for pk, name in self.tracks.items()}
+
+    def _add_cves(self, queryset):
+        for pk, cve_id, score in queryset.values_list("id", "cve_id", "score"):
+            self.cves[pk] = (cve_id, score)
+            self.cve_pks[cve_id] = pk
+
+    def _add_hosts(self, queryset):
+        tracks, os_types, ids = defaultdict(list), defaultdict(list), []
+        for pk, track_id, os_type in queryset.values_list("id", "track_id", "os_type"):
+            ids.append(pk)
+            os_types[os_type].append(pk)
+            if track_id is not None:
+                tracks[track_id].append(pk)
+        self.hosts |= bitset(ids)
+        for table, groups in ((self.track_hosts, tracks), (self.os_hosts, os_types)):
+            for key, pks in groups.items():
+                table[key] = table.get(key, 0) | bitset(pks)
+
+    def _add_links(self, queryset):
+        groups = defaultdict(list)
+        for cve_id, host_id in queryset.values_list("cve_id", "host_id"):
+            groups[cve_id].append(host_id)
+        for cve_id, host_ids in groups.items():
+            self.cve_hosts[cve_id] = self.cve_hosts.get(cve_id, 0) | bitset(host_ids)
+
+    def _rank(self):
+        """Hosts hit by any CVE scoring at least each distinct score."""
+        by_score = defaultdict(int)
+        for pk, bits in self.cve_hosts.items():
+            if bits and pk in self.cves:
+                by_score[self.cves[pk][1]] |= bits
+        self.scores = sorted(by_score)
+        self.at_least, running = [0] * len(self.scores), 0
+        for i in range(len(self.scores) - 1, -1, -1):
+            running |= by_score[self.scores[i]]
+            self.at_least[i] = running
+
+    # Queries
+
+    def query(self, expression):
+        """``(summary, hosts bitset)`` of the hosts ``expression`` selects."""
+        with self.lock:
+            self.refresh()
+            hosts = self.evaluate(expression)
+            tracks = [
+                {"id": pk, "name": name, "host_count": (hosts & self.track_hosts.get(pk, 0)).bit_count()}
+                for pk, name in sorted(self.tracks.items(), key=lambda item: item[1])
+            ]
+            summary = {
+                "host_count": hosts.bit_count(),
+                "tracks": [track for track in tracks if track["host_count"]],
+                "os_types": {
+                    os_type: count for os_type in OS_TYPES
+                    if (count := (hosts & self.os_hosts.get(os_type, 0)).bit_count())
+                },
+            }
+        return summary, hosts
+
+    def evaluate(self, expression, depth=0):
+        """Hosts selected by ``expression``, an object that is either
+
+        - ``{"and": [...]}``, ``{"or": [...]}`` or ``{"not": {...}}`` of
+          further expressions, or
+        - conditions, all of which must hold: ``cve`` (hosts affected by any
+          of these CVE ids), ``min_score`` (by any CVE scoring at least
+          this; together with ``cve``, by any of those that do), ``track``
+          (names or ids) and ``os_type``.
+        """
+        if depth > MAX_DEPTH:
+            raise QueryError(f"expressions may nest at most {MAX_DEPTH} deep")
+        if not isinstance(expression, dict) or not expression:
+            raise QueryError("each expression must be a non-empty object")
+        operators = {"and", "or", "not"} & expression.keys()
+        if operators:
+            if len(expression) > 1:
+                raise QueryError(f"{operators.pop()!r} must be the only key of its object")
+            if "not" in expression:
+                return self.hosts & ~self.evaluate(expression["not"], depth + 1)
+            operator, operands = next(iter(expression.items()))
+            if not isinstance(operands, list) or not operands:
+                raise QueryError(f"{operator!r} takes a non-empty list")
+            results = (self.evaluate(operand, depth + 1) for operand in operands)
+            return reduce(int.__and__ if operator == "and" else int.__or__, results)
+
+        unknown = expression.keys() - {"cve", "min_score", "track", "os_type"}
+        if unknown:
+            raise QueryError(f"unknown condition(s): {', '.join(sorted(unknown))}")
+        min_score = expression.get("min_score")
+        if "min_score" in expression and (isinstance(min_score, bool) or not isinstance(min_score, (int, float))):
+            raise QueryError("min_score must be a number")
+        hosts = self.hosts
+        if "cve" in expression:
+            hosts &= self._cve_hosts(_as_list(expression["cve"], "cve", (str,)), min_score)
+        elif min_score is not None:
+            i = bisect_left(self.scores, min_score)
+            hosts &= self.at_least[i] if i < len(self.at_least) else 0
+        if "track" in expression:
+            pks = [
+                self.track_pks.get(track) if isinstance(track, str) else track
+                for track in _as_list(expression["track"], "track", (str, int))
+            ]
+            hosts &= reduce(int.__or__, (self.track_hosts.get(pk, 0) for pk in pks))
+        if "os_type" in expression:
+            os_types = _as_list(expression["os_type"], "os_type", (str,))
+            for os_type in os_types:
+                if os_type not in OS_TYPES:
+                    raise QueryError(f"os_type must be one of {', '.join(OS_TYPES)}")
+            hosts &= reduce(int.__or__, (self.os_hosts.get(os_type, 0) for os_type in os_types))
+        return hosts
+
+    def _cve_hosts(self, cve_ids, min_score):
+        bits = 0
+        for cve_id in cve_ids:
+            pk = self.cve_pks.get(cve_id)
+            if pk is not None and (min_score is None or self.cves[pk][1] >= min_score):
+                bits |= self.cve_hosts.get(pk, 0)
+        return bits
+
+
+INDEX = BlastRadiusIndex()
+
+
+def query(expression):
+    return INDEX.query(expression)
+
+
+def mark_dirty(host_ids=(), cve_ids=(), tracks=False):
+    """Reload these hosts, CVEs (with their links) or the track names once the transaction commits."""
+    host_ids, cve_ids = set(host_ids), set(cve_ids)
+    transaction.on_commit(lambda: INDEX.changed(host_ids, cve_ids, tracks))
+
+
+def mark_stale():
+    """Rebuild the whole index once the transaction commits."""
+    transaction.on_commit(lambda: INDEX.changed(stale=True))
@@ -0,0 +1,220 @@
+"""Set-based bulk writes for hosts and host-CVE links.
+
+Payloads are JSON arrays of objects (or ``{"items": [...]}``). Every item
+is checked before anything is written, references are resolved to ids
+with one query per chunk of values, and the writes run in one
+transaction, so a request applies completely or not at all. Rejected
+requests report ``{"errors": {index: message}}``.
+
+``bulk_create``/``bulk_update`` skip model signals, and deletes skip them
+too (``_raw_delete`` rather than the collector, which would fetch and
+signal every row), so summaries, the blast-radius index and the response
+cache are told about the change explicitly.
+"""
+from django.db import router, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import blast_radius, cache, summaries
+from .models import CVE, Host, HostCVE, HostSummary, Track
+from .signals import hostcves_changed
+
+MAX_ITEMS = 50_000
+# Keeps ``__in`` lookups well below the SQLite bound-parameter limit.
+CHUNK_SIZE = 5000
+OS_TYPES = [value for value, _ in Host.OS_CHOICES]
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _items(data):
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise ValidationError({"items": "Expected a list of objects."})
+    if len(data) > MAX_ITEMS:
+        raise ValidationError({"items": f"At most {MAX_ITEMS} items per request."})
+    return data
+
+
+def _resolve(entries, errors, label, id_key, name_key, queryset, name_field):
+    """Resolve ``(index, item)`` references given by id or by name.
+
+    Returns ``{index: pk}``; unresolvable items are recorded in ``errors``.
+    """
+    ids, names = set(), set()
+    for index, item in entries:
+        value = item.get(id_key)
+        if value is not None:
+            if isinstance(value, int) and not isinstance(value, bool):
+                ids.add(value)
+            else:
+                errors.setdefault(index, f"{id_key} must be an integer.")
+        elif isinstance(item.get(name_key), str):
+            names.add(item[name_key])
+        else:
+            errors.setdefault(index, f"{id_key} or {name_key} required.")
+
+    existing = set()
+    for chunk in _chunks(ids):
+        existing.update(queryset.filter(id__in=chunk).values_list("id", flat=True))
+    by_name = {}
+    for chunk in _chunks(names):
+        for name, pk in queryset.filter(**{f"{name_field}__in": chunk}).values_list(name_field, "id"):
+            by_name[name] = None if name in by_name else pk
+
+    resolved = {}
+    for index, item in entries:
+        if index in errors:
+            continue
+        if item.get(id_key) is not None:
+            pk = item[id_key] if item[id_key] in existing else None
+            problem = f"{label} {item[id_key]} does not exist."
+        else:
+            name = item[name_key]
+            pk = by_name.get(name)
+            problem = f"{label} {name!r} is ambiguous." if name in by_name else f"{label} {name!r} does not exist."
+        if pk is None:
+            errors[index] = problem
+        else:
+            resolved[index] = pk
+    return resolved
+
+
+def _check(errors):
+    if errors:
+        raise ValidationError({"errors": {index: errors[index] for index in sorted(errors)}})
+
+
+def _host_cve_pairs(data):
+    entries = list(enumerate(_items(data)))
+    errors = {}
+    hosts = _resolve(entries, errors, "host", "host", "host_name", Host.objects.all(), "name")
+    cves = _resolve(entries, errors, "CVE", "cve", "cve_id", CVE.objects.all(), "cve_id")
+    _check(errors)
+    return {(hosts[index], cves[index]) for index, _ in entries}
+
+
+def _link_count(host_ids):
+    return sum(HostCVE.objects.filter(host_id__in=chunk).count() for chunk in _chunks(host_ids))
+
+
+def _raw_delete(queryset):
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def create_host_cves(data):
+    """Link hosts to CVEs; pairs that already exist are left alone."""
+    pairs = _host_cve_pairs(data)
+    host_ids = {host_id for host_id, _ in pairs}
+    with transaction.atomic():
+        before = _link_count(host_ids)
+        HostCVE.objects.bulk_create(
+            [HostCVE(host_id=host_id, cve_id=cve_id) for host_id, cve_id in pairs],
+            ignore_conflicts=True,
+            batch_size=CHUNK_SIZE,
+        )
+        created = _link_count(host_ids) - before
+        if created:
+            hostcves_changed.send(sender=HostCVE, host_ids=sorted(host_ids))
+    return {"created": created, "existing": len(pairs) - created}
+
+
+def delete_host_cves(data):
+    pairs = _host_cve_pairs(data)
+    host_ids = {host_id for host_id, _ in pairs}
+    with transaction.atomic():
+        ids, changed = [], set()
+        for chunk in _chunks(host_ids):
+            links = HostCVE.objects.filter(host_id__in=chunk).values_list("id", "host_id", "cve_id")
+            for pk, host_id, cve_id in links:
+                if (host_id, cve_id) in pairs:
+                    ids.append(pk)
+                    changed.add(host_id)
+        deleted = sum(_raw_delete(HostCVE.objects.filter(id__in=chunk)) for chunk in _chunks(ids))
+        if deleted:
+            hostcves_changed.send(sender=HostCVE, host_ids=sorted(changed))
+    return {"deleted": deleted}
+
+
+def upsert_hosts(data):
+    """Create hosts by name, or update ``os_type``/track of existing ones.
+
+    A track is given as ``track`` (id) or ``track_name``; ``"track": null``
+    removes the host from its track. Omitted fields are left unchanged.
+    """
+    items = _items(data)
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item.get("name"), str) or not item["name"].strip():
+            errors[index] = "name required."
+        elif "os_type" in item and item["os_type"] not in OS_TYPES:
+            errors[index] = f"os_type must be one of {', '.join(OS_TYPES)}."
+    with_track = [(i, item) for i, item in enumerate(items) if item.get("track") is not None or item.get("track_name")]
+    track_ids = _resolve(with_track, errors, "track", "track", "track_name", Track.objects.all(), "name")
+
+    existing = {}
+    names = {item["name"] for index, item in enumerate(items) if index not in errors}
+    for chunk in _chunks(names):
+        for host in Host.objects.filter(name__in=chunk):
+            existing[host.name] = None if host.name in existing else host
+    for index, item in enumerate(items):
+        if index in errors:
+            continue
+        if item["name"] in existing and existing[item["name"]] is None:
+            errors[index] = f"host {item['name']!r} is ambiguous."
+        elif item["name"] not in existing and "os_type" not in item:
+            errors[index] = "os_type required for new hosts."
+    _check(errors)
+
+    # A name repeated in the payload is applied in order, so the last wins.
+    created, updated, dirty_tracks = {}, {}, set()
+    for index, item in enumerate(items):
+        host = existing.get(item["name"]) or created.get(item["name"])
+        if host is None:
+            host = created[item["name"]] = Host(name=item["name"])
+        previous = (host.os_type, host.track_id)
+        if "os_type" in item:
+            host.os_type = item["os_type"]
+        if index in track_ids:
+            host.track_id = track_ids[index]
+        elif "track" in item or "track_name" in item:
+            host.track_id = None
+        if host.pk is None:
+            dirty_tracks.add(host.track_id)
+        elif (host.os_type, host.track_id) != previous:
+            updated[host.pk] = host
+            dirty_tracks.update(previous[1:] + (host.track_id,))
+
+    with transaction.atomic():
+        Host.objects.bulk_create(created.values(), batch_size=CHUNK_SIZE)
+        Host.objects.bulk_update(updated.values(), ["os_type", "track"], batch_size=CHUNK_SIZE)
+        if created or updated:
+            summaries.mark_dirty(track_ids=dirty_tracks)
+            blast_radius.mark_dirty(host_ids=[host.pk for host in created.values()] + list(updated))
+            cache.invalidate()
+    return {"created": len(created), "updated": len(updated), "unchanged": len(existing) - len(updated)}
+
+
+def delete_hosts(data):
+    entries = list(enumerate(_items(data)))
+    errors = {}
+    host_ids = _resolve(entries, errors, "host", "id", "name", Host.objects.all(), "name")
+    _check(errors)
+    host_ids = set(host_ids.values())
+    with transaction.atomic():
+        track_ids, deleted = set(), 0
+        for chunk in _chunks(host_ids):
+            track_ids.update(Host.objects.filter(id__in=chunk).values_list("track_id", flat=True))
+            # A host's links and summary are the only rows that refer to it.
+            _raw_delete(HostCVE.objects.filter(host_id__in=chunk))
+            _raw_delete(HostSummary.objects.filter(host_id__in=chunk))
+            deleted += _raw_delete(Host.objects.filter(id__in=chunk))
+        if deleted:
+            summaries.mark_dirty(track_ids=track_ids)
+            blast_radius.mark_dirty(host_ids=host_ids)
+            cache.invalidate()
+    return {"deleted": deleted}
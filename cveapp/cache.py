@@ -0,0 +1,164 @@
+"""Response cache for the read API.
+
+Cached entries are keyed on a global *generation* counter plus the request
+path, query string and ``Accept`` header. Any write to Track, Host, CVE or
+HostCVE bumps the generation (see :mod:`cveapp.signals`), which orphans
+every cached response at once instead of tracking which lists a row
+appears in. The generation also makes a cheap ETag: a client holding the
+ETag of the current generation gets a 304 after one single-row query.
+
+The generation lives in the database (:class:`~cveapp.models.CacheGeneration`)
+rather than in the cache, so writes from management commands and other
+worker processes invalidate this process's responses too, even with a
+per-process cache.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.response import Response
+
+from .models import CacheGeneration
+
+GENERATION_ROW = 1
+STATS = ("hits", "misses", "not_modified")
+
+_committed = {"bumps": 0}
+_committed_lock = threading.Lock()
+# The on-commit callback of this thread's last bump and its queue position.
+_bump = threading.local()
+
+
+def _cache():
+    return caches[getattr(settings, "CVEAPP_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "CVEAPP_CACHE_TIMEOUT", 300)
+
+
+def _incr(key):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def generation():
+    return CacheGeneration.objects.filter(pk=GENERATION_ROW).values_list("value", flat=True).first() or 1
+
+
+def invalidate(**kwargs):
+    """Drop every cached response by bumping the generation.
+
+    The bump is part of the current transaction, so other processes see it
+    exactly when they can see the write, and a rolled-back write leaves it
+    alone. A transaction bumps once however many rows it writes, unless a
+    response is cached in between.
+    """
+    connection = transaction.get_connection()
+    if _bumped(connection):
+        return
+    if not CacheGeneration.objects.filter(pk=GENERATION_ROW).update(value=F("value") + 1):
+        CacheGeneration.objects.get_or_create(pk=GENERATION_ROW, defaults={"value": 2})
+
+    def committed():
+        _bump.callback = None
+        with _committed_lock:
+            _committed["bumps"] += 1
+
+    transaction.on_commit(committed)
+    if connection.in_atomic_block:
+        _bump.callback, _bump.index = committed, len(connection.run_on_commit) - 1
+
+
+def _bumped(connection):
+    callback = getattr(_bump, "callback", None)
+    if callback is None or not connection.in_atomic_block:
+        return False
+    # Committing, rolling back or rolling back to the savepoint of the bump
+    # all take its callback off the queue.
+    pending = connection.run_on_commit
+    return _bump.index < len(pending) and pending[_bump.index][1] is callback
+
+
+def committed_bumps():
+    """Generation bumps this process has committed so far.
+
+    Read before :func:`generation`: the generation moving further than
+    this since a previous look means another process wrote in between.
+    """
+    return _committed["bumps"]
+
+
+def stats():
+    cache = _cache()
+    return {name: cache.get(f"cveapp:stats:{name}", 0) for name in STATS}
+
+
+def _count(name):
+    _incr(f"cveapp:stats:{name}")
+
+
+def _keys(request):
+    digest = hashlib.sha1(
+        "\n".join([request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]).encode()
+    ).hexdigest()
+    gen = generation()
+    return f"cveapp:response:{gen}:{digest}", f'"{gen}-{digest[:16]}"'
+
+
+def _if_none_match(request):
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+class CachedResponseMixin:
+    """Serve GET/HEAD responses of a viewset from the cache, with ETags.
+
+    Only successful JSON responses are stored; the browsable API and
+    streaming responses always pass through.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        key, etag = _keys(request)
+        if etag in _if_none_match(request):
+            _count("not_modified")
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        cached = _cache().get(key)
+        if cached is not None:
+            _count("hits")
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["ETag"] = etag
+            response["Vary"] = "Accept"
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if (
+            isinstance(response, Response)
+            and response.status_code == 200
+            and getattr(response, "accepted_renderer", None) is not None
+            and response.accepted_renderer.format == "json"
+        ):
+            response.render()
+            _cache().set(key, (response.content, response["Content-Type"]), _timeout())
+            # Later writes in this transaction must orphan what was just cached.
+            _bump.callback = None
+            response["ETag"] = etag
+            response["X-Cache"] = "MISS"
+            _count("misses")
+        return response
@@ -0,0 +1,109 @@
+"""Serializer-free responses for the high-volume HostCVE endpoints.
+
+``HostCVESerializer`` builds three serializers per row, which dominates
+CPU on lists of thousands of findings. A :class:`Layout` reads the same
+fields straight from ``values()`` rows and builds the same nested JSON,
+honouring ``?fields=`` the way :class:`~cveapp.serializers.FieldProjectionMixin`
+does.
+
+``?shape=normalized`` lists every host and CVE once instead, and each
+finding as a ``[host_id, cve_id]`` pair (unique per finding), which is
+much smaller when a CVE affects many hosts. Only this shape shrinks the
+payload; the default nested shape is byte for byte what the serializers
+produce, just built faster.
+"""
+from operator import itemgetter
+
+# public name -> values() column, in serializer field order
+HOSTCVE_FIELDS = {'id': 'id', 'host': None, 'cve': None}
+HOST_FIELDS = {
+    'id': 'host_id', 'name': 'host__name', 'os_type': 'host__os_type', 'track': 'host__track_id',
+    'inventory': 'host__inventory_id',
+}
+CVE_FIELDS = {
+    'id': 'cve_id', 'cve_id': 'cve__cve_id', 'description': 'cve__description',
+    'score': 'cve__score', 'impact': 'cve__impact',
+}
+SHAPES = ('nested', 'normalized')
+
+
+def project(fields, requested, prefix=''):
+    """``fields`` narrowed to the ``?fields=`` names, as the serializers do."""
+    if requested is None:
+        return fields
+    if prefix:
+        requested = {name[len(prefix):] for name in requested if name.startswith(prefix)}
+        if not requested:
+            return fields
+    keep = {name.split('.', 1)[0] for name in requested}
+    return {name: column for name, column in fields.items() if name in keep}
+
+
+def _builder(fields):
+    """Function turning a ``values()`` row into a dict of ``fields``."""
+    names, columns = tuple(fields), tuple(fields.values())
+    if not columns:
+        return lambda row: {}
+    get = itemgetter(*columns)
+    if len(columns) == 1:
+        return lambda row: {names[0]: get(row)}
+    return lambda row: dict(zip(names, get(row)))
+
+
+class Layout:
+    def __init__(self, requested=None):
+        top = project(HOSTCVE_FIELDS, requested)
+        self.with_id = 'id' in top
+        self.host = project(HOST_FIELDS, requested, 'host.') if 'host' in top else None
+        self.cve = project(CVE_FIELDS, requested, 'cve.') if 'cve' in top else None
+
+    def columns(self, *extra):
+        """``values()`` columns every shape needs, plus ``extra``."""
+        columns = ['id', 'host_id', 'cve_id']
+        for fields in (self.host or {}, self.cve or {}):
+            columns.extend(fields.values())
+        columns.extend(extra)
+        return list(dict.fromkeys(columns))
+
+    def nested(self, rows):
+        """Rows as ``HostCVESerializer(many=True)`` would render them."""
+        host = _builder(self.host) if self.host is not None else None
+        cve = _builder(self.cve) if self.cve is not None else None
+        results = []
+        for row in rows:
+            item = {'id': row['id']} if self.with_id else {}
+            if host is not None:
+                item['host'] = host(row)
+            if cve is not None:
+                item['cve'] = cve(row)
+            results.append(item)
+        return results
+
+    def grouped(self, rows):
+        """One ``{"cve": ..., "hosts": [...]}`` entry per CVE, in row order."""
+        host, cve = _builder(self.host or HOST_FIELDS), _builder(self.cve or CVE_FIELDS)
+        groups = {}
+        for row in rows:
+            group = groups.get(row['cve_id'])
+            if group is None:
+                group = groups[row['cve_id']] = {'cve': cve(row), 'hosts': []}
+            group['hosts'].append(host(row))
+        return list(groups.values())
+
+    def normalized(self, rows):
+        """``{"hosts": [...], "cves": [...], "results": [[host_id, cve_id], ...]}``.
+
+        Hosts and CVEs are listed once each, in order of first appearance,
+        and always carry their ``id``.
+        """
+        host = _builder({'id': 'host_id', **(self.host or {})})
+        cve = _builder({'id': 'cve_id', **(self.cve or {})})
+        hosts, cves, links = {}, {}, []
+        for row in rows:
+            host_id, cve_id = row['host_id'], row['cve_id']
+            if host_id not in hosts:
+                hosts[host_id] = host(row)
+            if cve_id not in cves:
+                cves[cve_id] = cve(row)
+            links.append([host_id, cve_id])
+        return {'hosts': list(hosts.values()), 'cves': list(cves.values()), 'results': links}
@@ -0,0 +1,85 @@
+"""RPM epoch:version-release comparison.
+
+:func:`version_key` turns a version or release string into a tuple whose
+natural ordering matches ``rpmvercmp`` from rpm 4.15+, including ``~`` (sorts
+before everything, even the end of the string) and ``^`` (sorts after the end
+of the string but before any further segment). Keys are plain tuples, so they
+can be sorted once and searched with :mod:`bisect`.
+"""
+import re
+from functools import lru_cache
+
+_SEGMENT = re.compile(r"(\d+)|([a-zA-Z]+)|(~)|(\^)")
+
+# Segment ranks; within a rank, numbers compare as integers and letters as
+# strings, so two segments of different types never meet.
+_TILDE = (0, "")
+_END = (1, "")
+_CARET = (2, "")
+_ALPHA = 3
+_DIGIT = 4
+
+# Release bounds given without a release match every release of the version.
+MIN_RELEASE = ((-1, ""),)
+MAX_RELEASE = ((9, ""),)
+
+
+@lru_cache(maxsize=200_000)
+def version_key(value):
+    key = []
+    for digits, alpha, tilde, caret in _SEGMENT.findall(value):
+        if digits:
+            key.append((_DIGIT, int(digits)))
+        elif alpha:
+            key.append((_ALPHA, alpha))
+        elif tilde:
+            key.append(_TILDE)
+        else:
+            key.append(_CARET)
+    key.append(_END)
+    return tuple(key)
+
+
+def rpmvercmp(a, b):
+    """Compare two version (or release) strings like rpm does: -1, 0 or 1."""
+    if a == b:
+        return 0
+    ka, kb = version_key(a), version_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+def _epoch(value):
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+@lru_cache(maxsize=200_000)
+def evr_key(epoch, version, release):
+    """Sort key for an installed package's epoch, version and release."""
+    return (_epoch(epoch), version_key(version), version_key(release))
+
+
+def parse_evr(value):
+    """Split ``[epoch:]version[-release]`` into its parts; release may be None."""
+    epoch = ""
+    if ":" in value:
+        epoch, value = value.split(":", 1)
+    release = None
+    if "-" in value:
+        value, release = value.rsplit("-", 1)
+    return epoch, value, release
+
+
+def bound_key(value, high):
+    """Sort key for a range bound written as ``[epoch:]version[-release]``.
+
+    A bound without a release stands for every release of its version;
+    ``high`` places it above all of them (for ``<=`` and ``>``) instead of
+    below (for ``<`` and ``>=``).
+    """
+    epoch, version, release = parse_evr(value)
+    if release is None:
+        return (_epoch(epoch), version_key(version), MAX_RELEASE if high else MIN_RELEASE)
+    return (_epoch(epoch), version_key(version), version_key(release))
@@ -0,0 +1,82 @@
+"""Streaming host x CVE exports.
+
+Rows are read with ``values_list().iterator()`` in id order and encoded as
+NDJSON or CSV one chunk at a time, optionally gzip-compressed on the fly,
+so memory use does not grow with the size of the fleet.
+"""
+import csv
+import io
+import json
+import zlib
+
+from .models import severity
+
+COLUMNS = [
+    ("host", "host__name"),
+    ("os_type", "host__os_type"),
+    ("track", "host__track__name"),
+    ("cve_id", "cve__cve_id"),
+    ("score", "cve__score"),
+    ("severity", None),
+    ("impact", "cve__impact"),
+]
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+# Encoded rows are buffered up to this many bytes before being yielded.
+BUFFER_SIZE = 64 * 1024
+
+
+def rows(queryset, chunk_size=2000):
+    """Yield one dict per HostCVE in ``queryset``, keyed by column name."""
+    paths = [path for _, path in COLUMNS if path is not None]
+    names = [name for name, path in COLUMNS if path is not None]
+    for values in queryset.order_by("id").values_list(*paths).iterator(chunk_size=chunk_size):
+        row = dict(zip(names, values))
+        row["severity"] = severity(row["score"])
+        yield row
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = [name for name, _ in COLUMNS]
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow([row[name] for name in names])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode(lines, compress=False):
+    """Join text lines into UTF-8 chunks of about ``BUFFER_SIZE`` bytes."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # gzip container
+    parts, size = [], 0
+    for line in lines:
+        data = line.encode()
+        parts.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            chunk = b"".join(parts)
+            parts, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(parts)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def stream(queryset, fmt="ndjson", compress=False, chunk_size=2000):
+    lines = csv_lines if fmt == "csv" else ndjson_lines
+    return encode(lines(rows(queryset, chunk_size)), compress)
@@ -0,0 +1,75 @@
+"""Query-parameter filters pushed down into SQL.
+
+Views list their parameters in ``filter_params``, mapping each query
+parameter to one of the filters below; :class:`QueryParamFilter` applies
+whichever of them the request carries. Bad values are reported as a 400.
+"""
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import severity_range
+
+
+class Exact:
+    def __init__(self, field, cast=str):
+        self.field = field
+        self.cast = cast
+
+    def apply(self, queryset, value):
+        return queryset.filter(**{self.field: self.cast(value)})
+
+
+class Range:
+    """``lookup`` is ``gte`` or ``lte``."""
+
+    def __init__(self, field, lookup):
+        self.field = field
+        self.lookup = lookup
+
+    def apply(self, queryset, value):
+        return queryset.filter(**{f"{self.field}__{self.lookup}": float(value)})
+
+
+class Prefix:
+    """Case-insensitive prefix match on an upper-case identifier column.
+
+    Written as a range so that the column's b-tree index is used on every
+    backend, which ``LIKE 'prefix%'`` does not guarantee.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def apply(self, queryset, value):
+        value = value.upper()
+        return queryset.filter(**{f"{self.field}__gte": value, f"{self.field}__lt": value + "\uffff"})
+
+
+class Severity:
+    def __init__(self, field):
+        self.field = field
+
+    def apply(self, queryset, value):
+        condition = Q(pk__in=[])
+        for band in value.split(","):
+            lowest, upper = severity_range(band.strip().lower())
+            band_condition = Q(**{f"{self.field}__gte": lowest})
+            if upper is not None:
+                band_condition &= Q(**{f"{self.field}__lt": upper})
+            condition |= band_condition
+        return queryset.filter(condition)
+
+
+class QueryParamFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        for param, query_filter in getattr(view, "filter_params", {}).items():
+            value = request.query_params.get(param)
+            if value is None or value == "":
+                continue
+            try:
+                queryset = query_filter.apply(queryset, value)
+            except ValueError:
+                raise ValidationError({param: f"Invalid value {value!r}."})
+        return queryset
+
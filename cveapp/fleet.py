@@ -0,0 +1,104 @@
+"""Synthetic fleets for benchmarks and demos.
+
+Hosts are built from a few base images drawn from a real package list
+(``pack.txt`` by default), each host upgrading a handful of packages, which
+is what real fleets look like; a ``drift`` below 1 leaves the other hosts
+on their unchanged image, for homogeneous fleets. CVEs get a skewed score
+distribution and affected ranges on catalogue packages, so matching finds
+real work. All randomness comes from one seeded generator, so a given size
+and seed always produces the same fleet.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from .inventory import parse_inventory
+from .utils import open_text
+
+# tracks, hosts, cves, packages per host, HostCVE links per host
+SIZES = {
+    "small": dict(tracks=3, hosts=200, cves=2_000, packages=100, density=20),
+    "medium": dict(tracks=10, hosts=2_000, cves=20_000, packages=200, density=50),
+    "large": dict(tracks=25, hosts=10_000, cves=100_000, packages=300, density=100),
+}
+IMPACTS = [
+    "Remote code execution", "Privilege escalation", "Denial of service",
+    "Information disclosure", "Security bypass", "Memory corruption",
+]
+WORDS = (
+    "buffer overflow in the parser allows remote attackers to execute arbitrary code via crafted "
+    "input use after free heap out of bounds read write certificate validation improper handling "
+    "of malformed packets integer underflow race condition local users privilege"
+).split()
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def load_catalogue(path):
+    """Distinct ``(name, arch)`` packages of an ``rpm -qa`` inventory."""
+    with open_text(path) as lines:
+        packages = {(p.name, p.arch): p for p in parse_inventory(lines)}
+    return sorted(packages.values())
+
+
+def bump(release, step):
+    """``release`` with its leading number raised by ``step`` (``7.el8`` -> ``9.el8``)."""
+    head, dot, tail = release.partition(".")
+    return f"{int(head) + step}{dot}{tail}" if head.isdigit() else f"{release}.{step}"
+
+
+class Fleet:
+    def __init__(self, catalogue, seed=0, images=4):
+        self.rng = random.Random(seed)
+        self.catalogue = catalogue
+        self.images = [
+            self.rng.sample(catalogue, k=len(catalogue)) for _ in range(images)
+        ]
+
+    def track_names(self, count):
+        return [f"track-{i:02d}" for i in range(1, count + 1)]
+
+    def host(self, index):
+        """``(name, os_type)`` of the ``index``-th host."""
+        os_type = "windows" if self.rng.random() < 0.15 else "linux"
+        return f"{os_type[:3]}-{index:05d}", os_type
+
+    def packages(self, count, upgrades=5, drift=1.0):
+        """A host's packages: a base image prefix, with a few upgrades on ``drift`` of the hosts."""
+        image = self.rng.choice(self.images)[:count]
+        upgraded = set()
+        # No draw at drift 1, so default fleets are the same as before drift existed.
+        if drift >= 1 or self.rng.random() < drift:
+            upgraded = set(self.rng.sample(range(len(image)), k=min(upgrades, len(image))))
+        for position, package in enumerate(image):
+            release = bump(package.release, self.rng.randint(1, 3)) if position in upgraded else package.release
+            installed = EPOCH + timedelta(minutes=self.rng.randrange(365 * 24 * 60))
+            yield package._replace(release=release, installed_at=installed)
+
+    def cve(self, index):
+        """``(cve_id, description, score, impact)`` of the ``index``-th CVE."""
+        year = 2015 + index % 10
+        # Skewed towards high scores, like the NVD distribution.
+        score = round(min(10.0, max(0.0, self.rng.triangular(0.0, 10.0, 7.5))), 1)
+        description = " ".join(self.rng.choices(WORDS, k=self.rng.randint(12, 40))).capitalize() + "."
+        return f"CVE-{year}-{index:06d}", description, score, self.rng.choice(IMPACTS)
+
+    def affected(self):
+        """Affected ranges of one CVE as ``(name, arch, start, end)`` tuples.
+
+        Ranges end just above the catalogue release, so hosts without the
+        upgrade are affected.
+        """
+        for package in self.rng.sample(self.catalogue, k=self.rng.choice((1, 1, 2))):
+            end = f"{package.version}-{bump(package.release, self.rng.randint(0, 2))}"
+            yield package.name, "", "", end
+
+    def links(self, cve_count, density):
+        """Indexes of the CVEs linked to one host."""
+        return self.rng.sample(range(cve_count), k=min(density, cve_count))
+
+
+def inventory_line(package):
+    """Render a package in the ``pack.txt`` layout."""
+    version = f"{package.epoch}:{package.version}" if package.epoch else package.version
+    nevra = f"{package.name}-{version}-{package.release}.{package.arch}"
+    installed = package.installed_at.strftime("%a %d %b %Y %I:%M:%S %p +0000")
+    return f"{nevra}|{package.name}|{version}|{package.release}|{package.arch}|{installed}\n"
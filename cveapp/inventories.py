@@ -0,0 +1,50 @@
+"""Content-addressed storage of host inventories.
+
+Hosts built from the same golden image have the same package list, so
+instead of one set of rows per host an inventory is stored once under the
+digest of its packages and hosts point at it (``Host.inventory``).
+Matching then runs once per distinct inventory (see :mod:`cveapp.matching`).
+"""
+import hashlib
+
+from .models import Host, Inventory, InventoryPackage
+
+PACKAGE_FIELDS = ("name", "epoch", "version", "release", "arch")
+
+
+def digest(keys):
+    """SHA-256 of a set of ``(name, epoch, version, release, arch)`` keys."""
+    h = hashlib.sha256()
+    for key in sorted(set(keys)):
+        h.update("\t".join(key).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def store(keys, batch_size=5000):
+    """Return ``(inventory, created)`` for a set of package keys."""
+    keys = set(keys)
+    inventory, created = Inventory.objects.get_or_create(digest=digest(keys), defaults={"package_count": len(keys)})
+    if created:
+        InventoryPackage.objects.bulk_create(
+            [InventoryPackage(inventory=inventory, **dict(zip(PACKAGE_FIELDS, key))) for key in keys],
+            batch_size=batch_size,
+        )
+    return inventory, created
+
+
+def assign(host, inventory):
+    """Point ``host`` at ``inventory``; returns whether anything changed."""
+    if host.inventory_id == inventory.id:
+        return False
+    Host.objects.filter(pk=host.pk).update(inventory=inventory)
+    host.inventory = inventory
+    return True
+
+
+def prune(inventory_ids=None):
+    """Delete inventories no host uses any more (all of them, or of ``inventory_ids``)."""
+    orphans = Inventory.objects.filter(hosts__isnull=True)
+    if inventory_ids is not None:
+        orphans = orphans.filter(id__in=inventory_ids)
+    return orphans.delete()[1].get(Inventory._meta.label, 0)
@@ -0,0 +1,85 @@
+"""Parsing of ``rpm -qa --qf`` package inventories such as ``pack.txt``.
+
+Two pipe-delimited layouts are accepted, with or without a leading NEVRA
+column::
+
+    name|version|release|arch|installtime
+    nevra|name|version|release|arch|installtime
+
+``version`` may carry an ``epoch:`` prefix and ``installtime`` is either the
+``%{INSTALLTIME:date}`` rendering or raw seconds since the epoch.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+Package = namedtuple("Package", "name epoch version release arch installed_at")
+
+NONE = "(none)"
+INVENTORY_SUFFIXES = (".gz", ".txt", ".list")
+
+_SHORT_OFFSET = re.compile(r"([+-]\d{2})$")
+
+
+def host_name_for(path):
+    """Derive a host name from an inventory file name (``web01.list.gz``)."""
+    name = Path(path).name
+    while True:
+        stem, suffix = name.rsplit(".", 1) if "." in name else (name, "")
+        if f".{suffix}" not in INVENTORY_SUFFIXES:
+            return name
+        name = stem
+
+
+def parse_installtime(value):
+    value = value.strip()
+    if not value or value == NONE:
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=timezone.utc)
+    # rpm prints offsets such as "+08", which strptime's %z does not accept.
+    value = _SHORT_OFFSET.sub(r"\g<1>00", value)
+    for fmt in ("%a %d %b %Y %I:%M:%S %p %z", "%a %b %d %H:%M:%S %Y %z"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_line(line):
+    """Parse one inventory line into a :class:`Package`, or None to skip it."""
+    line = line.strip()
+    if not line or line.startswith("#") or "%{" in line:
+        return None
+    fields = line.split("|")
+    if len(fields) == 6:
+        fields = fields[1:]
+    if len(fields) != 5:
+        return None
+    name, version, release, arch, installtime = (f.strip() for f in fields)
+    epoch = ""
+    if ":" in version:
+        epoch, version = version.split(":", 1)
+    return Package(
+        name=name,
+        epoch="" if epoch in ("0", NONE) else epoch,
+        version=version,
+        release=release,
+        arch="" if arch == NONE else arch,
+        installed_at=parse_installtime(installtime),
+    )
+
+
+def parse_inventory(lines):
+    """Yield packages from an iterable of inventory lines."""
+    for line in lines:
+        package = parse_line(line)
+        if package is not None:
+            yield package
+
+
+def package_key(package):
+    """Identity of an installed package, ignoring its install time."""
+    return (package.name, package.epoch, package.version, package.release, package.arch)
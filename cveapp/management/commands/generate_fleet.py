@@ -0,0 +1,140 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from cveapp import blast_radius, cache, inventories
+from cveapp.fleet import SIZES, Fleet, inventory_line, load_catalogue
+from cveapp.inventory import package_key
+from cveapp.matching import match_hosts
+from cveapp.models import (
+    CVE, AffectedPackage, CVETriage, Host, HostCVE, HostSummary, ImportWatermark, Inventory, InventoryPackage, Track,
+    TrackSummary,
+)
+from cveapp.summaries import refresh_host_summaries, refresh_track_summaries
+
+TABLES = [
+    model._meta.db_table
+    for model in (
+        HostCVE, CVETriage, AffectedPackage, HostSummary, TrackSummary, Host, InventoryPackage, Inventory, CVE, Track,
+        ImportWatermark,
+    )
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic fleet: tracks, hosts with installed packages, CVEs "
+        "with affected ranges and HostCVE links. Deterministic for a given size and seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", choices=SIZES, default="small", help="Preset for the counts below.")
+        parser.add_argument("--tracks", type=int)
+        parser.add_argument("--hosts", type=int)
+        parser.add_argument("--cves", type=int)
+        parser.add_argument("--packages", type=int, help="Installed packages per Linux host.")
+        parser.add_argument("--density", type=int, help="HostCVE links per host.")
+        parser.add_argument("--drift", type=float, default=1.0,
+                            help="Fraction of Linux hosts with packages upgraded beyond their image; "
+                                 "lower it for homogeneous fleets.")
+        parser.add_argument("--match", action="store_true", help="Derive HostCVE links by matching packages instead.")
+        parser.add_argument("--catalogue", default=str(Path(settings.BASE_DIR) / "pack.txt"),
+                            help="rpm -qa inventory the package names and versions are drawn from.")
+        parser.add_argument("--inventories", metavar="DIR", help="Also write one pack.txt-style file per Linux host.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--reset", action="store_true", help="Empty every cveapp table first.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counts = {key: options[key] if options[key] is not None else value for key, value in SIZES[options["size"]].items()}
+        try:
+            catalogue = load_catalogue(options["catalogue"])
+        except OSError as exc:
+            raise CommandError(f"{options['catalogue']}: {exc}")
+        if not catalogue:
+            raise CommandError(f"{options['catalogue']}: no packages found.")
+        self.batch_size = options["batch_size"]
+        fleet = Fleet(catalogue, seed=options["seed"])
+
+        with transaction.atomic():
+            if options["reset"]:
+                connection.ops.execute_sql_flush(connection.ops.sql_flush(self.style, TABLES, reset_sequences=True))
+            names = fleet.track_names(counts["tracks"])
+            Track.objects.bulk_create([Track(name=name) for name in names], ignore_conflicts=True)
+            tracks = list(Track.objects.filter(name__in=names).order_by("name"))
+            host_ids = self.create_hosts(fleet, tracks, counts, options["inventories"], options["drift"])
+            cve_ids = self.create_cves(fleet, counts["cves"])
+            if options["match"]:
+                links = match_hosts(host_ids=host_ids, batch_size=self.batch_size)[0]
+            else:
+                links = self.create_links(fleet, host_ids, cve_ids, counts["density"])
+            refresh_host_summaries(host_ids)
+            refresh_track_summaries([track.id for track in tracks])
+            blast_radius.mark_stale()
+            cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(tracks)} track(s), {len(host_ids)} host(s), {len(cve_ids)} CVE(s) "
+            f"and {links} host CVE link(s)."
+        ))
+
+    def save(self, model, rows, final=False):
+        if rows and (final or len(rows) >= self.batch_size):
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+            rows.clear()
+
+    def create_hosts(self, fleet, tracks, counts, inventory_dir, drift):
+        if inventory_dir:
+            os.makedirs(inventory_dir, exist_ok=True)
+        start = Host.objects.count()
+        hosts = [
+            Host(name=name, os_type=os_type, track=tracks[i % len(tracks)] if tracks else None)
+            for i, (name, os_type) in enumerate(map(fleet.host, range(start, start + counts["hosts"])))
+        ]
+        # Hosts on an unchanged image share one stored inventory.
+        stored = {}
+        for host in hosts:
+            if host.os_type != "linux":
+                continue
+            packages = list(fleet.packages(counts["packages"], drift=drift))
+            keys = {package_key(package) for package in packages}
+            digest = inventories.digest(keys)
+            if digest not in stored:
+                stored[digest] = inventories.store(keys, batch_size=self.batch_size)[0]
+            host.inventory = stored[digest]
+            if inventory_dir:
+                with open(os.path.join(inventory_dir, f"{host.name}.txt"), "w") as f:
+                    f.writelines(map(inventory_line, packages))
+        hosts = Host.objects.bulk_create(hosts, batch_size=self.batch_size)
+        return [host.id for host in hosts]
+
+    def create_cves(self, fleet, count):
+        start = CVE.objects.count()
+        ranges, cve_ids = [], []
+        for chunk in range(0, count, self.batch_size):
+            cves = CVE.objects.bulk_create([
+                CVE(cve_id=cve_id, description=description, score=score, impact=impact)
+                for cve_id, description, score, impact in map(fleet.cve, range(start + chunk, start + min(count, chunk + self.batch_size)))
+            ])
+            for cve in cves:
+                cve_ids.append(cve.id)
+                ranges.extend(
+                    AffectedPackage(cve=cve, name=name, arch=arch, start_evr=start_evr, end_evr=end_evr)
+                    for name, arch, start_evr, end_evr in fleet.affected()
+                )
+                self.save(AffectedPackage, ranges)
+        self.save(AffectedPackage, ranges, final=True)
+        return cve_ids
+
+    def create_links(self, fleet, host_ids, cve_ids, density):
+        rows, total = [], 0
+        for host_id in host_ids:
+            links = [HostCVE(host_id=host_id, cve_id=cve_ids[index]) for index in fleet.links(len(cve_ids), density)]
+            rows.extend(links)
+            total += len(links)
+            self.save(HostCVE, rows)
+        self.save(HostCVE, rows, final=True)
+        return total
@@ -0,0 +1,112 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cveapp import blast_radius, cache
+from cveapp.matching import match_cves, paused
+from cveapp.models import CVE, AffectedPackage, HostCVE, ImportWatermark
+from cveapp.nvd import FeedError, iter_vulnerabilities, parse_vulnerability
+from cveapp.signals import hostcves_changed
+from cveapp.utils import open_text
+
+SOURCE = "nvd"
+
+
+class Command(BaseCommand):
+    help = (
+        "Import NVD CVE JSON 2.0 feed files (plain or gzipped) from disk. Entries "
+        "not modified since the previous import are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--full", action="store_true", help="Ignore the stored watermark and import everything.")
+        parser.add_argument("--no-match", action="store_true", help="Do not link hosts to the imported CVEs.")
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.cve_ids = set()
+        watermark = ImportWatermark.objects.filter(source=SOURCE).first()
+        since = None if options["full"] or watermark is None else watermark.last_modified
+        newest = watermark.last_modified if watermark else None
+
+        imported = skipped = 0
+        batch = []
+        # The watermark is only advanced once every file is in, so feeds can
+        # be given in any order and a failed run is simply repeated.
+        with transaction.atomic():
+            for path in options["files"]:
+                try:
+                    with open_text(path) as fp:
+                        for item in iter_vulnerabilities(fp):
+                            entry = parse_vulnerability(item)
+                            if entry is None:
+                                continue
+                            modified = entry["last_modified"]
+                            if since is not None and modified is not None and modified <= since:
+                                skipped += 1
+                                continue
+                            if modified is not None and (newest is None or modified > newest):
+                                newest = modified
+                            batch.append(entry)
+                            if len(batch) >= self.batch_size:
+                                imported += self.upsert(batch)
+                                batch = []
+                except (OSError, FeedError) as exc:
+                    raise CommandError(f"{path}: {exc}")
+            imported += self.upsert(batch)
+            # Only hosts carrying an affected package are read, so this
+            # stays cheap for small incremental feeds.
+            created = deleted = 0
+            if not options["no_match"]:
+                created, deleted = match_cves(self.cve_ids)
+            if imported:
+                # bulk_create skips signals, and a rescored CVE changes the
+                # summaries of hosts whose links did not change.
+                hostcves_changed.send(sender=HostCVE, host_ids=self.linked_hosts())
+                blast_radius.mark_dirty(cve_ids=self.cve_ids)
+                cache.invalidate()
+            if newest is not None:
+                ImportWatermark.objects.update_or_create(source=SOURCE, defaults={"last_modified": newest})
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} CVE(s), skipped {skipped} unchanged; "
+            f"created {created} and deleted {deleted} host CVE link(s)."
+        ))
+
+    def linked_hosts(self):
+        cve_ids, host_ids = sorted(self.cve_ids), set()
+        for start in range(0, len(cve_ids), self.batch_size):
+            chunk = cve_ids[start:start + self.batch_size]
+            host_ids.update(HostCVE.objects.filter(cve_id__in=chunk).values_list("host_id", flat=True))
+        return sorted(host_ids)
+
+    def upsert(self, entries):
+        if not entries:
+            return 0
+        # A feed may repeat an id; the last occurrence wins.
+        entries = list({e["cve_id"]: e for e in entries}.values())
+        CVE.objects.bulk_create(
+            [CVE(cve_id=e["cve_id"], description=e["description"], score=e["score"], impact=e["impact"]) for e in entries],
+            update_conflicts=True,
+            unique_fields=["cve_id"],
+            update_fields=["description", "score", "impact"],
+        )
+        ids = dict(CVE.objects.filter(cve_id__in=[e["cve_id"] for e in entries]).values_list("cve_id", "id"))
+        self.cve_ids.update(ids.values())
+        # Matched once at the end (or not, with --no-match), not per row.
+        with paused():
+            AffectedPackage.objects.filter(cve_id__in=ids.values()).delete()
+        AffectedPackage.objects.bulk_create([
+            AffectedPackage(
+                cve_id=ids[e["cve_id"]],
+                name=name,
+                start_evr=start,
+                start_inclusive=start_inclusive,
+                end_evr=end,
+                end_inclusive=end_inclusive,
+            )
+            for e in entries
+            for name, start, start_inclusive, end, end_inclusive in e["ranges"]
+        ], batch_size=self.batch_size)
+        return len(entries)
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cveapp import cache, inventories
+from cveapp.inventory import host_name_for, package_key, parse_inventory
+from cveapp.models import Host, Track
+from cveapp.utils import open_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Load rpm -qa inventories (one file per host, plain or gzipped). Identical package "
+        "lists are stored once and shared between hosts; unchanged hosts write nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Inventory files; the host name defaults to the file name.")
+        parser.add_argument("--host", help="Host name to use (only valid with a single file).")
+        parser.add_argument("--track", help="Track name for hosts created by this run.")
+        parser.add_argument("--os-type", default="linux", choices=[c[0] for c in Host.OS_CHOICES])
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        files = options["files"]
+        if options["host"] and len(files) > 1:
+            raise CommandError("--host can only be used with a single inventory file.")
+
+        self.batch_size = options["batch_size"]
+        track = None
+        if options["track"]:
+            track, _ = Track.objects.get_or_create(name=options["track"])
+
+        changed = unchanged = new = 0
+        previous = set()
+        with transaction.atomic():
+            for path in files:
+                name = options["host"] or host_name_for(path)
+                host = self.get_host(name, track, options["os_type"])
+                try:
+                    with open_text(path) as lines:
+                        keys = {package_key(package) for package in parse_inventory(lines)}
+                except OSError as exc:
+                    raise CommandError(f"{path}: {exc}")
+                inventory, created = inventories.store(keys, batch_size=self.batch_size)
+                new += created
+                if host.inventory_id is not None:
+                    previous.add(host.inventory_id)
+                if inventories.assign(host, inventory):
+                    changed += 1
+                else:
+                    unchanged += 1
+            pruned = inventories.prune(previous)
+            if changed:
+                # assign() updates hosts without post_save, but the API shows their inventory.
+                cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {len(files)} host(s): {changed} changed, {unchanged} unchanged; "
+            f"{new} new and {pruned} unused inventory(ies)."
+        ))
+
+    def get_host(self, name, track, os_type):
+        hosts = Host.objects.filter(name=name)
+        if track is not None:
+            hosts = hosts.filter(track=track)
+        host = hosts.first()
+        if host is None:
+            host = Host.objects.create(name=name, track=track, os_type=os_type)
+        return host
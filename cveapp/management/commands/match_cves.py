@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cveapp.matching import MatchIndex, match_hosts
+from cveapp.models import Host
+
+
+class Command(BaseCommand):
+    help = "Link hosts to CVEs by matching installed packages against affected version ranges."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", action="append", dest="hosts", help="Host name to match (repeatable). Defaults to all hosts.")
+        parser.add_argument("--prune", action="store_true", help="Delete links of matched hosts that no longer apply.")
+
+    def handle(self, *args, **options):
+        host_ids = None
+        if options["hosts"]:
+            host_ids = list(Host.objects.filter(name__in=options["hosts"]).values_list("id", flat=True))
+
+        started = time.perf_counter()
+        index = MatchIndex.from_db()
+        built = time.perf_counter()
+        created, deleted = match_hosts(host_ids=host_ids, prune=options["prune"], index=index)
+        finished = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} and deleted {deleted} host CVE link(s) "
+            f"(index {built - started:.2f}s, matching {finished - built:.2f}s)."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cveapp.models import Host, Track
+from cveapp.summaries import refresh_host_summaries, refresh_track_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild every host and track risk summary from HostCVE."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            hosts = refresh_host_summaries(Host.objects.values_list("id", flat=True))
+            tracks = refresh_track_summaries(Track.objects.values_list("id", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(hosts)} host and {len(tracks)} track summaries."))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from cveapp.models import CVE, CVETriage, Track
+from cveapp.triage import BACKENDS, Budget, triage
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize and prioritize each track's CVEs with an LLM, many CVEs per prompt. "
+        "CVEs already triaged for their current description are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--track", action="append", dest="tracks", help="Track name (repeatable). Defaults to all tracks.")
+        parser.add_argument("--backend", choices=BACKENDS, default=settings.CVEAPP_TRIAGE_BACKEND)
+        parser.add_argument("--batch-size", type=int, default=20, help="CVEs per prompt.")
+        parser.add_argument("--max-batch-tokens", type=int, default=8000, help="Estimated tokens per call, prompt and reply.")
+        parser.add_argument("--max-tokens", type=int, help="Stop once this many tokens were spent in total.")
+        parser.add_argument("--tokens-per-minute", type=int, default=settings.CVEAPP_TRIAGE_TOKENS_PER_MINUTE)
+        parser.add_argument("--requests-per-minute", type=int, default=settings.CVEAPP_TRIAGE_REQUESTS_PER_MINUTE)
+        parser.add_argument("--force", action="store_true", help="Triage again even if up to date.")
+
+    def handle(self, *args, **options):
+        tracks = Track.objects.order_by("name")
+        if options["tracks"]:
+            tracks = tracks.filter(name__in=options["tracks"])
+            missing = set(options["tracks"]) - set(tracks.values_list("name", flat=True))
+            if missing:
+                raise CommandError(f"Unknown track(s): {', '.join(sorted(missing))}")
+
+        backend = BACKENDS[options["backend"]]()
+        # One budget for the whole run, shared by every track.
+        budget = Budget(
+            max_tokens=options["max_tokens"],
+            tokens_per_minute=options["tokens_per_minute"] or None,
+            requests_per_minute=options["requests_per_minute"] or None,
+        )
+        for track in tracks:
+            cves = CVE.objects.filter(hostcve__host__track=track).distinct()
+            stats = triage(
+                cves, backend, budget, batch_size=options["batch_size"],
+                max_batch_tokens=options["max_batch_tokens"], force=options["force"],
+            )
+            priorities = dict(
+                CVETriage.objects.filter(cve__in=cves).values_list("priority").annotate(n=Count("cve")).order_by()
+            )
+            self.stdout.write(
+                f"{track.name}: {stats['triaged']} triaged in {stats['calls']} call(s), "
+                f"{stats['skipped']} up to date, {stats['failed']} without an answer; "
+                + ", ".join(f"P{p} {priorities.get(p, 0)}" for p, _ in CVETriage.PRIORITY_CHOICES)
+            )
+            if stats["exhausted"]:
+                self.stdout.write(self.style.WARNING(f"Token budget spent ({budget.used} tokens); stopping."))
+                break
+        self.stdout.write(self.style.SUCCESS(f"Done, about {budget.used} tokens used."))
@@ -0,0 +1,286 @@
+"""Match installed packages against CVE affected-version ranges.
+
+:class:`MatchIndex` is built once from every :class:`AffectedPackage` row.
+For each package name (and arch) it keeps the sorted, de-duplicated range
+bounds and the set of CVEs covering each gap between them, so looking up an
+installed package is one :func:`bisect` instead of a scan over every range.
+Lookups are memoised by exact package identity, which makes fleets built
+from the same images nearly free after the first host.
+
+:func:`match_hosts` re-matches hosts (new inventories); :func:`match_cves`
+re-matches CVEs (new or changed ranges) and only reads the inventories
+carrying an affected package, through the ``(name, arch)`` index on
+:class:`InventoryPackage`. Saving or deleting an :class:`AffectedPackage`
+queues its CVE for :func:`match_cves` when the transaction commits, except
+inside :func:`paused`, which bulk writers that match explicitly use.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from .evr import bound_key, evr_key
+from .models import AffectedPackage, Host, HostCVE, InventoryPackage
+from .signals import hostcves_changed
+
+EMPTY = frozenset()
+
+_pending = threading.local()
+
+
+class _RangeTable:
+    """Stabbing table for the ranges of one package name and arch.
+
+    With sorted bound keys ``p0 < p1 < ... < pk-1`` the version line splits
+    into ``2k + 1`` regions: below ``p0``, exactly ``p0``, between ``p0`` and
+    ``p1``, exactly ``p1``, ... above ``pk-1``.
+    """
+
+    def __init__(self, ranges):
+        points = set()
+        for start, _, end, _, _ in ranges:
+            if start is not None:
+                points.add(start)
+            if end is not None:
+                points.add(end)
+        self.points = sorted(points)
+        last = 2 * len(self.points)
+
+        opened = defaultdict(list)
+        closed = defaultdict(list)
+        for start, start_inclusive, end, end_inclusive, cve_id in ranges:
+            low = 0 if start is None else 2 * self._index(start) + (1 if start_inclusive else 2)
+            high = last if end is None else 2 * self._index(end) + (1 if end_inclusive else 0)
+            if low <= high:
+                opened[low].append(cve_id)
+                closed[high].append(cve_id)
+
+        active = defaultdict(int)
+        self.regions = []
+        current = EMPTY
+        for region in range(last + 1):
+            changed = False
+            for cve_id in opened.get(region, ()):
+                active[cve_id] += 1
+                changed = True
+            if changed:
+                current = frozenset(active)
+            self.regions.append(current)
+            if region in closed:
+                for cve_id in closed[region]:
+                    active[cve_id] -= 1
+                    if not active[cve_id]:
+                        del active[cve_id]
+                current = frozenset(active)
+
+    def _index(self, point):
+        return bisect_left(self.points, point)
+
+    def lookup(self, key):
+        i = bisect_left(self.points, key)
+        if i < len(self.points) and self.points[i] == key:
+            return self.regions[2 * i + 1]
+        return self.regions[2 * i]
+
+
+class MatchIndex:
+    def __init__(self, ranges):
+        """Build from ``(cve_id, name, arch, start_evr, start_inclusive,
+        end_evr, end_inclusive)`` tuples."""
+        grouped = defaultdict(list)
+        for cve_id, name, arch, start, start_inclusive, end, end_inclusive in ranges:
+            grouped[(name, arch)].append((
+                bound_key(start, not start_inclusive) if start else None,
+                start_inclusive,
+                bound_key(end, end_inclusive) if end else None,
+                end_inclusive,
+                cve_id,
+            ))
+        self.tables = {key: _RangeTable(items) for key, items in grouped.items()}
+        self.names = {name for name, _ in self.tables}
+        self._cache = {}
+
+    @classmethod
+    def from_db(cls, queryset=None):
+        if queryset is None:
+            queryset = AffectedPackage.objects.all()
+        return cls(queryset.values_list(
+            "cve_id", "name", "arch", "start_evr", "start_inclusive", "end_evr", "end_inclusive"
+        ).iterator(chunk_size=10000))
+
+    def match(self, name, epoch, version, release, arch=""):
+        """Return the ids of the CVEs affecting one installed package."""
+        if name not in self.names:
+            return EMPTY
+        package = (name, epoch, version, release, arch)
+        cached = self._cache.get(package)
+        if cached is not None:
+            return cached
+        key = evr_key(epoch, version, release)
+        result = EMPTY
+        for table_key in ((name, ""), (name, arch)) if arch else ((name, ""),):
+            table = self.tables.get(table_key)
+            if table is not None:
+                result = result | table.lookup(key)
+        self._cache[package] = result
+        return result
+
+    def match_packages(self, packages):
+        """Union of matches for ``(name, epoch, version, release, arch)`` rows."""
+        found = set()
+        for name, epoch, version, release, arch in packages:
+            if name in self.names:
+                found |= self.match(name, epoch, version, release, arch)
+        return found
+
+
+def match_hosts(host_ids=None, prune=False, index=None, chunk_size=500, batch_size=5000):
+    """Create the HostCVE rows implied by the hosts' inventories.
+
+    Only hosts with an inventory are considered, ``chunk_size`` hosts at a
+    time. Each distinct inventory is matched once and the result fanned
+    out to every host sharing it. With ``prune``, links for those hosts
+    that no longer match any package are deleted as well. Returns
+    ``(created, deleted)``.
+    """
+    if index is None:
+        index = MatchIndex.from_db()
+    hosts = Host.objects.filter(inventory__isnull=False).order_by("id")
+    if host_ids is not None:
+        hosts = hosts.filter(id__in=host_ids)
+    hosts = list(hosts.values_list("id", "inventory_id"))
+
+    created = deleted = 0
+    changed = set()
+    matched = {}
+    with transaction.atomic():
+        for start in range(0, len(hosts), chunk_size):
+            chunk = hosts[start:start + chunk_size]
+            to_create, to_delete = _diff_hosts(index, chunk, prune, matched)
+            HostCVE.objects.bulk_create(to_create, batch_size=batch_size)
+            for offset in range(0, len(to_delete), batch_size):
+                HostCVE.objects.filter(id__in=to_delete[offset:offset + batch_size]).delete()
+            changed.update(link.host_id for link in to_create)
+            created += len(to_create)
+            deleted += len(to_delete)
+        if changed:
+            hostcves_changed.send(sender=HostCVE, host_ids=changed)
+    return created, deleted
+
+
+def _inventory_packages(queryset):
+    by_inventory = defaultdict(list)
+    for inventory_id, *package in queryset.values_list("inventory_id", "name", "epoch", "version", "release", "arch"):
+        by_inventory[inventory_id].append(package)
+    return by_inventory
+
+
+def _diff_hosts(index, hosts, prune, matched):
+    # ``matched`` keeps the CVEs of every inventory seen so far, so an
+    # inventory shared by hosts in several chunks is still matched once.
+    missing = {inventory_id for _, inventory_id in hosts if inventory_id not in matched}
+    if missing:
+        packages = _inventory_packages(InventoryPackage.objects.filter(inventory_id__in=missing))
+        for inventory_id in missing:
+            matched[inventory_id] = index.match_packages(packages.get(inventory_id, ()))
+
+    linked = defaultdict(dict)
+    host_ids = [host_id for host_id, _ in hosts]
+    for pk, host_id, cve_id in HostCVE.objects.filter(host_id__in=host_ids).values_list("id", "host_id", "cve_id"):
+        linked[host_id].setdefault(cve_id, pk)
+
+    to_create = []
+    to_delete = []
+    for host_id, inventory_id in hosts:
+        wanted = matched[inventory_id]
+        current = linked.get(host_id, {})
+        to_create.extend(HostCVE(host_id=host_id, cve_id=cve_id) for cve_id in wanted if cve_id not in current)
+        if prune:
+            to_delete.extend(pk for cve_id, pk in current.items() if cve_id not in wanted)
+    return to_create, to_delete
+
+
+def match_cves(cve_ids, prune=True, chunk_size=500, batch_size=5000):
+    """Bring the HostCVE rows of ``cve_ids`` in line with their affected ranges.
+
+    Only inventory packages named in those ranges are read, so a new CVE
+    costs a few indexed queries rather than a scan of every inventory.
+    With ``prune``, links that no longer match are deleted, but only for
+    hosts with an inventory; links of other hosts were made by hand.
+    Returns ``(created, deleted)``.
+    """
+    cve_ids = sorted(set(cve_ids))
+    created = deleted = 0
+    changed = set()
+    with transaction.atomic():
+        for start in range(0, len(cve_ids), chunk_size):
+            to_create, to_delete = _diff_cves(cve_ids[start:start + chunk_size], prune)
+            HostCVE.objects.bulk_create(to_create, batch_size=batch_size)
+            for offset in range(0, len(to_delete), batch_size):
+                HostCVE.objects.filter(id__in=[pk for pk, _ in to_delete[offset:offset + batch_size]]).delete()
+            changed.update(link.host_id for link in to_create)
+            changed.update(host_id for _, host_id in to_delete)
+            created += len(to_create)
+            deleted += len(to_delete)
+        if changed:
+            hostcves_changed.send(sender=HostCVE, host_ids=changed)
+    return created, deleted
+
+
+def _diff_cves(cve_ids, prune):
+    index = MatchIndex.from_db(AffectedPackage.objects.filter(cve_id__in=cve_ids))
+    affected = {}
+    if index.names:
+        for inventory_id, packages in _inventory_packages(InventoryPackage.objects.filter(name__in=index.names)).items():
+            cves = index.match_packages(packages)
+            if cves:
+                affected[inventory_id] = cves
+    wanted = set()
+    if affected:
+        for host_id, inventory_id in Host.objects.filter(inventory_id__in=affected).values_list("id", "inventory_id"):
+            wanted.update((host_id, cve_id) for cve_id in affected[inventory_id])
+    current = {
+        (host_id, cve_id): pk
+        for pk, host_id, cve_id in HostCVE.objects.filter(cve_id__in=cve_ids).values_list("id", "host_id", "cve_id")
+    }
+
+    to_create = [HostCVE(host_id=host_id, cve_id=cve_id) for host_id, cve_id in wanted - current.keys()]
+    to_delete = []
+    if prune:
+        stale = {key: pk for key, pk in current.items() if key not in wanted}
+        inventoried = set(
+            Host.objects.filter(id__in={host_id for host_id, _ in stale}, inventory__isnull=False)
+            .values_list("id", flat=True)
+        ) if stale else set()
+        to_delete = [(pk, host_id) for (host_id, _), pk in stale.items() if host_id in inventoried]
+    return to_create, to_delete
+
+
+@contextmanager
+def paused():
+    """Queue nothing in this thread; the caller runs :func:`match_cves` itself (or not)."""
+    _pending.paused = getattr(_pending, "paused", 0) + 1
+    try:
+        yield
+    finally:
+        _pending.paused -= 1
+
+
+def mark_dirty(cve_ids):
+    """Queue ``cve_ids`` for :func:`match_cves` when the transaction commits."""
+    if getattr(_pending, "paused", 0):
+        return
+    if not hasattr(_pending, "cves"):
+        _pending.cves = set()
+    _pending.cves.update(cve_ids)
+    transaction.on_commit(flush)
+
+
+def flush():
+    cve_ids = getattr(_pending, "cves", set())
+    if not cve_ids:
+        return
+    _pending.cves = set()
+    match_cves(cve_ids)
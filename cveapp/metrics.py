@@ -0,0 +1,227 @@
+"""Opt-in request instrumentation in Prometheus text format.
+
+With ``CVEAPP_METRICS`` on, :class:`MetricsMiddleware` records per view
+and method: latency, SQL query count and time, response size and
+response-cache outcome. :func:`metrics_view` serves them at ``/metrics``. Metrics are
+kept in process memory, so each worker process reports its own.
+
+With ``CVEAPP_PROFILE_DIR`` also set, a ``CVEAPP_PROFILE_SAMPLE_RATE``
+fraction of sync requests runs under cProfile, and the profile is dumped
+there when the request took at least ``CVEAPP_PROFILE_SLOW_MS``.
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 10_240, 102_400, 1_048_576, 10_485_760)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "cveapp_request_duration_seconds": ("histogram", "Request latency.", LATENCY_BUCKETS),
+    "cveapp_requests_total": ("counter", "Requests by response status.", None),
+    "cveapp_db_queries": ("histogram", "SQL queries per request.", QUERY_BUCKETS),
+    "cveapp_db_query_seconds_total": ("counter", "Time spent in SQL queries.", None),
+    "cveapp_response_bytes": ("histogram", "Response body size (non-streaming responses).", SIZE_BUCKETS),
+    "cveapp_response_cache_total": ("counter", "Response cache outcomes.", None),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(pairs):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.values = {name: {} for name in METRICS}
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            series = self.values[name]
+            if labels not in series:
+                series[labels] = Histogram(METRICS[name][2])
+            series[labels].observe(value)
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, buckets) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self.values[name].items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(labels)} {value:g}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*buckets, "+Inf"), value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {value.sum:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class QueryTimer:
+    """Counts a request's queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# Timer of the request being handled. Context variables follow a request
+# into the threads sync_to_async runs its ORM calls in, and concurrent async
+# requests each see their own.
+_current_queries = ContextVar("cveapp_current_queries", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Permanent ``execute_wrapper`` charging each query to the current request."""
+    queries = _current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+def _install_counter():
+    """Add :func:`count_query` to this thread's connections, once each."""
+    for connection in connections.all():
+        if count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_query)
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unmatched"
+
+
+def record(request, response, seconds, queries):
+    labels = (("method", request.method), ("view", view_name(request)))
+    registry.observe("cveapp_request_duration_seconds", labels, seconds)
+    registry.inc("cveapp_requests_total", labels + (("status", response.status_code),))
+    registry.observe("cveapp_db_queries", labels, queries.count)
+    registry.inc("cveapp_db_query_seconds_total", labels, queries.seconds)
+    if not response.streaming:
+        registry.observe("cveapp_response_bytes", labels, len(response.content))
+    outcome = "not_modified" if response.status_code == 304 else response.get("X-Cache", "").lower()
+    if outcome:
+        registry.inc("cveapp_response_cache_total", labels + (("result", outcome),))
+
+
+def _start_profiler():
+    if not settings.CVEAPP_PROFILE_DIR or random.random() >= settings.CVEAPP_PROFILE_SAMPLE_RATE:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this thread.
+        return None
+    return profiler
+
+
+def _save_profile(profiler, request, seconds):
+    profiler.disable()
+    if seconds * 1000 < settings.CVEAPP_PROFILE_SLOW_MS:
+        return
+    os.makedirs(settings.CVEAPP_PROFILE_DIR, exist_ok=True)
+    name = re.sub(r"[^\w.-]+", "_", view_name(request))
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{seconds * 1000:.0f}ms.prof"
+    profiler.dump_stats(os.path.join(settings.CVEAPP_PROFILE_DIR, filename))
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.CVEAPP_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        queries = QueryTimer()
+        profiler = _start_profiler()
+        started = time.perf_counter()
+        _install_counter()
+        token = _current_queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        seconds = time.perf_counter() - started
+        if profiler is not None:
+            _save_profile(profiler, request, seconds)
+        record(request, response, seconds, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        # Connections are per thread: install on the ones of the thread that
+        # runs this request's async ORM calls, not the event loop's.
+        await sync_to_async(_install_counter)()
+        token = _current_queries.set(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        record(request, response, time.perf_counter() - started, queries)
+        return response
+
+
+def metrics_view(request):
+    if not settings.CVEAPP_METRICS:
+        raise Http404
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0002_track_host_track"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstalledPackage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("epoch", models.CharField(blank=True, max_length=10)),
+                ("version", models.CharField(max_length=100)),
+                ("release", models.CharField(max_length=100)),
+                ("arch", models.CharField(blank=True, max_length=20)),
+                ("installed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "host",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="packages",
+                        to="cveapp.host",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("host", "name", "epoch", "version", "release", "arch"),
+                        name="unique_host_package",
+                    )
+                ],
+            },
+        ),
+    ]
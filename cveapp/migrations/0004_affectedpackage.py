@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0003_installedpackage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AffectedPackage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=200)),
+                ("arch", models.CharField(blank=True, max_length=20)),
+                ("start_evr", models.CharField(blank=True, max_length=100)),
+                ("start_inclusive", models.BooleanField(default=True)),
+                ("end_evr", models.CharField(blank=True, max_length=100)),
+                ("end_inclusive", models.BooleanField(default=False)),
+                (
+                    "cve",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="affected_packages",
+                        to="cveapp.cve",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0004_affectedpackage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=50, unique=True)),
+                ("last_modified", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0005_importwatermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HostSummary",
+            fields=[
+                ("cve_count", models.IntegerField(default=0)),
+                ("critical", models.IntegerField(default=0)),
+                ("high", models.IntegerField(default=0)),
+                ("medium", models.IntegerField(default=0)),
+                ("low", models.IntegerField(default=0)),
+                ("none", models.IntegerField(default=0)),
+                ("max_score", models.FloatField(blank=True, null=True)),
+                ("avg_score", models.FloatField(blank=True, null=True)),
+                ("top_cves", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "host",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="cveapp.host",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="TrackSummary",
+            fields=[
+                ("cve_count", models.IntegerField(default=0)),
+                ("critical", models.IntegerField(default=0)),
+                ("high", models.IntegerField(default=0)),
+                ("medium", models.IntegerField(default=0)),
+                ("low", models.IntegerField(default=0)),
+                ("none", models.IntegerField(default=0)),
+                ("max_score", models.FloatField(blank=True, null=True)),
+                ("avg_score", models.FloatField(blank=True, null=True)),
+                ("top_cves", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "track",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="cveapp.track",
+                    ),
+                ),
+                ("host_count", models.IntegerField(default=0)),
+                ("affected_host_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_host_cves(apps, schema_editor):
+    HostCVE = apps.get_model("cveapp", "HostCVE")
+    duplicates = (
+        HostCVE.objects.values("host_id", "cve_id")
+        .annotate(keep=Min("id"), copies=Count("id"))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates:
+        HostCVE.objects.filter(host_id=row["host_id"], cve_id=row["cve_id"]).exclude(
+            id=row["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0006_risk_summaries"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_host_cves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="cve",
+            index=models.Index(fields=["score", "id"], name="cve_score_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="host",
+            index=models.Index(fields=["os_type"], name="host_os_type_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hostcve",
+            index=models.Index(fields=["cve", "host"], name="hostcve_cve_host_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="hostcve",
+            constraint=models.UniqueConstraint(
+                fields=("host", "cve"), name="unique_host_cve"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="hostcve",
+            name="cve",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="cveapp.cve",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="hostcve",
+            name="host",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="cveapp.host",
+            ),
+        ),
+    ]
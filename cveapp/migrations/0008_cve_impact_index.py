@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0007_hostcve_unique_and_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cve",
+            index=models.Index(fields=["impact"], name="cve_impact_idx"),
+        ),
+    ]
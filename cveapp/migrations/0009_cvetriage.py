@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0008_cve_impact_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CVETriage",
+            fields=[
+                (
+                    "cve",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="triage",
+                        serialize=False,
+                        to="cveapp.cve",
+                    ),
+                ),
+                ("summary", models.TextField()),
+                (
+                    "priority",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Urgent"), (2, "High"), (3, "Medium"), (4, "Low")]
+                    ),
+                ),
+                ("description_hash", models.CharField(max_length=64)),
+                ("model", models.CharField(max_length=100)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["priority"], name="cvetriage_priority_idx")
+                ],
+            },
+        ),
+    ]
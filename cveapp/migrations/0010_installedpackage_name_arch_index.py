@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0009_cvetriage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="installedpackage",
+            index=models.Index(
+                fields=["name", "arch"], name="installedpkg_name_arch_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:38
+
+import hashlib
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FIELDS = ("name", "epoch", "version", "release", "arch")
+
+
+def share_inventories(apps, schema_editor):
+    """Fold each host's InstalledPackage rows into a shared Inventory."""
+    Host = apps.get_model("cveapp", "Host")
+    InstalledPackage = apps.get_model("cveapp", "InstalledPackage")
+    Inventory = apps.get_model("cveapp", "Inventory")
+    InventoryPackage = apps.get_model("cveapp", "InventoryPackage")
+
+    by_host = defaultdict(set)
+    for host_id, *key in InstalledPackage.objects.values_list("host_id", *FIELDS).iterator(chunk_size=10000):
+        by_host[host_id].add(tuple(key))
+    stored = {}
+    for host_id, keys in by_host.items():
+        h = hashlib.sha256()
+        for key in sorted(keys):
+            h.update("\t".join(key).encode())
+            h.update(b"\n")
+        digest = h.hexdigest()
+        if digest not in stored:
+            inventory = Inventory.objects.create(digest=digest, package_count=len(keys))
+            InventoryPackage.objects.bulk_create(
+                [InventoryPackage(inventory=inventory, **dict(zip(FIELDS, key))) for key in keys], batch_size=5000,
+            )
+            stored[digest] = inventory.id
+        Host.objects.filter(id=host_id).update(inventory_id=stored[digest])
+
+
+def unshare_inventories(apps, schema_editor):
+    Host = apps.get_model("cveapp", "Host")
+    InstalledPackage = apps.get_model("cveapp", "InstalledPackage")
+    InventoryPackage = apps.get_model("cveapp", "InventoryPackage")
+
+    packages = defaultdict(list)
+    for inventory_id, *key in InventoryPackage.objects.values_list("inventory_id", *FIELDS):
+        packages[inventory_id].append(key)
+    for host_id, inventory_id in Host.objects.filter(inventory__isnull=False).values_list("id", "inventory_id"):
+        InstalledPackage.objects.bulk_create(
+            [InstalledPackage(host_id=host_id, **dict(zip(FIELDS, key))) for key in packages[inventory_id]],
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cveapp", "0010_installedpackage_name_arch_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Inventory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64, unique=True)),
+                ("package_count", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="host",
+            name="inventory",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="hosts",
+                to="cveapp.inventory",
+            ),
+        ),
+        migrations.CreateModel(
+            name="InventoryPackage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("epoch", models.CharField(blank=True, max_length=10)),
+                ("version", models.CharField(max_length=100)),
+                ("release", models.CharField(max_length=100)),
+                ("arch", models.CharField(blank=True, max_length=20)),
+                (
+                    "inventory",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="packages",
+                        to="cveapp.inventory",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="inventorypackage",
+            index=models.Index(
+                fields=["name", "arch"], name="inventorypkg_name_arch_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="inventorypackage",
+            constraint=models.UniqueConstraint(
+                fields=("inventory", "name", "epoch", "version", "release", "arch"),
+                name="unique_inventory_package",
+            ),
+        ),
+        migrations.RunPython(share_inventories, unshare_inventories),
+        migrations.DeleteModel(
+            name="InstalledPackage",
+        ),
+    ]
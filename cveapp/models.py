@@ -1,6 +1,32 @@
 
 from django.db import models
 
+# CVSS v3 qualitative severity: (band, lowest score in band), highest first.
+SEVERITY_BANDS = [
+    ("critical", 9.0),
+    ("high", 7.0),
+    ("medium", 4.0),
+    ("low", 0.1),
+    ("none", 0.0),
+]
+
+
+def severity(score):
+    for band, lowest in SEVERITY_BANDS:
+        if score >= lowest:
+            return band
+    return "none"
+
+
+def severity_range(band):
+    """Return ``(lowest, upper)`` scores of a band; ``upper`` is exclusive or None."""
+    upper = None
+    for name, lowest in SEVERITY_BANDS:
+        if name == band:
+            return lowest, upper
+        upper = lowest
+    raise ValueError(f"unknown severity {band!r}")
+
 
 class Track(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -17,6 +43,12 @@ class Host(models.Model):
     name = models.CharField(max_length=100)
     os_type = models.CharField(max_length=10, choices=OS_CHOICES)
     track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name="hosts", null=True, blank=True)
+    inventory = models.ForeignKey("Inventory", on_delete=models.SET_NULL, related_name="hosts", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["os_type"], name="host_os_type_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.os_type})"
@@ -27,12 +59,168 @@ class CVE(models.Model):
     score = models.FloatField()
     impact = models.CharField(max_length=200)
 
+    class Meta:
+        indexes = [
+            # Serves score filters and the (-score, id) keyset ordering.
+            models.Index(fields=["score", "id"], name="cve_score_id_idx"),
+            models.Index(fields=["impact"], name="cve_impact_idx"),
+        ]
+
     def __str__(self):
         return self.cve_id
 
+class AffectedPackage(models.Model):
+    """A package version range affected by a CVE.
+
+    Bounds are ``[epoch:]version[-release]`` strings; an empty bound leaves
+    that side of the range open. An empty ``arch`` matches every arch.
+    """
+    cve = models.ForeignKey(CVE, on_delete=models.CASCADE, related_name="affected_packages")
+    name = models.CharField(max_length=200, db_index=True)
+    arch = models.CharField(max_length=20, blank=True)
+    start_evr = models.CharField(max_length=100, blank=True)
+    start_inclusive = models.BooleanField(default=True)
+    end_evr = models.CharField(max_length=100, blank=True)
+    end_inclusive = models.BooleanField(default=False)
+
+    def __str__(self):
+        low = f"{'>=' if self.start_inclusive else '>'} {self.start_evr}" if self.start_evr else ""
+        high = f"{'<=' if self.end_inclusive else '<'} {self.end_evr}" if self.end_evr else ""
+        return f"{self.cve} - {self.name} {low} {high}".strip()
+
 class HostCVE(models.Model):
-    host = models.ForeignKey(Host, on_delete=models.CASCADE)
-    cve = models.ForeignKey(CVE, on_delete=models.CASCADE)
+    # The composite unique constraint and index below lead with each foreign
+    # key, so the default single-column FK indexes would be redundant.
+    host = models.ForeignKey(Host, on_delete=models.CASCADE, db_index=False)
+    cve = models.ForeignKey(CVE, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["host", "cve"], name="unique_host_cve"),
+        ]
+        indexes = [
+            models.Index(fields=["cve", "host"], name="hostcve_cve_host_idx"),
+        ]
 
     def __str__(self):
         return f"{self.host} - {self.cve}"
+
+class Inventory(models.Model):
+    """A distinct set of installed packages, shared by every host that has it.
+
+    ``digest`` is the SHA-256 of the sorted package identities (install
+    times left out), so hosts built from the same image share one row and
+    its packages are stored and matched once. See :mod:`cveapp.inventories`.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    package_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.package_count} packages)"
+
+class InventoryPackage(models.Model):
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="packages")
+    name = models.CharField(max_length=200)
+    epoch = models.CharField(max_length=10, blank=True)
+    version = models.CharField(max_length=100)
+    release = models.CharField(max_length=100)
+    arch = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventory", "name", "epoch", "version", "release", "arch"],
+                name="unique_inventory_package",
+            ),
+        ]
+        indexes = [
+            # Reverse index: which inventories carry a package, for matching one CVE.
+            models.Index(fields=["name", "arch"], name="inventorypkg_name_arch_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory} - {self.nevra}"
+
+    @property
+    def nevra(self):
+        evr = f"{self.epoch}:{self.version}" if self.epoch else self.version
+        return f"{self.name}-{evr}-{self.release}.{self.arch}" if self.arch else f"{self.name}-{evr}-{self.release}"
+
+class ImportWatermark(models.Model):
+    """Newest ``lastModified`` seen by an importer, so reruns skip old entries."""
+    source = models.CharField(max_length=50, unique=True)
+    last_modified = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_modified:%Y-%m-%d %H:%M:%S}"
+
+
+class CacheGeneration(models.Model):
+    """Single row counting writes, which keys the response cache (see :mod:`cveapp.cache`).
+
+    Bumped in the same transaction as the write, so every process sees a
+    write and its new generation together.
+    """
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"generation {self.value}"
+
+
+class RiskSummary(models.Model):
+    """Precomputed exposure figures, maintained by :mod:`cveapp.summaries`."""
+    cve_count = models.IntegerField(default=0)
+    critical = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    low = models.IntegerField(default=0)
+    none = models.IntegerField(default=0)
+    max_score = models.FloatField(null=True, blank=True)
+    avg_score = models.FloatField(null=True, blank=True)
+    top_cves = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+class TrackSummary(RiskSummary):
+    track = models.OneToOneField(Track, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    host_count = models.IntegerField(default=0)
+    affected_host_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Summary for {self.track}"
+
+class HostSummary(RiskSummary):
+    host = models.OneToOneField(Host, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+
+    def __str__(self):
+        return f"Summary for {self.host}"
+
+class CVETriage(models.Model):
+    """Model-written summary and priority of a CVE, see :mod:`cveapp.triage`.
+
+    ``description_hash`` is the hash of the description that was triaged,
+    so an edited description gets triaged again.
+    """
+    PRIORITY_CHOICES = [
+        (1, "Urgent"),
+        (2, "High"),
+        (3, "Medium"),
+        (4, "Low"),
+    ]
+    cve = models.OneToOneField(CVE, on_delete=models.CASCADE, primary_key=True, related_name="triage")
+    summary = models.TextField()
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES)
+    description_hash = models.CharField(max_length=64)
+    model = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["priority"], name="cvetriage_priority_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.cve} P{self.priority}"
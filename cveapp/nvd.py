@@ -0,0 +1,138 @@
+"""Streaming reader for NVD CVE JSON 2.0 feed files.
+
+Feed files are a single JSON document whose ``vulnerabilities`` array can
+run to hundreds of megabytes. :func:`iter_vulnerabilities` decodes that
+array one element at a time from a bounded buffer instead of loading the
+whole document.
+"""
+import json
+import re
+from datetime import datetime, timezone
+
+_ARRAY_START = re.compile(r'"vulnerabilities"\s*:\s*\[')
+_ARRAY_LOOKBEHIND = 64
+_WHITESPACE = " \t\r\n,"
+
+# Preferred CVSS metrics, newest first.
+METRIC_KEYS = ("cvssMetricV40", "cvssMetricV31", "cvssMetricV30", "cvssMetricV2")
+
+
+class FeedError(ValueError):
+    pass
+
+
+def iter_vulnerabilities(fp, chunk_size=1 << 16):
+    """Yield each element of the feed's ``vulnerabilities`` array."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    eof = False
+
+    while True:
+        match = _ARRAY_START.search(buf)
+        if match:
+            buf = buf[match.end():]
+            break
+        if eof:
+            raise FeedError("no 'vulnerabilities' array in feed")
+        buf = buf[-_ARRAY_LOOKBEHIND:]
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+
+    pos = 0
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buf):
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise FeedError("truncated feed")
+            else:
+                yield item
+                pos = end
+                continue
+        if eof:
+            raise FeedError("truncated feed")
+        # Element incomplete or buffer drained: drop consumed text and read on.
+        buf = buf[pos:]
+        pos = 0
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _metric(metrics):
+    for key in METRIC_KEYS:
+        entries = metrics.get(key) or []
+        if entries:
+            primary = [e for e in entries if e.get("type") == "Primary"]
+            return (primary or entries)[0]
+    return None
+
+
+def _ranges(configurations):
+    for configuration in configurations or []:
+        for node in configuration.get("nodes", []):
+            if node.get("negate"):
+                continue
+            for cpe in node.get("cpeMatch", []):
+                if not cpe.get("vulnerable"):
+                    continue
+                parts = cpe.get("criteria", "").split(":")
+                if len(parts) < 6:
+                    continue
+                product, version = parts[4], parts[5]
+                if version not in ("*", "-", ""):
+                    yield product, version, True, version, True
+                    continue
+                if "versionStartIncluding" in cpe:
+                    start, start_inclusive = cpe["versionStartIncluding"], True
+                else:
+                    start, start_inclusive = cpe.get("versionStartExcluding", ""), False
+                if "versionEndIncluding" in cpe:
+                    end, end_inclusive = cpe["versionEndIncluding"], True
+                else:
+                    end, end_inclusive = cpe.get("versionEndExcluding", ""), False
+                yield product, start, start_inclusive or not start, end, end_inclusive
+
+
+def parse_vulnerability(item):
+    """Flatten one feed element into the fields the importer stores.
+
+    Returns None for rejected entries.
+    """
+    cve = item["cve"]
+    if cve.get("vulnStatus") == "Rejected":
+        return None
+    description = next(
+        (d["value"] for d in cve.get("descriptions", []) if d.get("lang") == "en"),
+        "",
+    )
+    metric = _metric(cve.get("metrics", {}))
+    score = 0.0
+    impact = ""
+    if metric is not None:
+        data = metric.get("cvssData", {})
+        score = float(data.get("baseScore", 0.0))
+        impact = data.get("baseSeverity") or metric.get("baseSeverity", "")
+    return {
+        "cve_id": cve["id"],
+        "description": description,
+        "score": score,
+        "impact": impact,
+        "last_modified": parse_timestamp(cve.get("lastModified")),
+        "ranges": list(dict.fromkeys(_ranges(cve.get("configurations")))),
+    }
@@ -0,0 +1,127 @@
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination.
+
+    Rows are ordered by the view's ``keyset_ordering`` (default ``-score``
+    then ``id``) and each page continues strictly after the last row of the
+    previous one, so fetching page N costs the same as fetching page 1.
+    The last field must be unique to make the ordering total.
+
+    ``?ordering=`` may pick other columns from the view's ``ordering_fields``
+    (public name -> ORM path); ``id`` is appended as the tie-breaker.
+    """
+    ordering = ('-score', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, view)
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        param = request.query_params.get(self.ordering_query_param)
+        if not param:
+            return getattr(view, 'keyset_ordering', self.ordering)
+        allowed = getattr(view, 'ordering_fields', {})
+        ordering = []
+        for term in param.split(','):
+            term = term.strip()
+            name = term.lstrip('-')
+            if name not in allowed:
+                raise ValidationError({self.ordering_query_param: f'Cannot order by {name!r}.'})
+            ordering.append(('-' if term.startswith('-') else '') + allowed[name])
+        if 'id' not in {field.lstrip('-') for field in ordering}:
+            ordering.append('id')
+        return tuple(ordering)
+
+    def after(self, position):
+        # (a, b) > (x, y) expands to a > x OR (a = x AND b > y), with the
+        # comparison flipped for descending fields.
+        conditions = []
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(operator.or_, conditions)
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            # A ``values()`` row that includes the ordering columns.
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [
+            operator.attrgetter(field.lstrip('-').replace('__', '.'))(instance)
+            for field in self.ordering
+        ]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,108 @@
+"""Full-text search over ``CVE.cve_id`` and ``CVE.description``.
+
+On SQLite the text lives in an FTS5 external-content table kept in sync by
+triggers, so bulk imports and upserts are indexed too. The table and
+triggers are (re)installed after every ``migrate`` because SQLite table
+rebuilds done by later schema migrations drop triggers. Other backends fall
+back to ``icontains`` matching.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import CVE
+
+FTS_TABLE = "cveapp_cve_fts"
+# bm25 column weights: an id hit outranks a description hit.
+RANK = f"bm25({FTS_TABLE}, 10.0, 1.0)"
+
+_TRIGGERS = {
+    "cveapp_cve_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS cveapp_cve_fts_ai AFTER INSERT ON cveapp_cve BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, cve_id, description) VALUES (new.id, new.cve_id, new.description);
+        END""",
+    "cveapp_cve_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS cveapp_cve_fts_ad AFTER DELETE ON cveapp_cve BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, cve_id, description)
+            VALUES ('delete', old.id, old.cve_id, old.description);
+        END""",
+    "cveapp_cve_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS cveapp_cve_fts_au AFTER UPDATE ON cveapp_cve BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, cve_id, description)
+            VALUES ('delete', old.id, old.cve_id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, cve_id, description) VALUES (new.id, new.cve_id, new.description);
+        END""",
+}
+
+_TERM = re.compile(r"[\w.-]+")
+
+
+def uses_fts(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def ensure_index(using="default", **kwargs):
+    """Create the FTS table and triggers if missing; rebuild if any were."""
+    if not uses_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)" % ", ".join(["%s"] * (len(_TRIGGERS) + 1)),
+            [FTS_TABLE, *_TRIGGERS],
+        )
+        present = {row[0] for row in cursor.fetchall()}
+        if len(present) == len(_TRIGGERS) + 1:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "cve_id, description, content='cveapp_cve', content_rowid='id')"
+        )
+        for sql in _TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every term must match, as a prefix."""
+    terms = _TERM.findall(text)
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _fallback(text):
+    condition = Q()
+    for term in _TERM.findall(text):
+        condition &= Q(cve_id__icontains=term) | Q(description__icontains=term)
+    return condition
+
+
+def filter_queryset(queryset, text):
+    """Restrict a CVE queryset to rows matching ``text`` (unranked)."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not uses_fts(queryset.db):
+        return queryset.filter(_fallback(text))
+    return queryset.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression],
+    ))
+
+
+def search(text, limit=50, queryset=None):
+    """Return up to ``limit`` CVEs matching ``text``, best match first."""
+    if queryset is None:
+        queryset = CVE.objects.all()
+    expression = match_expression(text)
+    if not expression:
+        return []
+    if not uses_fts(queryset.db):
+        return list(queryset.filter(_fallback(text)).order_by("-score", "id")[:limit])
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY {RANK} LIMIT %s",
+            [expression, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    found = queryset.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
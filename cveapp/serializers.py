@@ -1,19 +1,66 @@
 from rest_framework import serializers
-from .models import Host, CVE, HostCVE
+from .models import Host, CVE, HostCVE, HostSummary
 
-class HostSerializer(serializers.ModelSerializer):
+
+def requested_fields(request):
+    """Return the set of names in the ``fields`` query parameter, or None."""
+    if request is None:
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+
+class FieldProjectionMixin:
+    """Drop fields not listed in ``?fields=``.
+
+    Nested serializers are projected with dotted names, e.g.
+    ``?fields=id,cve.cve_id,cve.score``; naming a nested field without a
+    dotted suffix keeps all of its fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = requested_fields(self.context.get('request'))
+        if requested is None:
+            return fields
+        prefix = self._projection_path()
+        if prefix:
+            requested = {name[len(prefix):] for name in requested if name.startswith(prefix)}
+            if not requested:
+                return fields
+        keep = {name.split('.', 1)[0] for name in requested}
+        return {name: field for name, field in fields.items() if name in keep}
+
+    def _projection_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return ''.join(f'{name}.' for name in reversed(names))
+
+
+class HostSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = Host
         fields = '__all__'
 
-class CVESerializer(serializers.ModelSerializer):
+class CVESerializer(FieldProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = CVE
         fields = '__all__'
 
-class HostCVESerializer(serializers.ModelSerializer):
+class HostCVESerializer(FieldProjectionMixin, serializers.ModelSerializer):
     host = HostSerializer()
     cve = CVESerializer()
     class Meta:
         model = HostCVE
         fields = '__all__'
+
+class HostSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HostSummary
+        fields = '__all__'
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import blast_radius, cache, summaries
+from .models import CVE, AffectedPackage, Host, HostCVE, Track
+
+# Sent by bulk writers (bulk_create/update skip model signals) with the ids
+# of the hosts whose HostCVE rows changed.
+hostcves_changed = Signal()
+
+
+@receiver(post_save, sender=HostCVE)
+@receiver(post_delete, sender=HostCVE)
+def hostcve_changed(sender, instance, **kwargs):
+    summaries.mark_dirty(host_ids=[instance.host_id])
+    blast_radius.mark_dirty(cve_ids=[instance.cve_id])
+
+
+@receiver(hostcves_changed)
+def hostcves_bulk_changed(sender, host_ids, **kwargs):
+    summaries.mark_dirty(host_ids=host_ids)
+    blast_radius.mark_dirty(host_ids=host_ids)
+
+
+@receiver(post_save, sender=AffectedPackage)
+@receiver(post_delete, sender=AffectedPackage)
+def affected_package_changed(sender, instance, **kwargs):
+    # Imported here: matching itself imports hostcves_changed from this module.
+    from . import matching
+
+    matching.mark_dirty(cve_ids=[instance.cve_id])
+
+
+@receiver(pre_save, sender=Host)
+def host_moving(sender, instance, **kwargs):
+    if instance.pk is not None:
+        previous = Host.objects.filter(pk=instance.pk).values_list("track_id", flat=True).first()
+        if previous != instance.track_id:
+            summaries.mark_dirty(track_ids=[previous])
+
+
+@receiver(post_save, sender=Host)
+@receiver(post_delete, sender=Host)
+def host_changed(sender, instance, **kwargs):
+    summaries.mark_dirty(track_ids=[instance.track_id])
+    blast_radius.mark_dirty(host_ids=[instance.pk])
+
+
+@receiver(post_save, sender=CVE)
+@receiver(post_delete, sender=CVE)
+def cve_changed(sender, instance, **kwargs):
+    blast_radius.mark_dirty(cve_ids=[instance.pk])
+
+
+@receiver(post_save, sender=CVE)
+def cve_saved(sender, instance, created, **kwargs):
+    # A new score or id changes the summaries of every host the CVE affects.
+    if not created:
+        summaries.mark_dirty(host_ids=HostCVE.objects.filter(cve=instance).values_list("host_id", flat=True))
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+def track_changed(sender, instance, **kwargs):
+    blast_radius.mark_dirty(tracks=True)
+
+
+# Connected after the summary receivers so that, on commit, summaries are
+# refreshed before cached responses are dropped.
+for model in (Track, Host, CVE, HostCVE):
+    post_save.connect(cache.invalidate, sender=model, dispatch_uid=f"cache-save-{model.__name__}")
+    post_delete.connect(cache.invalidate, sender=model, dispatch_uid=f"cache-delete-{model.__name__}")
+hostcves_changed.connect(cache.invalidate, dispatch_uid="cache-hostcves-changed")
@@ -0,0 +1,126 @@
+"""Maintenance of the per-host and per-track :class:`RiskSummary` tables.
+
+Writes to HostCVE and Host mark the affected hosts and tracks dirty; the
+dirty set is recomputed once when the surrounding transaction commits, so
+a bulk change costs one refresh rather than one per row.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import CVE, SEVERITY_BANDS, Host, HostCVE, HostSummary, Track, TrackSummary, severity_range
+
+TOP_N = 5
+
+SUMMARY_FIELDS = [
+    "cve_count", *(band for band, _ in SEVERITY_BANDS), "max_score", "avg_score", "top_cves", "updated_at",
+]
+
+_pending = threading.local()
+
+
+def _band_filters(prefix):
+    filters = {}
+    for band, _ in SEVERITY_BANDS:
+        lowest, upper = severity_range(band)
+        condition = Q(**{f"{prefix}score__gte": lowest})
+        if upper is not None:
+            condition &= Q(**{f"{prefix}score__lt": upper})
+        filters[band] = condition
+    return filters
+
+
+def _cve_stats(prefix, cve_field):
+    return dict(
+        cve_count=Count(cve_field, distinct=True),
+        max_score=Max(f"{prefix}score"),
+        avg_score=Avg(f"{prefix}score"),
+        **{band: Count(cve_field, distinct=True, filter=condition) for band, condition in _band_filters(prefix).items()},
+    )
+
+
+def refresh_host_summaries(host_ids, chunk_size=500):
+    host_ids = list(host_ids)
+    summaries = []
+    for start in range(0, len(host_ids), chunk_size):
+        summaries.extend(_refresh_host_chunk(host_ids[start:start + chunk_size]))
+    return summaries
+
+
+def _refresh_host_chunk(host_ids):
+    host_ids = list(Host.objects.filter(id__in=host_ids).values_list("id", flat=True))
+    if not host_ids:
+        return []
+    stats = {
+        row.pop("host_id"): row
+        for row in HostCVE.objects.filter(host_id__in=host_ids)
+        .values("host_id")
+        .annotate(**_cve_stats("cve__", "cve_id"))
+    }
+    top = {host_id: [] for host_id in host_ids}
+    ranked = HostCVE.objects.filter(host_id__in=host_ids).annotate(
+        rank=Window(RowNumber(), partition_by=F("host_id"), order_by=[F("cve__score").desc(), F("cve_id").asc()]),
+    ).filter(rank__lte=TOP_N).order_by("host_id", "rank")
+    for host_id, cve_id, score in ranked.values_list("host_id", "cve__cve_id", "cve__score"):
+        top[host_id].append({"cve_id": cve_id, "score": score})
+
+    summaries = [
+        HostSummary(host_id=host_id, top_cves=top[host_id], **stats.get(host_id, {}))
+        for host_id in host_ids
+    ]
+    HostSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=["host"], update_fields=SUMMARY_FIELDS,
+    )
+    return summaries
+
+
+def refresh_track_summaries(track_ids):
+    summaries = []
+    for track_id in Track.objects.filter(id__in=track_ids).values_list("id", flat=True):
+        cves = CVE.objects.filter(id__in=HostCVE.objects.filter(host__track_id=track_id).values("cve_id"))
+        stats = cves.aggregate(**_cve_stats("", "id"))
+        top = cves.order_by("-score", "id").values("cve_id", "score")[:TOP_N]
+        summaries.append(TrackSummary(
+            track_id=track_id,
+            host_count=Host.objects.filter(track_id=track_id).count(),
+            affected_host_count=HostCVE.objects.filter(host__track_id=track_id).values("host_id").distinct().count(),
+            top_cves=list(top),
+            **stats,
+        ))
+    TrackSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["track"],
+        update_fields=SUMMARY_FIELDS + ["host_count", "affected_host_count"],
+    )
+    return summaries
+
+
+def refresh_for_hosts(host_ids, track_ids=()):
+    """Refresh the given hosts and every track they (or ``track_ids``) belong to."""
+    host_ids = set(host_ids)
+    track_ids = set(track_ids)
+    refresh_host_summaries(host_ids)
+    track_ids.update(
+        Host.objects.filter(id__in=host_ids, track__isnull=False).values_list("track_id", flat=True)
+    )
+    refresh_track_summaries(track_ids)
+
+
+def mark_dirty(host_ids=(), track_ids=()):
+    if not hasattr(_pending, "hosts"):
+        _pending.hosts, _pending.tracks = set(), set()
+    _pending.hosts.update(host_ids)
+    _pending.tracks.update(t for t in track_ids if t is not None)
+    transaction.on_commit(flush)
+
+
+def flush():
+    host_ids = getattr(_pending, "hosts", set())
+    track_ids = getattr(_pending, "tracks", set())
+    if not host_ids and not track_ids:
+        return
+    _pending.hosts, _pending.tracks = set(), set()
+    refresh_for_hosts(host_ids, track_ids)
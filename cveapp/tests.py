@@ -1,3 +1,1206 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings, tag
+from rest_framework.test import APIClient
+
+from . import blast_radius, inventories, matching, summaries
+from . import cache as response_cache
+from .evr import rpmvercmp
+from .inventory import host_name_for, parse_line
+from .matching import MatchIndex, match_cves, match_hosts
+from .nvd import iter_vulnerabilities
+from .serializers import CVESerializer, HostCVESerializer, HostSerializer
+from .triage import Budget, BudgetExhausted, FakeBackend, parse_reply, triage
+from .models import (
+    Track, Host, CVE, AffectedPackage, CacheGeneration, CVETriage, HostCVE, HostSummary, Inventory, InventoryPackage,
+    TrackSummary,
+)
+
+
+class APITestCase(TestCase):
+    """Starts every test with an empty response cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+
+class HostCVEByTrackTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.track = Track.objects.create(name="prod")
+        other = Track.objects.create(name="dev")
+        self.web = Host.objects.create(name="web01", os_type="linux", track=self.track)
+        self.db = Host.objects.create(name="db01", os_type="linux", track=self.track)
+        dev = Host.objects.create(name="dev01", os_type="linux", track=other)
+        self.critical = CVE.objects.create(cve_id="CVE-2024-0001", description="a", score=9.8, impact="RCE")
+        self.low = CVE.objects.create(cve_id="CVE-2024-0002", description="b", score=3.1, impact="DoS")
+        HostCVE.objects.create(host=self.web, cve=self.critical)
+        HostCVE.objects.create(host=self.db, cve=self.critical)
+        HostCVE.objects.create(host=self.db, cve=self.low)
+        HostCVE.objects.create(host=dev, cve=self.low)
+
+    def test_host_cve_pairs_are_unique(self):
+        with self.assertRaises(IntegrityError):
+            HostCVE.objects.create(host=self.web, cve=self.critical)
+
+    def test_requires_track_id(self):
+        resp = self.client.get("/api/hostcves/by_track/")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_rejects_non_integer_ids(self):
+        for path, param in (("by_track", "track_id"), ("by_host", "host_id")):
+            for value in ("abc", "None", "-1", "1.5"):
+                resp = self.client.get(f"/api/hostcves/{path}/", {param: value})
+                self.assertEqual(resp.status_code, 400, (path, value))
+                self.assertEqual(resp.json(), {"error": f"{param} must be an integer"})
+
+    def test_groups_hosts_by_cve(self):
+        resp = self.client.get("/api/hostcves/by_track/", {"track_id": self.track.id})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([e["cve"]["cve_id"] for e in data], ["CVE-2024-0001", "CVE-2024-0002"])
+        self.assertEqual([h["name"] for h in data[0]["hosts"]], ["db01", "web01"])
+        self.assertEqual([h["name"] for h in data[1]["hosts"]], ["db01"])
+
+
+class QueryCountTests(APITestCase):
+    """Each endpoint must run a fixed number of queries regardless of row count.
+
+    One of them is the response cache's generation lookup.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        track = Track.objects.create(name="prod")
+        hosts = [
+            Host.objects.create(name=f"host{i}", os_type="linux" if i % 2 else "windows", track=track)
+            for i in range(5)
+        ]
+        cves = [
+            CVE.objects.create(cve_id=f"CVE-2024-{i:04d}", description="d", score=float(i), impact="i")
+            for i in range(5)
+        ]
+        HostCVE.objects.bulk_create(HostCVE(host=h, cve=c) for h in hosts for c in cves)
+        cls.track = track
+        cls.host = hosts[0]
+        cls.cve = cves[0]
+
+    def assertQueries(self, num, url, params=None):
+        with self.assertNumQueries(num):
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+    def test_list_endpoints(self):
+        self.assertQueries(2, "/api/tracks/")
+        self.assertQueries(2, "/api/hosts/")
+        self.assertQueries(2, "/api/cves/")
+        resp = self.assertQueries(2, "/api/hostcves/")
+        self.assertEqual(len(resp.json()["results"]), 25)
+
+    def test_detail_endpoints(self):
+        self.assertQueries(2, f"/api/hosts/{self.host.id}/")
+        self.assertQueries(2, f"/api/cves/{self.cve.id}/")
+        host_cve = HostCVE.objects.first()
+        self.assertQueries(2, f"/api/hostcves/{host_cve.id}/")
+
+    def test_actions(self):
+        resp = self.assertQueries(2, "/api/hostcves/by_host/", {"host_id": self.host.id})
+        self.assertEqual(len(resp.json()), 5)
+        resp = self.assertQueries(2, "/api/hostcves/by_os/", {"os_type": "linux"})
+        self.assertEqual(len(resp.json()), 10)
+        resp = self.assertQueries(2, "/api/hostcves/by_track/", {"track_id": self.track.id})
+        self.assertEqual(len(resp.json()), 5)
+
+
+class PaginationAndProjectionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        host = Host.objects.create(name="web01", os_type="linux")
+        # Repeated scores make sure ties are broken by id across pages.
+        cves = CVE.objects.bulk_create(
+            CVE(cve_id=f"CVE-2024-{i:04d}", description="long text", score=float(i % 3), impact="i")
+            for i in range(7)
+        )
+        HostCVE.objects.bulk_create(HostCVE(host=host, cve=c) for c in cves)
+
+    def walk(self, url, params):
+        seen = []
+        resp = self.client.get(url, params)
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            seen.extend(data["results"])
+            if not data["next"]:
+                return seen
+            resp = self.client.get(data["next"])
+
+    def test_cve_pages_follow_score_then_id(self):
+        rows = self.walk("/api/cves/", {"page_size": 2})
+        expected = list(CVE.objects.order_by("-score", "id").values_list("cve_id", flat=True))
+        self.assertEqual([r["cve_id"] for r in rows], expected)
+
+    def test_hostcve_pages_follow_cve_score(self):
+        rows = self.walk("/api/hostcves/", {"page_size": 3})
+        expected = list(HostCVE.objects.order_by("-cve__score", "id").values_list("id", flat=True))
+        self.assertEqual([r["id"] for r in rows], expected)
+
+    def test_invalid_cursor(self):
+        resp = self.client.get("/api/cves/", {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_fields_projection(self):
+        resp = self.client.get("/api/cves/", {"fields": "cve_id,score"})
+        self.assertEqual(set(resp.json()["results"][0]), {"cve_id", "score"})
+        resp = self.client.get("/api/hostcves/", {"fields": "id,cve.cve_id"})
+        row = resp.json()["results"][0]
+        self.assertEqual(set(row), {"id", "cve"})
+        self.assertEqual(set(row["cve"]), {"cve_id"})
+
+
+class InventoryIngestTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def ingest(self, *args):
+        call_command("ingest_rpm", *args, stdout=StringIO())
+
+    def test_parse_line(self):
+        package = parse_line("bash-4.4.20-4.el8_6.x86_64|bash|4.4.20|4.el8_6|x86_64|Thu 12 Sep 2024 04:45:30 PM +08 ")
+        self.assertEqual(package[:5], ("bash", "", "4.4.20", "4.el8_6", "x86_64"))
+        self.assertEqual(package.installed_at.isoformat(), "2024-09-12T16:45:30+08:00")
+        package = parse_line("perl-IO|1:1.38|452.el8|(none)|1719999999")
+        self.assertEqual(package[:5], ("perl-IO", "1", "1.38", "452.el8", ""))
+        self.assertIsNone(parse_line("rpm -qa --qf '%{NAME}|%{VERSION}' >packages.list"))
+        self.assertEqual(host_name_for("/tmp/web01.example.com.list.gz"), "web01.example.com")
+
+    def test_ingest_pack_txt(self):
+        self.ingest(str(Path(settings.BASE_DIR) / "pack.txt"), "--host", "web01", "--track", "prod")
+        host = Host.objects.get(name="web01")
+        self.assertEqual(host.track.name, "prod")
+        self.assertEqual(host.inventory.packages.count(), 1105)
+        self.assertEqual(host.inventory.package_count, 1105)
+
+    def write(self, name, *lines):
+        path = os.path.join(self.tmp.name, name)
+        with gzip.open(path, "wt") as f:
+            f.writelines(f"{line}\n" for line in lines)
+        return path
+
+    def test_reassigning_invalidates_cached_responses(self):
+        cache.clear()
+        host = Host.objects.create(name="web01", os_type="linux")
+        client = APIClient()
+        self.assertIsNone(client.get(f"/api/hosts/{host.id}/").json()["inventory"])
+        self.ingest(self.write("web01.list.gz", "bash|4.4.20|4.el8|x86_64|1700000000"))
+        host.refresh_from_db()
+        self.assertEqual(client.get(f"/api/hosts/{host.id}/").json()["inventory"], host.inventory_id)
+
+    def test_identical_inventories_are_shared(self):
+        # Same packages, different install times: one stored inventory.
+        self.ingest(
+            self.write("db01.list.gz", "openssl|1.1.1k|7.el8|x86_64|1700000000", "bash|4.4.20|4.el8|x86_64|1700000000"),
+            self.write("db02.list.gz", "bash|4.4.20|4.el8|x86_64|1700005000", "openssl|1.1.1k|7.el8|x86_64|1700005000"),
+        )
+        shared = Inventory.objects.get()
+        self.assertEqual(set(Host.objects.values_list("inventory", flat=True)), {shared.id})
+        self.assertEqual(InventoryPackage.objects.count(), 2)
+
+        out = StringIO()
+        call_command("ingest_rpm", self.write("db01.list.gz", "openssl|1.1.1k|12.el8|x86_64|1710000000",
+                                              "bash|4.4.20|4.el8|x86_64|1700000000"), stdout=out)
+        self.assertIn("1 changed, 0 unchanged; 1 new and 0 unused inventory(ies)", out.getvalue())
+        host = Host.objects.get(name="db01")
+        self.assertEqual(
+            sorted(host.inventory.packages.values_list("name", "release")),
+            [("bash", "4.el8"), ("openssl", "12.el8")],
+        )
+        self.assertEqual(Host.objects.get(name="db02").inventory, shared)
+
+        out = StringIO()
+        call_command("ingest_rpm", self.write("db02.list.gz", "openssl|1.1.1k|12.el8|x86_64|1710000000",
+                                              "bash|4.4.20|4.el8|x86_64|1700000000"), stdout=out)
+        self.assertIn("1 changed, 0 unchanged; 0 new and 1 unused inventory(ies)", out.getvalue())
+        self.assertEqual(list(Inventory.objects.all()), [host.inventory])
+
+
+class RpmVerCmpTests(TestCase):
+    CASES = [
+        ("1.0", "1.0", 0),
+        ("1.0", "2.0", -1),
+        ("2.0.1", "2.0", 1),
+        ("2.0.1a", "2.0.1", 1),
+        ("5.5p10", "5.5p1", 1),
+        ("10xyz", "10.1xyz", -1),
+        ("xyz10", "xyz10.1", -1),
+        ("1.0010", "1.9", 1),
+        ("1.05", "1.5", 0),
+        ("1b.fc17", "1.fc17", -1),
+        ("6.0.rc1", "6.0", 1),
+        ("1.0~rc1", "1.0", -1),
+        ("1.0~rc1", "1.0~rc2", -1),
+        ("1.0~rc1~git123", "1.0~rc1", -1),
+        ("1.0^", "1.0", 1),
+        ("1.0^git1", "1.01", -1),
+        ("1.0^20160101", "1.0.1", -1),
+        ("1.0~rc1^git1", "1.0~rc1", 1),
+        ("1.0^git1~pre", "1.0^git1", -1),
+        ("1_0", "1.0", 0),
+        ("a+", "a_", 0),
+    ]
+
+    def test_cases(self):
+        for a, b, expected in self.CASES:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(rpmvercmp(a, b), expected)
+                self.assertEqual(rpmvercmp(b, a), -expected)
+
+
+def give_packages(host, *keys):
+    inventories.assign(host, inventories.store(keys)[0])
+
+
+class MatchingTests(TestCase):
+    def test_index_bounds(self):
+        index = MatchIndex([
+            (1, "openssl", "", "", True, "1.1.1k-7.el8", False),
+            (2, "openssl", "", "1.1.1", True, "1.1.1k", True),
+            (3, "openssl", "x86_64", "1:1.0", True, "", False),
+            (4, "bash", "", "4.4.20-4.el8", False, "", False),
+        ])
+        self.assertEqual(index.match("openssl", "", "1.1.1k", "6.el8", "x86_64"), {1, 2})
+        self.assertEqual(index.match("openssl", "", "1.1.1k", "7.el8", "x86_64"), {2})
+        self.assertEqual(index.match("openssl", "", "1.1.1l", "1.el8", "x86_64"), set())
+        self.assertEqual(index.match("openssl", "1", "1.1.1l", "1.el8", "x86_64"), {3})
+        self.assertEqual(index.match("openssl", "1", "1.1.1l", "1.el8", "i686"), set())
+        self.assertEqual(index.match("openssl", "", "1.0.2", "1.el8", "x86_64"), {1})
+        self.assertEqual(index.match("bash", "", "4.4.20", "4.el8", "x86_64"), set())
+        self.assertEqual(index.match("bash", "", "4.4.20", "5.el8", "x86_64"), {4})
+        self.assertEqual(index.match("zsh", "", "5.5", "1.el8", "x86_64"), set())
+
+    def test_match_hosts(self):
+        host = Host.objects.create(name="web01", os_type="linux")
+        fixed = CVE.objects.create(cve_id="CVE-2021-3711", description="d", score=9.8, impact="i")
+        other = CVE.objects.create(cve_id="CVE-2022-0001", description="d", score=5.0, impact="i")
+        AffectedPackage.objects.create(cve=fixed, name="openssl", end_evr="1:1.1.1k-5.el8")
+        AffectedPackage.objects.create(cve=other, name="bash", end_evr="4.4.20")
+        give_packages(host, ("openssl", "1", "1.1.1k", "4.el8", "x86_64"), ("bash", "", "4.4.20", "4.el8", "x86_64"))
+        stale = CVE.objects.create(cve_id="CVE-2020-0001", description="d", score=1.0, impact="i")
+        HostCVE.objects.create(host=host, cve=stale)
+
+        self.assertEqual(match_hosts(), (1, 0))
+        self.assertEqual(match_hosts(), (0, 0))
+        self.assertEqual(match_hosts(prune=True), (0, 1))
+        self.assertEqual(list(HostCVE.objects.values_list("cve__cve_id", flat=True)), ["CVE-2021-3711"])
+
+    def test_shared_inventory_is_matched_once(self):
+        cve = CVE.objects.create(cve_id="CVE-2021-3711", description="d", score=9.8, impact="i")
+        AffectedPackage.objects.create(cve=cve, name="openssl", end_evr="1:1.1.1k-5.el8")
+        for i in range(3):
+            give_packages(Host.objects.create(name=f"web{i}", os_type="linux"), ("openssl", "1", "1.1.1k", "4.el8", "x86_64"))
+        index = MatchIndex.from_db()
+        calls = []
+        match_packages = index.match_packages
+        index.match_packages = lambda packages: calls.append(packages) or match_packages(packages)
+        self.assertEqual(match_hosts(index=index, chunk_size=2), (3, 0))
+        self.assertEqual(len(calls), 1)
+
+
+class IncrementalMatchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.old = Host.objects.create(name="web01", os_type="linux")
+            self.new = Host.objects.create(name="web02", os_type="linux")
+            self.win = Host.objects.create(name="win01", os_type="windows")
+            for host, release in ((self.old, "4.el8"), (self.new, "9.el8")):
+                give_packages(
+                    host, ("openssl", "", "1.1.1k", release, "x86_64"), ("bash", "", "4.4.20", "4.el8", "x86_64"),
+                )
+            self.cve = CVE.objects.create(cve_id="CVE-2024-0001", description="d", score=9.8, impact="i")
+            HostCVE.objects.create(host=self.win, cve=self.cve)
+
+    def links(self):
+        return set(HostCVE.objects.filter(cve=self.cve).values_list("host__name", flat=True))
+
+    def test_match_and_prune_one_cve(self):
+        AffectedPackage.objects.create(cve=self.cve, name="openssl", end_evr="1.1.1k-5.el8")
+        # Ranges, inventories carrying the package, their hosts, current links,
+        # inventories of hosts with stale links, insert, cache generation and
+        # savepoints: independent of fleet size.
+        with self.assertNumQueries(9):
+            self.assertEqual(match_cves([self.cve.id]), (1, 0))
+        self.assertEqual(self.links(), {"web01", "win01"})
+        self.assertEqual(match_cves([self.cve.id]), (0, 0))
+
+        AffectedPackage.objects.filter(cve=self.cve).update(end_evr="1.1.1k-10.el8")
+        self.assertEqual(match_cves([self.cve.id]), (1, 0))
+        AffectedPackage.objects.filter(cve=self.cve).update(name="bash", end_evr="4.4.19")
+        self.assertEqual(match_cves([self.cve.id]), (0, 2))
+        # The Windows host has no inventory, so its hand-made link stays.
+        self.assertEqual(self.links(), {"win01"})
+
+    def test_affected_package_changes_rematch_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            package = AffectedPackage.objects.create(cve=self.cve, name="openssl", end_evr="1.1.1k-5.el8")
+        self.assertEqual(self.links(), {"web01", "win01"})
+        self.assertEqual(HostSummary.objects.get(host=self.old).cve_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            package.delete()
+        self.assertEqual(self.links(), {"win01"})
+
+    def test_paused_queues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True), matching.paused():
+            AffectedPackage.objects.create(cve=self.cve, name="openssl", end_evr="1.1.1k-5.el8")
+        self.assertEqual(self.links(), {"win01"})
+
+    def test_reimport_matches_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "feed.json")
+            with open(path, "w") as f:
+                json.dump({"vulnerabilities": [nvd_item("CVE-2024-0002", "2024-01-01T00:00:00.000")]}, f)
+            call_command("import_nvd", path, stdout=StringIO())
+            for args, calls in [((), 1), (("--no-match",), 0)]:
+                with mock.patch("cveapp.matching.match_cves", wraps=match_cves) as queued, \
+                        mock.patch("cveapp.management.commands.import_nvd.match_cves", wraps=match_cves) as direct, \
+                        self.captureOnCommitCallbacks(execute=True):
+                    call_command("import_nvd", path, "--full", *args, stdout=StringIO())
+                self.assertEqual(queued.call_count + direct.call_count, calls, args)
+
+    def test_import_links_affected_hosts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "feed.json")
+            with open(path, "w") as f:
+                json.dump({"vulnerabilities": [nvd_item("CVE-2024-0002", "2024-01-01T00:00:00.000")]}, f)
+            out = StringIO()
+            call_command("import_nvd", path, stdout=out)
+        self.assertIn("created 2 and deleted 0 host CVE link(s)", out.getvalue())
+        self.assertEqual(
+            set(HostCVE.objects.filter(cve__cve_id="CVE-2024-0002").values_list("host__name", flat=True)),
+            {"web01", "web02"},
+        )
+
+
+def nvd_item(cve_id, modified, score=7.5, description="desc"):
+    return {"cve": {
+        "id": cve_id,
+        "lastModified": modified,
+        "vulnStatus": "Analyzed",
+        "descriptions": [{"lang": "es", "value": "otro"}, {"lang": "en", "value": description}],
+        "metrics": {"cvssMetricV31": [
+            {"type": "Secondary", "cvssData": {"baseScore": 1.0, "baseSeverity": "LOW"}},
+            {"type": "Primary", "cvssData": {"baseScore": score, "baseSeverity": "HIGH"}},
+        ]},
+        "configurations": [{"nodes": [{"operator": "OR", "negate": False, "cpeMatch": [
+            {"vulnerable": True, "criteria": "cpe:2.3:a:openssl:openssl:*:*:*:*:*:*:*:*",
+             "versionStartIncluding": "1.1.1", "versionEndExcluding": "1.1.1l"},
+            {"vulnerable": False, "criteria": "cpe:2.3:o:redhat:enterprise_linux:8.0:*:*:*:*:*:*:*"},
+        ]}]}],
+    }}
+
+
+class NVDImportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_feed(self, name, items):
+        path = os.path.join(self.tmp.name, name)
+        with gzip.open(path, "wt") as f:
+            json.dump({"resultsPerPage": len(items), "format": "NVD_CVE", "version": "2.0", "vulnerabilities": items}, f)
+        return path
+
+    def test_stream_across_chunk_boundaries(self):
+        items = [nvd_item(f"CVE-2024-{i:04d}", "2024-01-01T00:00:00.000") for i in range(20)]
+        path = self.write_feed("feed.json.gz", items)
+        with gzip.open(path, "rt") as f:
+            streamed = list(iter_vulnerabilities(f, chunk_size=7))
+        self.assertEqual(streamed, items)
+
+    def test_import_and_watermark(self):
+        path = self.write_feed("feed.json.gz", [
+            nvd_item("CVE-2024-0001", "2024-01-01T00:00:00.000"),
+            nvd_item("CVE-2024-0002", "2024-02-01T00:00:00.000", score=9.8),
+        ])
+        call_command("import_nvd", path, stdout=StringIO())
+        cve = CVE.objects.get(cve_id="CVE-2024-0002")
+        self.assertEqual((cve.score, cve.impact, cve.description), (9.8, "HIGH", "desc"))
+        ranges = list(cve.affected_packages.values_list("name", "start_evr", "start_inclusive", "end_evr", "end_inclusive"))
+        self.assertEqual(ranges, [("openssl", "1.1.1", True, "1.1.1l", False)])
+
+        path = self.write_feed("update.json.gz", [
+            nvd_item("CVE-2024-0001", "2024-01-01T00:00:00.000", description="stale"),
+            nvd_item("CVE-2024-0002", "2024-03-01T00:00:00.000", description="updated"),
+        ])
+        out = StringIO()
+        call_command("import_nvd", path, stdout=out)
+        self.assertIn("Imported 1 CVE(s), skipped 1 unchanged", out.getvalue())
+        self.assertEqual(CVE.objects.get(cve_id="CVE-2024-0001").description, "desc")
+        self.assertEqual(CVE.objects.get(cve_id="CVE-2024-0002").description, "updated")
+        self.assertEqual(AffectedPackage.objects.count(), 2)
+
+    def test_rescoring_refreshes_summaries(self):
+        host = Host.objects.create(name="web01", os_type="linux")
+        give_packages(host, ("openssl", "", "1.1.1k", "1.el8", "x86_64"))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_nvd", self.write_feed("a.json.gz", [
+                nvd_item("CVE-2024-0001", "2024-01-01T00:00:00.000", score=7.5),
+            ]), stdout=StringIO())
+        self.assertEqual(HostSummary.objects.get(host=host).max_score, 7.5)
+        # Same link, new score: matching changes nothing.
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_nvd", self.write_feed("b.json.gz", [
+                nvd_item("CVE-2024-0001", "2024-02-01T00:00:00.000", score=9.8),
+            ]), stdout=StringIO())
+        summary = HostSummary.objects.get(host=host)
+        self.assertEqual((summary.max_score, summary.critical, summary.high), (9.8, 1, 0))
+
+
+class RiskSummaryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.track = Track.objects.create(name="prod")
+        self.web = Host.objects.create(name="web01", os_type="linux", track=self.track)
+        self.db = Host.objects.create(name="db01", os_type="linux", track=self.track)
+        Host.objects.create(name="idle01", os_type="linux", track=self.track)
+        self.cves = [
+            CVE.objects.create(cve_id=f"CVE-2024-{i:04d}", description="d", score=score, impact="i")
+            for i, score in enumerate([9.8, 7.5, 5.0, 2.0, 0.0])
+        ]
+
+    def test_maintained_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for cve in self.cves:
+                HostCVE.objects.create(host=self.web, cve=cve)
+            HostCVE.objects.create(host=self.db, cve=self.cves[0])
+        summary = TrackSummary.objects.get(track=self.track)
+        self.assertEqual(
+            (summary.cve_count, summary.critical, summary.high, summary.medium, summary.low, summary.none),
+            (5, 1, 1, 1, 1, 1),
+        )
+        self.assertEqual((summary.host_count, summary.affected_host_count), (3, 2))
+        self.assertEqual(summary.max_score, 9.8)
+        self.assertAlmostEqual(summary.avg_score, 24.3 / 5)
+        self.assertEqual(summary.top_cves[0], {"cve_id": "CVE-2024-0000", "score": 9.8})
+        self.assertEqual(HostSummary.objects.get(host=self.db).cve_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            HostCVE.objects.filter(cve=self.cves[0]).delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.cve_count, summary.critical, summary.affected_host_count), (4, 0, 1))
+        self.assertEqual(HostSummary.objects.get(host=self.db).cve_count, 0)
+
+    def test_rescoring_refreshes_summaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            HostCVE.objects.create(host=self.web, cve=self.cves[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cves[1].score = 9.9
+            self.cves[1].save()
+        summary = HostSummary.objects.get(host=self.web)
+        self.assertEqual((summary.max_score, summary.critical, summary.high), (9.9, 1, 0))
+        self.assertEqual(TrackSummary.objects.get(track=self.track).top_cves[0]["score"], 9.9)
+
+    def test_summary_endpoint_reads_summary_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            HostCVE.objects.create(host=self.web, cve=self.cves[1])
+        with self.assertNumQueries(3):
+            resp = self.client.get(f"/api/tracks/{self.track.id}/summary/")
+        self.assertEqual(resp.json()["high"], 1)
+        with self.assertNumQueries(3):
+            resp = self.client.get(f"/api/hosts/{self.web.id}/summary/")
+        self.assertEqual(resp.json()["top_cves"], [{"cve_id": "CVE-2024-0001", "score": 7.5}])
+
+
+class FilterTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.prod = Track.objects.create(name="prod")
+        web = Host.objects.create(name="web01", os_type="linux", track=cls.prod)
+        win = Host.objects.create(name="win01", os_type="windows")
+        cves = [
+            CVE.objects.create(cve_id="CVE-2023-1000", description="d", score=9.8, impact="RCE"),
+            CVE.objects.create(cve_id="CVE-2024-2000", description="d", score=7.0, impact="DoS"),
+            CVE.objects.create(cve_id="CVE-2024-3000", description="d", score=4.2, impact="DoS"),
+        ]
+        HostCVE.objects.create(host=web, cve=cves[0])
+        HostCVE.objects.create(host=web, cve=cves[1])
+        HostCVE.objects.create(host=win, cve=cves[2])
+
+    def cve_ids(self, url, params):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return [row["cve_id"] if "cve_id" in row else row["cve"]["cve_id"] for row in resp.json()["results"]]
+
+    def test_cve_filters(self):
+        self.assertEqual(self.cve_ids("/api/cves/", {"score_min": 7}), ["CVE-2023-1000", "CVE-2024-2000"])
+        self.assertEqual(self.cve_ids("/api/cves/", {"score_max": 7, "impact": "DoS"}), ["CVE-2024-2000", "CVE-2024-3000"])
+        self.assertEqual(self.cve_ids("/api/cves/", {"severity": "critical,medium"}), ["CVE-2023-1000", "CVE-2024-3000"])
+        self.assertEqual(self.cve_ids("/api/cves/", {"cve_id": "cve-2024"}), ["CVE-2024-2000", "CVE-2024-3000"])
+
+    def test_hostcve_filters(self):
+        self.assertEqual(self.cve_ids("/api/hostcves/", {"track": self.prod.id}), ["CVE-2023-1000", "CVE-2024-2000"])
+        self.assertEqual(self.cve_ids("/api/hostcves/", {"os_type": "windows"}), ["CVE-2024-3000"])
+        self.assertEqual(self.cve_ids("/api/hostcves/", {"track": self.prod.id, "severity": "high"}), ["CVE-2024-2000"])
+
+    def test_ordering(self):
+        self.assertEqual(
+            self.cve_ids("/api/cves/", {"ordering": "cve_id", "page_size": 1}),
+            ["CVE-2023-1000"],
+        )
+        resp = self.client.get("/api/cves/", {"ordering": "-cve_id", "page_size": 2})
+        rows = self.cve_ids(resp.json()["next"], {})
+        self.assertEqual(rows, ["CVE-2023-1000"])
+        self.assertEqual(self.client.get("/api/cves/", {"ordering": "description"}).status_code, 400)
+
+    def test_invalid_values(self):
+        self.assertEqual(self.client.get("/api/cves/", {"score_min": "high"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/cves/", {"severity": "urgent"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/hosts/", {"track": "x"}).status_code, 400)
+
+    def test_host_filters_and_actions(self):
+        resp = self.client.get("/api/hosts/", {"track": self.prod.id})
+        self.assertEqual([h["name"] for h in resp.json()], ["web01"])
+        resp = self.client.get("/api/hostcves/by_track/", {"track_id": self.prod.id, "score_min": 9})
+        self.assertEqual([e["cve"]["cve_id"] for e in resp.json()], ["CVE-2023-1000"])
+
+
+class FullTextSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CVE.objects.create(cve_id="CVE-2021-3711", description="SM2 decryption buffer overflow in OpenSSL", score=9.8, impact="RCE")
+        CVE.objects.create(cve_id="CVE-2022-0778", description="Infinite loop in BN_mod_sqrt() reachable when parsing certificates", score=7.5, impact="DoS")
+        CVE.objects.bulk_create([
+            CVE(cve_id="CVE-2014-0160", description="Heartbleed: OpenSSL TLS heartbeat read overrun", score=7.5, impact="Info"),
+        ])
+
+    def search(self, q):
+        resp = self.client.get("/api/cves/search/", {"q": q})
+        self.assertEqual(resp.status_code, 200)
+        return [row["cve_id"] for row in resp.json()]
+
+    def test_search_ranks_and_matches_prefixes(self):
+        self.assertEqual(sorted(self.search("openssl")), ["CVE-2014-0160", "CVE-2021-3711"])
+        self.assertEqual(self.search("buffer overfl"), ["CVE-2021-3711"])
+        self.assertEqual(self.search("CVE-2022-0778"), ["CVE-2022-0778"])
+        self.assertEqual(self.search('heart"bleed'), [])
+        self.assertEqual(self.client.get("/api/cves/search/").status_code, 400)
+
+    def test_limit(self):
+        resp = self.client.get("/api/cves/search/", {"q": "openssl", "limit": 1})
+        self.assertEqual(len(resp.json()), 1)
+        for limit in ("0", "-1", "x"):
+            resp = self.client.get("/api/cves/search/", {"q": "openssl", "limit": limit})
+            self.assertEqual(resp.status_code, 400, limit)
+
+    def test_index_follows_writes(self):
+        cve = CVE.objects.get(cve_id="CVE-2022-0778")
+        cve.description = "Regression in certificate parsing"
+        cve.save()
+        self.assertEqual(self.search("infinite"), [])
+        self.assertEqual(self.search("regression"), ["CVE-2022-0778"])
+        cve.delete()
+        self.assertEqual(self.search("regression"), [])
+
+    def test_admin_search_uses_index(self):
+        from django.contrib.auth.models import User
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+        resp = self.client.get("/admin/cveapp/cve/", {"q": "heartbleed"})
+        self.assertContains(resp, "CVE-2014-0160")
+        self.assertNotContains(resp, "CVE-2021-3711")
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cve = CVE.objects.create(cve_id="CVE-2024-0001", description="d", score=5.0, impact="i")
+
+    def test_hit_and_not_modified(self):
+        before = response_cache.stats()
+        first = self.client.get("/api/cves/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        # Only the generation is read.
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/cves/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/cves/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+        after = response_cache.stats()
+        self.assertEqual(
+            [after[name] - before[name] for name in ("hits", "misses", "not_modified")],
+            [1, 1, 1],
+        )
+
+    def test_writes_invalidate(self):
+        etag = self.client.get("/api/cves/")["ETag"]
+        self.cve.score = 9.9
+        self.cve.save()
+        resp = self.client.get("/api/cves/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["results"][0]["score"], 9.9)
+
+        host = Host.objects.create(name="web01", os_type="linux")
+        self.client.get("/api/hostcves/")
+        HostCVE.objects.bulk_create([HostCVE(host=host, cve=self.cve)])
+        from .signals import hostcves_changed
+        hostcves_changed.send(sender=HostCVE, host_ids=[host.id])
+        self.assertEqual(len(self.client.get("/api/hostcves/").json()["results"]), 1)
+
+    def test_writes_from_another_process_invalidate(self):
+        etag = self.client.get("/api/cves/")["ETag"]
+        # A management command or another worker: same database, its own cache.
+        other = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "other-process"}
+        with self.settings(CACHES={**settings.CACHES, "other": other}, CVEAPP_CACHE="other"):
+            CVE.objects.create(cve_id="CVE-2024-0002", description="d", score=9.0, impact="i")
+        resp = self.client.get("/api/cves/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+    def test_bumps_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            host = Host.objects.create(name="web01", os_type="linux")
+        cves = CVE.objects.bulk_create(
+            CVE(cve_id=f"CVE-2024-1{i:03}", description="d", score=5.0, impact="i") for i in range(20)
+        )
+        before = response_cache.generation()
+        # Savepoint, 20 inserts, one generation bump, release.
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(23), transaction.atomic():
+            for cve in cves:
+                HostCVE.objects.create(host=host, cve=cve)
+        self.assertEqual(response_cache.generation(), before + 1)
+
+        # A rolled-back bump does not stand in for the next one.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            HostCVE.objects.create(host=host, cve=self.cve)
+            HostCVE.objects.create(host=host, cve=self.cve)
+        self.assertEqual(response_cache.generation(), before + 1)
+        HostCVE.objects.create(host=host, cve=self.cve)
+        self.assertEqual(response_cache.generation(), before + 2)
+
+    def test_browsable_api_is_not_cached(self):
+        self.client.get("/api/cves/", HTTP_ACCEPT="text/html")
+        resp = self.client.get("/api/cves/", HTTP_ACCEPT="text/html")
+        self.assertNotIn("X-Cache", resp)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        track = Track.objects.create(name="prod")
+        web = Host.objects.create(name="web01", os_type="linux", track=track)
+        win = Host.objects.create(name="win01", os_type="windows")
+        critical = CVE.objects.create(cve_id="CVE-2024-0001", description="a", score=9.8, impact="RCE")
+        low = CVE.objects.create(cve_id="CVE-2024-0002", description="b", score=3.1, impact="DoS")
+        HostCVE.objects.create(host=web, cve=critical)
+        HostCVE.objects.create(host=win, cve=low)
+
+    def test_ndjson(self):
+        resp = self.client.get("/api/hostcves/export/")
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(resp.streaming_content).splitlines()]
+        self.assertEqual(rows, [
+            {"host": "web01", "os_type": "linux", "track": "prod", "cve_id": "CVE-2024-0001",
+             "score": 9.8, "severity": "critical", "impact": "RCE"},
+            {"host": "win01", "os_type": "windows", "track": None, "cve_id": "CVE-2024-0002",
+             "score": 3.1, "severity": "low", "impact": "DoS"},
+        ])
+
+    def test_csv_gzip_and_filters(self):
+        resp = self.client.get("/api/hostcves/export/", {"fmt": "csv", "gzip": "1", "os_type": "windows"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        self.assertIn('filename="hostcves.csv.gz"', resp["Content-Disposition"])
+        text = gzip.decompress(b"".join(resp.streaming_content)).decode()
+        self.assertEqual(list(csv.reader(StringIO(text))), [
+            ["host", "os_type", "track", "cve_id", "score", "severity", "impact"],
+            ["win01", "windows", "", "CVE-2024-0002", "3.1", "low", "DoS"],
+        ])
+
+    def test_invalid_format(self):
+        self.assertEqual(self.client.get("/api/hostcves/export/", {"fmt": "xml"}).status_code, 400)
+
+
+@tag("slow")
+@unittest.skipUnless(os.environ.get("CVEAPP_SLOW_TESTS"), "set CVEAPP_SLOW_TESTS=1 to run")
+class ExportMemoryTests(APITestCase):
+    HOSTS, CVES = 5000, 200
+
+    def test_million_rows_in_flat_memory(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s) "
+                "INSERT INTO cveapp_host (name, os_type) SELECT 'host' || i, 'linux' FROM n",
+                [self.HOSTS],
+            )
+            cursor.execute(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s) "
+                "INSERT INTO cveapp_cve (cve_id, description, score, impact) "
+                "SELECT 'CVE-2024-' || i, 'synthetic', (i %% 100) / 10.0, 'HIGH' FROM n",
+                [self.CVES],
+            )
+            cursor.execute(
+                "INSERT INTO cveapp_hostcve (host_id, cve_id) SELECT h.id, c.id FROM cveapp_host h, cveapp_cve c"
+            )
+        resp = self.client.get("/api/hostcves/export/", {"fmt": "csv"})
+        tracemalloc.start()
+        try:
+            lines = sum(chunk.count(b"\n") for chunk in resp.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, self.HOSTS * self.CVES + 1)
+        self.assertLess(peak, 16 * 1024 * 1024)
+
+
+class BulkWriteTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track = Track.objects.create(name="prod")
+            self.web = Host.objects.create(name="web01", os_type="linux", track=self.track)
+            self.db = Host.objects.create(name="db01", os_type="linux")
+            self.cve = CVE.objects.create(cve_id="CVE-2024-0001", description="a", score=9.8, impact="RCE")
+            self.other = CVE.objects.create(cve_id="CVE-2024-0002", description="b", score=3.1, impact="DoS")
+
+    def test_create_and_delete_host_cves(self):
+        HostCVE.objects.create(host=self.web, cve=self.cve)
+        payload = [
+            {"host": self.web.id, "cve": self.cve.id},
+            {"host_name": "web01", "cve_id": "CVE-2024-0002"},
+            {"host": self.db.id, "cve_id": "CVE-2024-0001"},
+            {"host": self.db.id, "cve_id": "CVE-2024-0001"},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post("/api/hostcves/bulk/", payload, format="json")
+        self.assertEqual(resp.json(), {"created": 2, "existing": 1})
+        self.assertEqual(HostCVE.objects.count(), 3)
+        self.assertEqual(HostSummary.objects.get(host=self.db).cve_count, 1)
+
+        resp = self.client.delete("/api/hostcves/bulk/", [{"host": self.web.id, "cve": self.cve.id}], format="json")
+        self.assertEqual(resp.json(), {"deleted": 1})
+        self.assertFalse(HostCVE.objects.filter(host=self.web, cve=self.cve).exists())
+
+    def test_rejects_whole_batch(self):
+        Host.objects.create(name="web01", os_type="windows")
+        payload = [
+            {"host": self.db.id, "cve": self.cve.id},
+            {"host_name": "web01", "cve_id": "CVE-2024-0001"},
+            {"host": self.db.id, "cve_id": "CVE-1999-0001"},
+            {"host": "x", "cve": self.cve.id},
+            {"cve": self.cve.id},
+        ]
+        resp = self.client.post("/api/hostcves/bulk/", payload, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["errors"], {
+            "1": "host 'web01' is ambiguous.",
+            "2": "CVE 'CVE-1999-0001' does not exist.",
+            "3": "host must be an integer.",
+            "4": "host or host_name required.",
+        })
+        self.assertEqual(HostCVE.objects.count(), 0)
+        self.assertEqual(self.client.post("/api/hostcves/bulk/", {"items": 1}, format="json").status_code, 400)
+
+    def test_upsert_and_delete_hosts(self):
+        payload = [
+            {"name": "web01", "track": None},
+            {"name": "db01", "track_name": "prod"},
+            {"name": "new01", "os_type": "windows", "track": self.track.id},
+            {"name": "new01", "os_type": "linux"},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post("/api/hosts/bulk/", payload, format="json")
+        self.assertEqual(resp.json(), {"created": 1, "updated": 2, "unchanged": 0})
+        self.assertEqual(
+            dict(Host.objects.values_list("name", "track_id")),
+            {"web01": None, "db01": self.track.id, "new01": self.track.id},
+        )
+        self.assertEqual(Host.objects.get(name="new01").os_type, "linux")
+        self.assertEqual(TrackSummary.objects.get(track=self.track).host_count, 2)
+
+        resp = self.client.post("/api/hosts/bulk/", [{"name": "other"}, {"name": "x", "os_type": "bsd"}], format="json")
+        self.assertEqual(resp.json()["errors"], {
+            "0": "os_type required for new hosts.",
+            "1": "os_type must be one of windows, linux.",
+        })
+
+        resp = self.client.delete("/api/hosts/bulk/", [{"id": self.web.id}, {"name": "new01"}], format="json")
+        self.assertEqual(resp.json(), {"deleted": 2})
+        self.assertEqual(list(Host.objects.values_list("name", flat=True)), ["db01"])
+
+    def test_large_deletes_are_set_based(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hosts = Host.objects.bulk_create(
+                Host(name=f"host{i:03}", os_type="linux", track=self.track) for i in range(500)
+            )
+            cves = CVE.objects.bulk_create(
+                CVE(cve_id=f"CVE-2024-1{i:03}", description="d", score=7.5, impact="i") for i in range(20)
+            )
+            HostCVE.objects.bulk_create(HostCVE(host=host, cve=cve) for host in hosts for cve in cves)
+            summaries.refresh_for_hosts([host.id for host in hosts])
+        payload = [{"host": host.id, "cve": cve.id} for host in hosts for cve in cves[:10]]
+        # Resolving, the links of the hosts, one delete, the cache generation
+        # and the savepoint: no query per deleted row.
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(7):
+            resp = self.client.delete("/api/hostcves/bulk/", payload, format="json")
+        self.assertEqual(resp.json(), {"deleted": 5000})
+        self.assertEqual(HostSummary.objects.get(host=hosts[0]).cve_count, 10)
+
+        payload = [{"id": host.id} for host in hosts]
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(8):
+            resp = self.client.delete("/api/hosts/bulk/", payload, format="json")
+        self.assertEqual(resp.json(), {"deleted": 500})
+        self.assertFalse(HostCVE.objects.exists())
+        self.assertEqual(TrackSummary.objects.get(track=self.track).host_count, 1)
+
+
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.track = Track.objects.create(name="prod")
+        self.web = Host.objects.create(name="web01", os_type="linux", track=self.track)
+        self.db = Host.objects.create(name="db01", os_type="linux", track=self.track)
+        critical = CVE.objects.create(cve_id="CVE-2024-0001", description="a", score=9.8, impact="RCE")
+        low = CVE.objects.create(cve_id="CVE-2024-0002", description="b", score=3.1, impact="DoS")
+        HostCVE.objects.create(host=self.web, cve=critical)
+        HostCVE.objects.create(host=self.db, cve=critical)
+        HostCVE.objects.create(host=self.db, cve=low)
+
+    async def test_matches_sync_endpoints(self):
+        pairs = [
+            (f"/api/async/tracks/{self.track.id}/cves/", f"/api/hostcves/by_track/?track_id={self.track.id}"),
+            (f"/api/async/tracks/{self.track.id}/cves/?severity=low",
+             f"/api/hostcves/by_track/?track_id={self.track.id}&severity=low"),
+            (f"/api/async/tracks/{self.track.id}/summary/", f"/api/tracks/{self.track.id}/summary/"),
+            (f"/api/async/hosts/{self.db.id}/summary/", f"/api/hosts/{self.db.id}/summary/"),
+            (f"/api/async/hosts/{self.db.id}/cves/", f"/api/hostcves/by_host/?host_id={self.db.id}"),
+        ]
+        for async_url, sync_url in pairs:
+            async_resp = await self.async_client.get(async_url)
+            sync_resp = await self.async_client.get(sync_url)
+            self.assertEqual(async_resp.status_code, 200, async_url)
+            self.assertEqual(async_resp.json(), sync_resp.json(), async_url)
+
+    async def test_lookup_and_errors(self):
+        resp = await self.async_client.get("/api/async/cves/cve-2024-0002/")
+        self.assertEqual(resp.json()["score"], 3.1)
+        self.assertEqual((await self.async_client.get("/api/async/cves/CVE-1999-0001/")).status_code, 404)
+        self.assertEqual((await self.async_client.get("/api/async/tracks/999/summary/")).status_code, 404)
+        resp = await self.async_client.get(f"/api/async/tracks/{self.track.id}/cves/?score_min=high")
+        self.assertEqual(resp.status_code, 400)
+
+
+@override_settings(CVEAPP_METRICS=True, CVEAPP_PROFILE_SAMPLE_RATE=1.0, CVEAPP_PROFILE_SLOW_MS=0)
+class MetricsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        from .metrics import registry
+
+        registry.reset()
+        self.track = Track.objects.create(name="prod")
+        CVE.objects.create(cve_id="CVE-2024-0001", description="a", score=9.8, impact="RCE")
+
+    def metrics(self):
+        return {
+            line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in self.client.get("/metrics").content.decode().splitlines()
+            if not line.startswith("#")
+        }
+
+    def test_records_requests(self):
+        with tempfile.TemporaryDirectory() as tmp, self.settings(CVEAPP_PROFILE_DIR=tmp):
+            self.client.get("/api/cves/")
+            self.client.get("/api/cves/")
+            self.assertEqual([name.split("-")[2:4] for name in os.listdir(tmp)], [["cve", "list"]] * 2)
+        self.client.get("/api/tracks/999/")
+        metrics = self.metrics()
+        labels = 'method="GET",view="cve-list"'
+        self.assertEqual(metrics[f'cveapp_request_duration_seconds_count{{{labels}}}'], 2)
+        self.assertEqual(metrics[f'cveapp_requests_total{{{labels},status="200"}}'], 2)
+        self.assertEqual(metrics[f'cveapp_response_cache_total{{{labels},result="miss"}}'], 1)
+        self.assertEqual(metrics[f'cveapp_response_cache_total{{{labels},result="hit"}}'], 1)
+        self.assertEqual(metrics[f'cveapp_db_queries_bucket{{{labels},le="1"}}'], 1)
+        self.assertGreater(metrics[f'cveapp_db_queries_sum{{{labels}}}'], 0)
+        self.assertGreater(metrics[f'cveapp_response_bytes_sum{{{labels}}}'], 0)
+        self.assertEqual(metrics['cveapp_requests_total{method="GET",view="track-detail",status="404"}'], 1)
+
+    async def test_async_views(self):
+        await self.async_client.get(f"/api/async/tracks/{self.track.id}/cves/")
+        metrics = await sync_to_async(self.metrics)()
+        labels = 'method="GET",view="async-track-cves"'
+        self.assertEqual(metrics[f'cveapp_db_queries_sum{{{labels}}}'], 1)
+
+    async def test_concurrent_async_requests_count_their_own_queries(self):
+        url = f"/api/async/tracks/{self.track.id}/cves/"
+        await asyncio.gather(*(self.async_client.get(url) for _ in range(5)))
+        metrics = await sync_to_async(self.metrics)()
+        labels = 'method="GET",view="async-track-cves"'
+        self.assertEqual(metrics[f'cveapp_db_queries_count{{{labels}}}'], 5)
+        self.assertEqual(metrics[f'cveapp_db_queries_sum{{{labels}}}'], 5)
+
+    @override_settings(CVEAPP_METRICS=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+class GenerateFleetTests(TestCase):
+    def generate(self, *args):
+        call_command("generate_fleet", "--tracks=2", "--hosts=10", "--cves=50", "--packages=20", *args, stdout=StringIO())
+
+    def test_generates_deterministic_fleet(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.generate("--density=5", "--drift=0", f"--inventories={tmp}")
+            linux = Host.objects.filter(os_type="linux")
+            self.assertEqual(Track.objects.count(), 2)
+            self.assertEqual(Host.objects.count(), 10)
+            self.assertEqual(HostCVE.objects.count(), 50)
+            self.assertFalse(linux.filter(inventory__isnull=True).exists())
+            self.assertTrue(all(inventory.package_count == 20 for inventory in Inventory.objects.all()))
+            self.assertLess(Inventory.objects.count(), linux.count())
+            self.assertTrue(AffectedPackage.objects.exists())
+            self.assertEqual(HostSummary.objects.count(), 10)
+            with open(os.path.join(tmp, f"{linux.first().name}.txt")) as f:
+                packages = [parse_line(line) for line in f]
+            self.assertEqual(len(packages), 20)
+            self.assertTrue(all(p is not None and p.installed_at is not None for p in packages))
+
+        cves = list(CVE.objects.order_by("id").values_list("cve_id", "score"))
+        self.generate("--reset", "--match", "--drift=0")
+        self.assertEqual(list(CVE.objects.order_by("id").values_list("cve_id", "score")), cves)
+        self.assertEqual(Host.objects.count(), 10)
+        self.assertTrue(HostCVE.objects.exists())
+        self.assertEqual(match_hosts(prune=True), (0, 0))
+
+
+class CompactResponseTests(APITestCase):
+    """The values()-built responses must match what the serializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        track = Track.objects.create(name="prod")
+        hosts = [Host.objects.create(name=f"host{i}", os_type="linux", track=track) for i in range(3)]
+        cves = [
+            CVE.objects.create(cve_id=f"CVE-2024-{i:04d}", description=f"d{i}", score=float(i), impact="i")
+            for i in range(4)
+        ]
+        HostCVE.objects.bulk_create(HostCVE(host=h, cve=c) for h in hosts for c in cves)
+        cls.track = track
+
+    def serialized(self, queryset):
+        return HostCVESerializer(queryset.select_related("host", "cve"), many=True).data
+
+    def test_list_matches_serializer(self):
+        expected = json.loads(json.dumps(self.serialized(HostCVE.objects.order_by("-cve__score", "id"))))
+        data = self.client.get("/api/hostcves/", {"page_size": 8}).json()
+        self.assertEqual(data["results"], expected[:8])
+        rest = self.client.get(data["next"]).json()
+        self.assertEqual(rest["results"], expected[8:])
+        self.assertIsNone(rest["next"])
+
+    def test_projection(self):
+        data = self.client.get("/api/hostcves/by_host/", {"host_id": Host.objects.first().id,
+                                                          "fields": "id,cve.cve_id"}).json()
+        self.assertEqual(set(data[0]), {"id", "cve"})
+        self.assertEqual(set(data[0]["cve"]), {"cve_id"})
+
+    def test_by_track_matches_serializers(self):
+        data = self.client.get("/api/hostcves/by_track/", {"track_id": self.track.id}).json()
+        top = CVE.objects.order_by("-score").first()
+        self.assertEqual(data[0]["cve"], CVESerializer(top).data)
+        self.assertEqual(data[0]["hosts"], HostSerializer(Host.objects.order_by("name"), many=True).data)
+
+    def test_normalized_shape(self):
+        data = self.client.get("/api/hostcves/by_os/", {"os_type": "linux", "shape": "normalized"}).json()
+        self.assertEqual(len(data["hosts"]), 3)
+        self.assertEqual(len(data["cves"]), 4)
+        self.assertEqual(set(data["cves"][0]), {"id", "cve_id", "description", "score", "impact"})
+        self.assertEqual(
+            sorted(map(tuple, data["results"])),
+            sorted(HostCVE.objects.values_list("host_id", "cve_id")),
+        )
+        page = self.client.get("/api/hostcves/", {"shape": "normalized", "page_size": 2}).json()
+        self.assertEqual(len(page["results"]), 2)
+        self.assertIsNotNone(page["next"])
+
+    def test_invalid_shape(self):
+        self.assertEqual(self.client.get("/api/hostcves/", {"shape": "flat"}).status_code, 400)
+
+
+class TriageTests(TestCase):
+    def setUp(self):
+        self.track = Track.objects.create(name="prod")
+        host = Host.objects.create(name="web01", os_type="linux", track=self.track)
+        other = Host.objects.create(name="dev01", os_type="linux", track=Track.objects.create(name="dev"))
+        self.cves = [
+            CVE.objects.create(cve_id=f"CVE-2024-{i:04d}", description=description, score=score, impact="i")
+            for i, (description, score) in enumerate([
+                ("Heap overflow in the parser. More text.", 9.8),
+                ("Heap overflow in the parser. More text.", 9.1),
+                ("Heap  overflow in the parser.  More text.", 7.5),
+                ("Cross-site scripting in the login form.", 5.0),
+                ("Timing leak in the comparison.", 2.0),
+            ])
+        ]
+        HostCVE.objects.bulk_create(HostCVE(host=host, cve=cve) for cve in self.cves)
+        HostCVE.objects.create(host=other, cve=CVE.objects.create(cve_id="CVE-2024-9999", description="x", score=1, impact="i"))
+        self.track_cves = CVE.objects.filter(hostcve__host__track=self.track).distinct()
+
+    def test_batches_dedups_and_caches(self):
+        backend = FakeBackend()
+        stats = triage(self.track_cves, backend, batch_size=2)
+        self.assertEqual((stats["triaged"], stats["unique"], stats["calls"], stats["failed"]), (5, 3, 2, 0))
+        self.assertEqual(CVETriage.objects.count(), 5)
+        self.assertEqual(
+            list(CVETriage.objects.order_by("cve_id").values_list("priority", flat=True)), [1, 1, 1, 3, 4],
+        )
+        self.assertEqual(CVETriage.objects.get(cve=self.cves[2]).summary, "Heap overflow in the parser.")
+        self.assertEqual(CVETriage.objects.get(cve=self.cves[0]).model, "fake")
+
+        self.assertEqual(triage(self.track_cves, backend)["calls"], 0)
+        CVE.objects.filter(pk=self.cves[3].pk).update(description="Stored XSS in the admin page.")
+        stats = triage(self.track_cves, backend)
+        self.assertEqual((stats["triaged"], stats["skipped"]), (1, 4))
+        self.assertEqual(CVETriage.objects.get(cve=self.cves[3]).summary, "Stored XSS in the admin page.")
+        self.assertEqual(len(backend.prompts), 3)
+
+    def test_unusable_reply_is_retried_next_run(self):
+        stats = triage(self.track_cves, lambda prompt: "Sorry, I can't help with that.")
+        self.assertEqual((stats["triaged"], stats["failed"]), (0, 3))
+        self.assertFalse(CVETriage.objects.exists())
+
+    def test_parse_reply(self):
+        reply = '```json\n[{"id": 0, "summary": "a", "priority": "2"}, {"id": 5, "summary": "b", "priority": 1},' \
+                ' {"id": 1, "summary": "c", "priority": 9}]\n```'
+        self.assertEqual(parse_reply(reply, 2), {0: ("a", 2)})
+        with self.assertRaises(ValueError):
+            parse_reply("no json here", 1)
+
+    def test_budget(self):
+        now, slept = [0.0], []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        budget = Budget(max_tokens=500, requests_per_minute=2, tokens_per_minute=250, clock=lambda: now[0], sleep=sleep)
+        budget.acquire(100)
+        budget.acquire(100)
+        budget.acquire(100)
+        self.assertEqual(slept, [60.0])
+        with self.assertRaises(BudgetExhausted):
+            budget.acquire(201)
+
+        stats = triage(self.track_cves, FakeBackend(), Budget(max_tokens=1), batch_size=1)
+        self.assertTrue(stats["exhausted"])
+        self.assertEqual(stats["calls"], 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("triage_cves", "--backend=fake", "--track=prod", stdout=out)
+        self.assertIn("prod: 5 triaged in 1 call(s), 0 up to date, 0 without an answer; P1 3, P2 0, P3 1, P4 1", out.getvalue())
+        self.assertFalse(CVETriage.objects.filter(cve__cve_id="CVE-2024-9999").exists())
+
+
+class BlastRadiusTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        blast_radius.INDEX.changed(stale=True)
+        self.prod = Track.objects.create(name="prod")
+        self.staging = Track.objects.create(name="staging")
+        self.web = Host.objects.create(name="web01", os_type="linux", track=self.prod)
+        self.db = Host.objects.create(name="db01", os_type="linux", track=self.staging)
+        self.win = Host.objects.create(name="win01", os_type="windows", track=self.prod)
+        self.cves = [
+            CVE.objects.create(cve_id=f"CVE-2024-{i:04d}", description="d", score=score, impact="i")
+            for i, score in enumerate([9.8, 9.0, 5.0])
+        ]
+        for host, cve in [(self.web, 0), (self.web, 2), (self.db, 1), (self.win, 2)]:
+            HostCVE.objects.create(host=host, cve=self.cves[cve])
+
+    def hosts(self, expression):
+        resp = self.client.post("/api/blast-radius/?hosts=1", expression, format="json")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return {Host.objects.get(id=pk).name for pk in resp.json()["hosts"]}
+
+    def test_set_algebra(self):
+        self.assertEqual(self.hosts({"min_score": 9}), {"web01", "db01"})
+        self.assertEqual(self.hosts({"cve": ["CVE-2024-0000", "CVE-2024-0002"], "min_score": 9}), {"web01"})
+        self.assertEqual(self.hosts({"or": [{"cve": "CVE-2024-0001"}, {"os_type": "windows"}]}), {"db01", "win01"})
+        self.assertEqual(self.hosts({"and": [{"cve": "CVE-2024-0002"}, {"not": {"track": "staging"}}]}), {"web01", "win01"})
+        self.assertEqual(self.hosts({"not": {"min_score": 0}}), set())
+        self.assertEqual(self.hosts({"cve": "CVE-2099-0000"}), set())
+
+        resp = self.client.get("/api/blast-radius/", {"q": json.dumps({"min_score": 5})})
+        self.assertEqual(resp.json(), {
+            "host_count": 3,
+            "tracks": [
+                {"id": self.prod.id, "name": "prod", "host_count": 2},
+                {"id": self.staging.id, "name": "staging", "host_count": 1},
+            ],
+            "os_types": {"linux": 2, "windows": 1},
+        })
+
+    def test_updated_incrementally_on_commit(self):
+        self.assertEqual(self.hosts({"cve": "CVE-2024-0001"}), {"db01"})
+        with self.captureOnCommitCallbacks(execute=True):
+            HostCVE.objects.create(host=self.win, cve=self.cves[1])
+        # The generation, then only the changed CVE and its links.
+        with self.assertNumQueries(3):
+            summary, _ = blast_radius.query({"cve": "CVE-2024-0001"})
+        self.assertEqual(summary["host_count"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.db.track = self.prod
+            self.db.save()
+            self.cves[0].score = 4.0
+            self.cves[0].save()
+        self.assertEqual(self.hosts({"track": "staging"}), set())
+        self.assertEqual(self.hosts({"min_score": 9}), {"db01", "win01"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.win.delete()
+        self.assertEqual(self.hosts({"track": "prod"}), {"web01", "db01"})
+
+    def test_sees_writes_of_other_processes(self):
+        self.assertEqual(self.hosts({"cve": "CVE-2024-0001"}), {"db01"})
+        with self.captureOnCommitCallbacks(execute=True):
+            HostCVE.objects.create(host=self.web, cve=self.cves[1])
+        # Another process: its links skip our signals and its commit is not
+        # counted here, but it still bumps the shared generation.
+        HostCVE.objects.bulk_create([HostCVE(host=self.win, cve=self.cves[0])])
+        CacheGeneration.objects.filter(pk=response_cache.GENERATION_ROW).update(value=F("value") + 1)
+        self.assertEqual(self.hosts({"cve": "CVE-2024-0001"}), {"web01", "db01"})
+        self.assertEqual(self.hosts({"cve": "CVE-2024-0000"}), {"web01", "win01"})
+
+    def test_invalid_expressions(self):
+        for expression in [[], {}, {"and": []}, {"and": [], "or": []}, {"cve": 1}, {"min_score": "9"},
+                           {"os_type": "beos"}, {"severity": "high"}]:
+            resp = self.client.post("/api/blast-radius/", expression, format="json")
+            self.assertEqual(resp.status_code, 400, expression)
+        self.assertEqual(self.client.get("/api/blast-radius/", {"q": "{"}).status_code, 400)
+
+    def test_bitsets(self):
+        ids = [0, 7, 8, 63, 64, 1000]
+        self.assertEqual(blast_radius.members(blast_radius.bitset(ids)), ids)
+        self.assertEqual(blast_radius.bitset([]), 0)
 
-# Create your tests here.
@@ -1,7 +1,12 @@
 from rest_framework import serializers
-from .models import Track
+from .models import Track, TrackSummary
 
 class TrackSerializer(serializers.ModelSerializer):
     class Meta:
         model = Track
         fields = '__all__'
+
+class TrackSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrackSummary
+        fields = '__all__'
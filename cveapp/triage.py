@@ -0,0 +1,218 @@
+"""Batched LLM triage of CVEs: a one-sentence summary and a priority each.
+
+Calling a model once per CVE is slow, so :func:`triage`
+
+- skips CVEs already triaged for their current description,
+- sends each distinct description once; CVEs sharing it share the answer,
+- packs up to ``batch_size`` descriptions (and ``max_batch_tokens``) into
+  one prompt,
+- asks a :class:`Budget` before every call, which waits out the per-minute
+  limits and stops the run once the total token cap is reached,
+
+and stores the answers in :class:`~cveapp.models.CVETriage`.
+
+A backend is any callable ``prompt -> reply text`` with an optional
+``name``; :data:`BACKENDS` has Gemini (through :mod:`agent.clients`) and an
+offline fake.
+"""
+import hashlib
+import json
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .models import CVETriage
+
+ITEMS_HEADER = "CVEs (one JSON object per line):\n"
+PROMPT = (
+    "You triage security vulnerabilities for an operations team. For each CVE below, "
+    "write one sentence on what an attacker can achieve and assign a priority: "
+    "1 = urgent, 2 = high, 3 = medium, 4 = low. Reply with only a JSON array of "
+    'objects with the keys "id", "summary" and "priority", one per CVE.\n\n'
+    + ITEMS_HEADER
+)
+# Rough reply size per CVE, reserved from the budget along with the prompt.
+OUTPUT_TOKENS_PER_ITEM = 60
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+def estimate_tokens(text):
+    """About four characters per token, which is close enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def description_hash(description):
+    return hashlib.sha256(" ".join(description.split()).encode()).hexdigest()
+
+
+class Budget:
+    """Limits on total tokens and on tokens and requests per minute.
+
+    ``None`` disables a limit. ``clock`` and ``sleep`` are injectable so
+    tests need not wait.
+    """
+    window = 60.0
+
+    def __init__(self, max_tokens=None, tokens_per_minute=None, requests_per_minute=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_tokens = max_tokens
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.used = 0
+        self.calls = deque()  # (time, tokens) of the calls in the last window
+
+    def acquire(self, tokens):
+        """Wait until a call of ``tokens`` fits, then account for it."""
+        if self.max_tokens is not None and self.used + tokens > self.max_tokens:
+            raise BudgetExhausted(f"token budget of {self.max_tokens} reached after {self.used}")
+        while True:
+            now = self.clock()
+            while self.calls and now - self.calls[0][0] >= self.window:
+                self.calls.popleft()
+            if self._fits(tokens):
+                break
+            self.sleep(self.window - (now - self.calls[0][0]))
+        self.calls.append((self.clock(), tokens))
+        self.used += tokens
+
+    def _fits(self, tokens):
+        if self.requests_per_minute is not None and len(self.calls) >= self.requests_per_minute:
+            return False
+        # A single call larger than the per-minute allowance still goes
+        # through once the window is empty.
+        if self.tokens_per_minute is not None and self.calls:
+            return sum(used for _, used in self.calls) + tokens <= self.tokens_per_minute
+        return True
+
+
+def item_line(index, group):
+    return json.dumps({"id": index, "score": group["score"], "description": group["description"]})
+
+
+def batches(groups, batch_size, max_tokens):
+    """Split ``groups`` into lists that fit one prompt."""
+    batch, tokens = [], estimate_tokens(PROMPT)
+    for group in groups:
+        size = estimate_tokens(item_line(len(batch), group)) + OUTPUT_TOKENS_PER_ITEM
+        if batch and (len(batch) >= batch_size or tokens + size > max_tokens):
+            yield batch
+            batch, tokens = [], estimate_tokens(PROMPT)
+        batch.append(group)
+        tokens += size
+    if batch:
+        yield batch
+
+
+def build_prompt(batch):
+    return PROMPT + "\n".join(item_line(index, group) for index, group in enumerate(batch))
+
+
+def parse_reply(text, count):
+    """``{index: (summary, priority)}`` from a model reply; ValueError if unusable.
+
+    Models like to wrap JSON in Markdown fences, so only the outermost
+    ``[...]`` is parsed. Entries with unknown ids or priorities are dropped.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("reply has no JSON array")
+    answers = {}
+    for entry in json.loads(text[start:end + 1]):
+        if not isinstance(entry, dict):
+            continue
+        index, summary, priority = entry.get("id"), entry.get("summary"), entry.get("priority")
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(index, int) and 0 <= index < count and isinstance(summary, str) and 1 <= priority <= 4:
+            answers[index] = (summary.strip(), priority)
+    return answers
+
+
+def triage(cves, backend, budget=None, batch_size=20, max_batch_tokens=8000, force=False):
+    """Triage a CVE queryset, highest scores first; returns counts.
+
+    ``triaged`` counts CVEs, ``unique`` distinct descriptions sent, and
+    ``failed`` descriptions the model gave no usable answer for (they are
+    retried on the next run). ``exhausted`` is set when the budget ran out.
+    """
+    budget = budget if budget is not None else Budget()
+    model = getattr(backend, "name", type(backend).__name__)
+    done = {} if force else dict(
+        CVETriage.objects.filter(cve__in=cves).values_list("cve_id", "description_hash")
+    )
+
+    groups, skipped = {}, 0
+    for cve_id, description, score in cves.order_by("-score", "id").values_list("id", "description", "score"):
+        digest = description_hash(description)
+        if done.get(cve_id) == digest:
+            skipped += 1
+            continue
+        group = groups.setdefault(digest, {"hash": digest, "description": description, "score": score, "cve_ids": []})
+        group["cve_ids"].append(cve_id)
+
+    stats = {"triaged": 0, "skipped": skipped, "unique": len(groups), "calls": 0, "failed": 0, "exhausted": False}
+    for batch in batches(list(groups.values()), batch_size, max_batch_tokens):
+        prompt = build_prompt(batch)
+        try:
+            budget.acquire(estimate_tokens(prompt) + OUTPUT_TOKENS_PER_ITEM * len(batch))
+        except BudgetExhausted:
+            stats["exhausted"] = True
+            break
+        stats["calls"] += 1
+        try:
+            answers = parse_reply(backend(prompt), len(batch))
+        except ValueError:
+            answers = {}
+        rows = [
+            CVETriage(cve_id=cve_id, summary=answers[index][0], priority=answers[index][1],
+                      description_hash=group["hash"], model=model)
+            for index, group in enumerate(batch) if index in answers
+            for cve_id in group["cve_ids"]
+        ]
+        CVETriage.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["cve"],
+            update_fields=["summary", "priority", "description_hash", "model", "updated_at"],
+        )
+        stats["triaged"] += len(rows)
+        stats["failed"] += len(batch) - len(answers)
+    return stats
+
+
+class FakeBackend:
+    """Offline backend: priority from the CVSS score, summary from the description."""
+    name = "fake"
+
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        items = [json.loads(line) for line in prompt.split(ITEMS_HEADER, 1)[1].splitlines() if line.strip()]
+        return json.dumps([
+            {
+                "id": item["id"],
+                "summary": item["description"].split(". ")[0].rstrip(".")[:200] + ".",
+                "priority": 1 if item["score"] >= 9 else 2 if item["score"] >= 7 else 3 if item["score"] >= 4 else 4,
+            }
+            for item in items
+        ])
+
+
+def gemini_backend():
+    from agent.clients import gemini_model
+
+    return gemini_model(settings.CVEAPP_TRIAGE_MODEL)
+
+
+BACKENDS = {
+    "fake": FakeBackend,
+    "gemini": gemini_backend,
+}
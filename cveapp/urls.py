@@ -1,5 +1,6 @@
 from rest_framework import routers
-from cveapp.views import HostViewSet, CVEViewSet, HostCVEViewSet, TrackViewSet
+from cveapp import async_views, metrics
+from cveapp.views import HostViewSet, CVEViewSet, HostCVEViewSet, TrackViewSet, blast_radius_view
 from django.urls import path, include
 
 
@@ -9,6 +10,18 @@ router.register(r'hosts', HostViewSet)
 router.register(r'cves', CVEViewSet)
 router.register(r'hostcves', HostCVEViewSet)
 
+# Async (ASGI) read path for the dashboard's hot endpoints.
+async_urlpatterns = [
+    path('tracks/<int:pk>/cves/', async_views.track_cves, name='async-track-cves'),
+    path('tracks/<int:pk>/summary/', async_views.track_summary, name='async-track-summary'),
+    path('hosts/<int:pk>/cves/', async_views.host_cves, name='async-host-cves'),
+    path('hosts/<int:pk>/summary/', async_views.host_summary, name='async-host-summary'),
+    path('cves/<str:cve_id>/', async_views.cve_detail, name='async-cve-detail'),
+]
+
 urlpatterns = [
+    path('metrics', metrics.metrics_view, name='metrics'),
+    path('api/async/', include(async_urlpatterns)),
+    path('api/blast-radius/', blast_radius_view, name='blast-radius'),
     path('api/', include(router.urls)),
 ]
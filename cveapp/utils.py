@@ -0,0 +1,12 @@
+import gzip
+import io
+
+
+def open_text(path):
+    """Open a plain or gzip-compressed file as UTF-8 text."""
+    raw = open(path, "rb")
+    compressed = raw.read(2) == b"\x1f\x8b"
+    raw.seek(0)
+    if compressed:
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding="utf-8", errors="replace")
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
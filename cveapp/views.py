@@ -1,43 +1,221 @@
 
+import json
+
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from .models import Host, CVE, HostCVE, Track
-from .serializers import HostSerializer, CVESerializer, HostCVESerializer
-from .track_serializers import TrackSerializer
+from . import blast_radius
+from . import bulk as bulk_writes
+from . import compact
+from . import export as streaming
+from .filters import Exact, Prefix, QueryParamFilter, Range, Severity
+from .models import Host, CVE, HostCVE, HostSummary, Track, TrackSummary
+from . import search as fulltext
+from .cache import CachedResponseMixin
+from .pagination import KeysetPagination
+from .serializers import HostSerializer, CVESerializer, HostCVESerializer, HostSummarySerializer, requested_fields
+from .summaries import refresh_host_summaries, refresh_track_summaries
+from .track_serializers import TrackSerializer, TrackSummarySerializer
 from rest_framework import viewsets
-class TrackViewSet(viewsets.ModelViewSet):
+class TrackViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Track.objects.all()
     serializer_class = TrackSerializer
 
-class HostViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        track = self.get_object()
+        summary = TrackSummary.objects.filter(track=track).first()
+        if summary is None:
+            # Tracks nobody has written to since the summaries were introduced.
+            summary = refresh_track_summaries([track.id])[0]
+        return Response(TrackSummarySerializer(summary).data)
+
+class HostViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Host.objects.all()
     serializer_class = HostSerializer
+    filter_backends = [QueryParamFilter]
+    filter_params = {
+        'track': Exact('track_id', int),
+        'os_type': Exact('os_type'),
+        'name': Exact('name'),
+    }
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        host = self.get_object()
+        summary = HostSummary.objects.filter(host=host).first()
+        if summary is None:
+            summary = refresh_host_summaries([host.id])[0]
+        return Response(HostSummarySerializer(summary).data)
 
-class CVEViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post', 'delete'])
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return Response(bulk_writes.delete_hosts(request.data))
+        return Response(bulk_writes.upsert_hosts(request.data))
+
+class CVEViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = CVE.objects.all()
     serializer_class = CVESerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-score', 'id')
+    ordering_fields = {'score': 'score', 'cve_id': 'cve_id', 'id': 'id'}
+    filter_backends = [QueryParamFilter]
+    filter_params = {
+        'score_min': Range('score', 'gte'),
+        'score_max': Range('score', 'lte'),
+        'severity': Severity('score'),
+        'impact': Exact('impact'),
+        'cve_id': Prefix('cve_id'),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if fields is not None and 'description' not in fields:
+            queryset = queryset.defer('description')
+        return queryset
 
-class HostCVEViewSet(viewsets.ModelViewSet):
-    queryset = HostCVE.objects.all()
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q required'}, status=400)
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            # SQLite reads LIMIT -1 as no limit at all.
+            return Response({'error': 'limit must be a positive integer'}, status=400)
+        limit = min(limit, 500)
+        cves = fulltext.search(query, limit=limit, queryset=self.get_queryset())
+        serializer = self.get_serializer(cves, many=True)
+        return Response(serializer.data)
+
+class HostCVEViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = HostCVE.objects.select_related('host', 'cve')
     serializer_class = HostCVESerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-cve__score', 'id')
+    ordering_fields = {'score': 'cve__score', 'cve_id': 'cve__cve_id', 'host': 'host__name', 'id': 'id'}
+    filter_backends = [QueryParamFilter]
+    filter_params = {
+        'score_min': Range('cve__score', 'gte'),
+        'score_max': Range('cve__score', 'lte'),
+        'severity': Severity('cve__score'),
+        'impact': Exact('cve__impact'),
+        'cve_id': Prefix('cve__cve_id'),
+        'track': Exact('host__track_id', int),
+        'os_type': Exact('host__os_type'),
+        'host': Exact('host_id', int),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if fields is not None and not {'cve', 'cve.description'} & fields:
+            queryset = queryset.defer('cve__description')
+        return queryset
+
+    @action(detail=False, methods=['post', 'delete'])
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return Response(bulk_writes.delete_host_cves(request.data))
+        return Response(bulk_writes.create_host_cves(request.data))
+
+    def compact_response(self, host_cves, paginate=False, grouped=False):
+        # Built from values() rows instead of per-row serializers; see compact.
+        shape = self.request.query_params.get('shape', 'nested')
+        if shape not in compact.SHAPES:
+            return Response({'error': f"shape must be one of {', '.join(compact.SHAPES)}"}, status=400)
+        layout = compact.Layout(None if grouped else requested_fields(self.request))
+        rows = host_cves.values(*layout.columns(*self.ordering_fields.values()))
+        if paginate:
+            rows = self.paginate_queryset(rows)
+        if shape == 'normalized':
+            data = layout.normalized(rows)
+        else:
+            data = layout.grouped(rows) if grouped else layout.nested(rows)
+        if not paginate:
+            return Response(data)
+        if shape == 'normalized':
+            return Response({'next': self.paginator.get_next_link(), **data})
+        return self.get_paginated_response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.compact_response(self.filter_queryset(HostCVE.objects.all()), paginate=True)
 
     @action(detail=False, methods=['get'])
     def by_host(self, request):
         host_id = request.query_params.get('host_id')
         if not host_id:
             return Response({'error': 'host_id required'}, status=400)
-        host_cves = HostCVE.objects.filter(host_id=host_id)
-        serializer = self.get_serializer(host_cves, many=True)
-        return Response(serializer.data)
+        if not host_id.isdecimal():
+            return Response({'error': 'host_id must be an integer'}, status=400)
+        return self.compact_response(self.filter_queryset(HostCVE.objects.filter(host_id=host_id)))
+
+    @action(detail=False, methods=['get'])
+    def by_track(self, request):
+        track_id = request.query_params.get('track_id')
+        if not track_id:
+            return Response({'error': 'track_id required'}, status=400)
+        if not track_id.isdecimal():
+            return Response({'error': 'track_id must be an integer'}, status=400)
+        host_cves = (
+            self.filter_queryset(HostCVE.objects.filter(host__track_id=track_id))
+            .order_by('-cve__score', 'cve__cve_id', 'host__name')
+        )
+        # One entry per CVE with every affected host of the track, so the
+        # dashboard no longer has to fetch and merge per-host results.
+        return self.compact_response(host_cves, grouped=True)
 
     @action(detail=False, methods=['get'])
     def by_os(self, request):
         os_type = request.query_params.get('os_type')
         if not os_type:
             return Response({'error': 'os_type required'}, status=400)
-        hosts = Host.objects.filter(os_type=os_type)
-        host_ids = hosts.values_list('id', flat=True)
-        host_cves = HostCVE.objects.filter(host_id__in=host_ids)
-        serializer = self.get_serializer(host_cves, many=True)
-        return Response(serializer.data)
+        return self.compact_response(self.filter_queryset(HostCVE.objects.filter(host__os_type=os_type)))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # ``fmt`` rather than ``format``, which DRF reserves for renderer selection.
+        fmt = request.query_params.get('fmt', 'ndjson')
+        if fmt not in streaming.FORMATS:
+            return Response({'error': f"fmt must be one of {', '.join(streaming.FORMATS)}"}, status=400)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        content_type, extension = streaming.FORMATS[fmt]
+        filename = f"hostcves.{extension}"
+        if compress:
+            content_type, filename = 'application/gzip', filename + '.gz'
+        host_cves = self.filter_queryset(HostCVE.objects.all())
+        response = StreamingHttpResponse(streaming.stream(host_cves, fmt, compress), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+@api_view(['GET', 'POST'])
+def blast_radius_view(request):
+    """Hosts, tracks and OS types selected by a set-algebra expression over CVEs.
+
+    The expression is the POST body, or JSON in ``?q=`` for GET, e.g.
+    ``{"and": [{"cve": ["CVE-2024-0001", "CVE-2024-0002"], "min_score": 9},
+    {"not": {"track": "staging"}}]}`` (see
+    :meth:`cveapp.blast_radius.BlastRadiusIndex.evaluate`). ``?hosts=1``
+    also lists the ids of the selected hosts.
+    """
+    if request.method == 'POST':
+        expression = request.data
+    else:
+        try:
+            expression = json.loads(request.query_params.get('q', ''))
+        except ValueError:
+            return Response({'error': 'q must be a JSON expression'}, status=400)
+    try:
+        summary, hosts = blast_radius.query(expression)
+    except blast_radius.QueryError as exc:
+        return Response({'error': str(exc)}, status=400)
+    if request.query_params.get('hosts') in ('1', 'true'):
+        summary['hosts'] = blast_radius.members(hosts)
+    return Response(summary)
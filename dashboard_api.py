@@ -0,0 +1,100 @@
+"""HTTP client for the Streamlit dashboard.
+
+Every request goes through one pooled ``requests.Session`` with timeouts and
+a small retry budget. Successful GETs are memoised with ``st.cache_data``,
+keyed on the path and query parameters, so reruns caused by widget
+interaction do not hit the API again. Independent requests can be issued
+concurrently with :func:`fetch_all`.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("CVE_API_URL", "http://localhost:8000/api/")
+TIMEOUT = (3.05, 30)  # connect, read (seconds)
+MAX_WORKERS = 8
+# Tracks and summaries change rarely; lists follow writes more closely.
+STATIC_TTL = int(os.environ.get("CVE_API_STATIC_TTL", 300))
+DATA_TTL = int(os.environ.get("CVE_API_DATA_TTL", 30))
+
+
+@st.cache_resource
+def session():
+    s = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers["Accept"] = "application/json"
+    return s
+
+
+@st.cache_resource
+def _executor():
+    return ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dashboard-api")
+
+
+def _fetch(path, params):
+    url = path if path.startswith(("http://", "https://")) else API_URL + path
+    resp = session().get(url, params=params, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+# Failures raise out of the cached functions, so they are never cached.
+@st.cache_data(ttl=STATIC_TTL, show_spinner=False)
+def _fetch_static(path, params):
+    return _fetch(path, params)
+
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def _fetch_data(path, params):
+    return _fetch(path, params)
+
+
+def _load(path, params, static):
+    fetch = _fetch_static if static else _fetch_data
+    return fetch(path, params or None)
+
+
+def _settle(path, load, default):
+    # Runs on the script thread: st.error is dropped from worker threads.
+    try:
+        data = load()
+    except (requests.RequestException, ValueError) as exc:
+        st.error(f"Could not load {path} from the API: {exc}")
+        return None
+    return default if data is None else data
+
+
+def get(path, params=None, default=None, static=False):
+    """GET ``path`` (relative to ``API_URL``, or a full URL such as a
+    pagination cursor) and return the decoded JSON, or ``default`` if it is
+    empty. A failed request is shown with ``st.error`` and returns ``None``,
+    so the page can tell it apart from an empty result.
+    """
+    return _settle(path, lambda: _load(path, params, static), default)
+
+
+def fetch_all(calls):
+    """Run several :func:`get` calls concurrently.
+
+    ``calls`` maps a name to ``(path, params)`` or ``(path, params, kwargs)``;
+    the result maps each name to its response.
+    """
+    futures = {}
+    for name, call in calls.items():
+        path, params, *options = call
+        options = options[0] if options else {}
+        future = _executor().submit(_load, path, params, options.get("static", False))
+        futures[name] = (path, future, options.get("default"))
+    return {name: _settle(path, future.result, default) for name, (path, future, default) in futures.items()}
+
+
+def clear():
+    _fetch_static.clear()
+    _fetch_data.clear()
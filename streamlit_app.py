@@ -1,7 +1,12 @@
+import html
+
 import streamlit as st
 import requests
 
-API_URL = "http://localhost:8000/api/"
+import dashboard_api as api
+from dashboard_api import API_URL
+
+SEVERITIES = ["critical", "high", "medium", "low", "none"]
 
 # Custom CSS for colorful theme
 st.markdown(
@@ -91,8 +96,10 @@ st.markdown(
 if 'sidebar_menu' not in st.session_state:
     st.session_state['sidebar_menu'] = 'Tracks'
 
-tracks_resp = requests.get(f"{API_URL}tracks/")
-tracks = tracks_resp.json() if tracks_resp.status_code == 200 else []
+tracks = api.get("tracks/", default=[], static=True)
+# A failed request has already been reported; the menu is then just empty.
+tracks_loaded = tracks is not None
+tracks = tracks or []
 
 # Do not open dropdown by default
 if 'sidebar_tracks_open' not in st.session_state:
@@ -217,6 +224,11 @@ with st.sidebar:
         st.session_state['sidebar_menu'] = 'Vulnerabilities'
         st.session_state['sidebar_tracks_open'] = False
 
+    if st.button("Refresh data", key="refresh_data"):
+        api.clear()
+        st.session_state.pop('vuln_query', None)
+        st.rerun()
+
 
 
 
@@ -235,54 +247,158 @@ window.addEventListener('message', (event) => {
 sidebar_tag = st.session_state['sidebar_menu']
 
 
+def load_next_cve_page():
+    page = api.get(st.session_state['vuln_next'])
+    if page is None:
+        return False
+    st.session_state['vuln_cves'].extend(page['results'])
+    st.session_state['vuln_next'] = page['next']
+    return True
+
+
+CARD_COLORS = ["#ffecd2", "#fcb69f", "#a1c4fd", "#c2e9fb", "#fbc2eb", "#a6c1ee"]
+PAGE_SIZES = [25, 50, 100, 200]
+
+
+def display_controls(key):
+    """Card/table toggle and page size; returns ``(mode, page_size)``."""
+    cols = st.columns([3, 1])
+    mode = cols[0].radio("Display", ["Cards", "Table"], horizontal=True, key=f"{key}_mode")
+    page_size = cols[1].selectbox("Per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    return mode, page_size
+
+
+def pager(key, total, page_size, more=False):
+    """Page selector; returns the ``(start, stop)`` slice to render.
+
+    ``more`` adds one page beyond ``total`` for lists that are still being
+    fetched, so moving onto it asks the caller to load the next batch.
+    """
+    pages = max(1, -(-total // page_size) + (1 if more else 0))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    cols = st.columns([1, 3])
+    page = cols[0].number_input("Page", 1, pages, key=f"{key}_page")
+    cols[1].caption(f"{total}{'+' if more else ''} CVEs, page {page} of {pages}{'+' if more else ''}")
+    start = (page - 1) * page_size
+    return start, start + page_size
+
+
+def reset_page(key, query):
+    # Must run before the pager widget is created on this rerun.
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_page"] = 1
+
+
+def render_cards(entries, offset=0):
+    """Render ``(cve, hosts)`` pairs as cards, one markdown block per column."""
+    columns = [[], []]
+    for idx, (cve, hosts) in enumerate(entries, start=offset):
+        hosts_line = f"<p><b>Hosts:</b> {html.escape(', '.join(h['name'] for h in hosts))}</p>" if hosts is not None else ""
+        columns[idx % 2].append(f"""
+            <div style='background: linear-gradient(135deg, {CARD_COLORS[idx % len(CARD_COLORS)]} 0%, #fff 100%); border-radius: 16px; box-shadow: 0 4px 16px rgba(0,0,0,0.08); padding: 1.5em 1em 1em 1em; margin-bottom: 1.5em;'>
+                <h3 style='color:#185a9d;'>{html.escape(cve['cve_id'])}</h3>
+                <p><b>Description:</b> {html.escape(cve['description'])}</p>
+                <p><b>Score:</b> <span style='color:#e17055;font-weight:bold;'>{cve['score']}</span></p>
+                <p><b>Impact:</b> <span style='color:#00b894;'>{html.escape(cve['impact'])}</span></p>
+                {hosts_line}
+            </div>
+        """)
+    for col, cards in zip(st.columns(2), columns):
+        col.markdown("".join(cards), unsafe_allow_html=True)
+
+
+def render_table(entries):
+    rows = []
+    for cve, hosts in entries:
+        row = {"CVE": cve['cve_id'], "Score": cve['score'], "Impact": cve['impact'], "Description": cve['description']}
+        if hosts is not None:
+            row["Hosts"] = ", ".join(h['name'] for h in hosts)
+        rows.append(row)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+def render_entries(entries, mode, offset=0):
+    if mode == "Table":
+        render_table(entries)
+    else:
+        render_cards(entries, offset)
+
+
 if sidebar_tag == "Tracks":
     selected_track = st.session_state.get('selected_track')
-    hosts = []
-    if selected_track:
-        track_id = next((t["id"] for t in tracks if t["name"] == selected_track), None)
-        hosts_resp = requests.get(f"{API_URL}hosts/?track={track_id}")
-        if hosts_resp.status_code == 200:
-            hosts = hosts_resp.json()
-    # Fetch CVEs for all hosts in the selected track
+    # The summary and the CVEs for all hosts in the track are fetched
+    # concurrently, one request each.
     track_cves = []
-    if selected_track and hosts:
-        host_ids = [h["id"] for h in hosts]
-        for host_id in host_ids:
-            cves_resp = requests.get(f"{API_URL}hostcves/by_host/", params={"host_id": host_id})
-            if cves_resp.status_code == 200:
-                track_cves.extend(cves_resp.json())
-
-    if selected_track:
+    track_summary = None
+    # The selected track may be gone since the track list was refreshed.
+    track_id = next((t["id"] for t in tracks if t["name"] == selected_track), None)
+    if track_id is not None:
+        track_severities = st.multiselect("Severity", SEVERITIES, key="track_severity")
+        track_params = {"track_id": track_id}
+        if track_severities:
+            track_params["severity"] = ",".join(track_severities)
+        fetched = api.fetch_all({
+            "summary": (f"tracks/{track_id}/summary/", None),
+            "cves": ("hostcves/by_track/", track_params, {"default": []}),
+        })
+        track_summary = fetched["summary"]
+        track_cves = fetched["cves"]
+
+    if track_id is None:
+        if tracks_loaded:
+            st.info("No tracks or hosts available.")
+    elif track_cves is not None:  # None: the request failed and was reported
         st.subheader(f"CVEs for Track: {selected_track}")
-        cols = st.columns(2)
-        card_colors = ["#ffecd2", "#fcb69f", "#a1c4fd", "#c2e9fb", "#fbc2eb", "#a6c1ee"]
-        for idx, hc in enumerate(track_cves):
-            cve = hc["cve"]
-            with cols[idx % 2]:
-                st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, {card_colors[idx%len(card_colors)]} 0%, #fff 100%); border-radius: 16px; box-shadow: 0 4px 16px rgba(0,0,0,0.08); padding: 1.5em 1em 1em 1em; margin-bottom: 1.5em;'>
-                        <h3 style='color:#185a9d;'>{cve['cve_id']}</h3>
-                        <p><b>Description:</b> {cve['description']}</p>
-                        <p><b>Score:</b> <span style='color:#e17055;font-weight:bold;'>{cve['score']}</span></p>
-                        <p><b>Impact:</b> <span style='color:#00b894;'>{cve['impact']}</span></p>
-                    </div>
-                """, unsafe_allow_html=True)
-    else:
-        st.info("No tracks or hosts available.")
+        if track_summary:
+            metrics = st.columns(5)
+            metrics[0].metric("Affected hosts", f"{track_summary['affected_host_count']} / {track_summary['host_count']}")
+            metrics[1].metric("CVEs", track_summary['cve_count'])
+            metrics[2].metric("Critical", track_summary['critical'])
+            metrics[3].metric("High", track_summary['high'])
+            metrics[4].metric("Max score", track_summary['max_score'] if track_summary['max_score'] is not None else "-")
+        # The API returns the track's CVEs highest score first; only the
+        # visible page is turned into widgets.
+        mode, page_size = display_controls("track")
+        reset_page("track", (selected_track, tuple(track_severities)))
+        start, stop = pager("track", len(track_cves), page_size)
+        render_entries([(e["cve"], e["hosts"]) for e in track_cves[start:stop]], mode, start)
 
 elif sidebar_tag == "Vulnerabilities":
-    cves_resp = requests.get(f"{API_URL}cves/")
-    cves = cves_resp.json() if cves_resp.status_code == 200 else []
     st.subheader("All Vulnerabilities in the System")
-    cols = st.columns(2)
-    card_colors = ["#ffecd2", "#fcb69f", "#a1c4fd", "#c2e9fb", "#fbc2eb", "#a6c1ee"]
-    for idx, cve in enumerate(cves):
-        with cols[idx % 2]:
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, {card_colors[idx%len(card_colors)]} 0%, #fff 100%); border-radius: 16px; box-shadow: 0 4px 16px rgba(0,0,0,0.08); padding: 1.5em 1em 1em 1em; margin-bottom: 1.5em;'>
-                    <h3 style='color:#185a9d;'>{cve['cve_id']}</h3>
-                    <p><b>Description:</b> {cve['description']}</p>
-                    <p><b>Score:</b> <span style='color:#e17055;font-weight:bold;'>{cve['score']}</span></p>
-                    <p><b>Impact:</b> <span style='color:#00b894;'>{cve['impact']}</span></p>
-                </div>
-            """, unsafe_allow_html=True)
+    filter_cols = st.columns(3)
+    min_score = filter_cols[0].slider("Minimum score", 0.0, 10.0, 0.0, 0.1, key="vuln_min_score")
+    severities = filter_cols[1].multiselect("Severity", SEVERITIES, key="vuln_severity")
+    cve_prefix = filter_cols[2].text_input("CVE ID starts with", key="vuln_cve_prefix")
+    mode, page_size = display_controls("vuln")
+    # Filters are applied by the API so only matching rows are transferred.
+    vuln_params = {"page_size": page_size}
+    if min_score:
+        vuln_params["score_min"] = min_score
+    if severities:
+        vuln_params["severity"] = ",".join(severities)
+    if cve_prefix:
+        vuln_params["cve_id"] = cve_prefix.strip()
+    first_page = requests.Request("GET", f"{API_URL}cves/", params=vuln_params).prepare().url
+
+    # Pages are fetched lazily and kept across reruns; moving past the last
+    # loaded page follows the keyset cursor returned by the API instead of
+    # downloading the whole table.
+    if st.session_state.get('vuln_query') != first_page:
+        st.session_state['vuln_query'] = first_page
+        st.session_state['vuln_cves'] = []
+        st.session_state['vuln_next'] = first_page
+    reset_page("vuln", first_page)
+    if not st.session_state['vuln_cves'] and st.session_state['vuln_next']:
+        load_next_cve_page()
+    start, stop = pager("vuln", len(st.session_state['vuln_cves']), page_size, more=bool(st.session_state['vuln_next']))
+    if len(st.session_state['vuln_cves']) < stop and st.session_state['vuln_next']:
+        if load_next_cve_page():
+            st.rerun()
+    cves = st.session_state['vuln_cves'][start:stop]
+    if cves:
+        render_entries([(cve, None) for cve in cves], mode, start)
+    elif not st.session_state['vuln_next']:
+        # Otherwise loading the page failed, and the error is already shown.
+        st.info("No vulnerabilities match the filters.")